@@ -0,0 +1,201 @@
+# actions.py
+"""
+Vault-wide edit actions that operate directly on the decoded save dict.
+
+These are shared by the GUI (MainWindow.action_*) and the command-line tool
+(cli.py), so this module must not import Qt. Each action returns True if it
+was applied and False if the save does not contain the section it needs.
+SECTIONS lists the top-level sections each action edits in place, so the
+GUI can tell the save model which sections to re-encode. ITEM_FIELDS lists
+the fields the list-wide actions write, so the GUI can record an undo entry
+without copying the section; the other actions only replace keys of their
+sections.
+"""
+from schema import Team
+
+ROOM_UNLOCKS = [
+    "StorageUnlock", "MedbayUnlock", "SciencelabUnlock", "OverseerUnlock",
+    "RadioStationUnlock", "WeaponFactoryUnlock", "GymUnlock", "DojoUnlock",
+    "ArmoryUnlock", "ClassUnlock", "OutfitFactoryUnlock", "CardioUnlock",
+    "BarUnlock", "GameRoomUnlock", "BarberShopUnlock", "PowerPlantUnlock",
+    "WaterroomUnlock", "HydroponicUnlock", "NukacolaUnlock", "DesignFactoryUnlock"
+]
+
+RECIPES = [
+    "Shotgun_Rusty", "Railgun", "LaserPistol_Focused", "PlasmaThrower_Boosted",
+    "PlasmaThrower_Overcharged", "PipePistol_LittleBrother", "CombatShotgun_Hardened"
+]
+
+
+def remove_rocks(data):
+    if data and "vault" in data:
+        data["vault"]["rocks"] = []
+        return True
+    return False
+
+
+def unlock_rooms(data):
+    if data and "unlockableMgr" in data:
+        data["unlockableMgr"]["objectivesInProgress"] = []
+        data["unlockableMgr"]["completed"] = []
+        data["unlockableMgr"]["claimed"] = list(ROOM_UNLOCKS)
+        return True
+    return False
+
+
+def unlock_recipes(data):
+    if data and "survivalW" in data:
+        data["survivalW"]["recipes"] = list(RECIPES)
+        return True
+    return False
+
+
+def max_special_all(data):
+    if data and "dwellers" in data:
+        for d in data["dwellers"].get("dwellers", []):
+            if "stats" in d and "stats" in d["stats"]:
+                for stat in d["stats"]["stats"]:
+                    stat["value"] = 10
+        return True
+    return False
+
+
+def max_happiness_all(data):
+    if data and "dwellers" in data:
+        for d in data["dwellers"].get("dwellers", []):
+            if "happiness" in d:
+                d["happiness"]["happinessValue"] = 100
+        return True
+    return False
+
+
+def heal_all(data):
+    if data and "dwellers" in data:
+        for d in data["dwellers"].get("dwellers", []):
+            if "health" in d:
+                d["health"]["radiationValue"] = 0
+                d["health"]["healthValue"] = d["health"].get("maxHealth", 0)
+        return True
+    return False
+
+
+def clear_emergency(data):
+    if data and "vault" in data and "rooms" in data["vault"]:
+        for room in data["vault"]["rooms"]:
+            room["currentStateName"] = "Idle"
+        return True
+    return False
+
+
+def accept_waiting(data):
+    if data and "dwellerSpawner" in data:
+        data["dwellerSpawner"]["dwellersWaiting"] = []
+        return True
+    return False
+
+
+def unlock_themes(data):
+    if data and "survivalW" in data and "collectedThemes" in data["survivalW"]:
+        for theme in data["survivalW"]["collectedThemes"].get("themeList", []):
+            if "extraData" in theme:
+                theme["extraData"]["partsCollectedCount"] = 9
+                theme["extraData"]["IsNew"] = True
+        return True
+    return False
+
+
+
+# ----- Wasteland teams -----
+# Most of each a dweller carries into the wasteland
+TEAM_SUPPLY_LIMIT = 25
+
+
+def _teams(data):
+    if data and "vault" in data:
+        teams = data["vault"].get("wasteland", {}).get("teams")
+        if isinstance(teams, list):
+            return teams
+    return None
+
+
+def recall_teams(data):
+    teams = _teams(data)
+    if teams is None:
+        return False
+    for team in map(Team, teams):
+        if team.status not in ("", "Returning"):
+            team.status = "Returning"
+    return True
+
+
+def refill_team_supplies(data):
+    teams = _teams(data)
+    if teams is None:
+        return False
+    for team in map(Team, teams):
+        if team.storage() is None:
+            continue
+        resources = team.resources(create=True)
+        if resources.stimpacks < TEAM_SUPPLY_LIMIT:
+            resources.stimpacks = TEAM_SUPPLY_LIMIT
+        if resources.radaway < TEAM_SUPPLY_LIMIT:
+            resources.radaway = TEAM_SUPPLY_LIMIT
+    return True
+
+
+def instant_return(data):
+    teams = _teams(data)
+    if teams is None:
+        return False
+    for team in map(Team, teams):
+        team.update(return_duration=0)
+    return True
+
+
+# Command-line names for every action, in the order they appear in the GUI.
+ACTIONS = {
+    "remove-rocks": remove_rocks,
+    "unlock-rooms": unlock_rooms,
+    "unlock-recipes": unlock_recipes,
+    "max-special": max_special_all,
+    "max-happiness": max_happiness_all,
+    "heal-all": heal_all,
+    "clear-emergency": clear_emergency,
+    "accept-waiting": accept_waiting,
+    "unlock-themes": unlock_themes,
+    "recall-teams": recall_teams,
+    "refill-teams": refill_team_supplies,
+    "instant-return": instant_return,
+}
+
+# Top-level sections each action writes to.
+SECTIONS = {
+    remove_rocks: ("vault",),
+    unlock_rooms: ("unlockableMgr",),
+    unlock_recipes: ("survivalW",),
+    max_special_all: ("dwellers",),
+    max_happiness_all: ("dwellers",),
+    heal_all: ("dwellers",),
+    clear_emergency: ("vault",),
+    accept_waiting: ("dwellerSpawner",),
+    unlock_themes: ("survivalW",),
+    recall_teams: ("vault",),
+    refill_team_supplies: ("vault",),
+    instant_return: ("vault",),
+}
+
+# List-wide actions: (path of the list, fields written in each item; "*" = every element)
+ITEM_FIELDS = {
+    max_special_all: (("dwellers", "dwellers"), [("stats", "stats", "*", "value")]),
+    max_happiness_all: (("dwellers", "dwellers"), [("happiness", "happinessValue")]),
+    heal_all: (("dwellers", "dwellers"), [("health", "radiationValue"), ("health", "healthValue")]),
+    clear_emergency: (("vault", "rooms"), [("currentStateName",)]),
+    unlock_themes: (("survivalW", "collectedThemes", "themeList"),
+                    [("extraData", "partsCollectedCount"), ("extraData", "IsNew")]),
+    recall_teams: (("vault", "wasteland", "teams"), [("status",)]),
+    refill_team_supplies: (("vault", "wasteland", "teams"), [
+        ("teamEquipment", "storage", "resources", "StimPack"), ("teamEquipment", "storage", "resources", "RadAway"),
+        ("actor", "equipment", "storage", "resources", "StimPack"),
+        ("actor", "equipment", "storage", "resources", "RadAway")]),
+    instant_return: (("vault", "wasteland", "teams"), [("returnTripDuration",)]),
+}
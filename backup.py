@@ -0,0 +1,237 @@
+# backup.py
+"""
+Versioned backups of .sav files, driven by the Backup settings.
+
+Every save file gets its own store inside the backup folder, named after
+the file and a hash of the folder it is in (see vault_name()):
+
+    <backup_folder>/<vault name>-<folder hash>/index.json
+    <backup_folder>/<vault name>-<folder hash>/packs/<version>.pack
+
+A version is the decrypted save JSON cut into chunks at value boundaries.
+Cut points are chosen from the content itself, so editing one dweller only
+changes the chunks around that dweller. Chunks are zlib-compressed and
+stored once: a new version's pack holds only chunks that no stored version
+has, so keeping many versions of a large vault costs roughly the size of
+what changed between them. A file whose hash matches a stored version is
+not backed up again. This module does not import Qt.
+"""
+import os
+import re
+import json
+import time
+import zlib
+import hashlib
+
+from savecodec import decrypt_stream, write_sav
+
+INDEX_NAME = "index.json"
+PACK_DIR = "packs"
+# Chunk sizes in plaintext bytes. Between the limits, a chunk ends after a
+# "}," or "]," whose preceding CUT_WINDOW bytes hash to 0 under CUT_MASK.
+MIN_CHUNK = 2 * 1024
+MAX_CHUNK = 64 * 1024
+CUT_WINDOW = 32
+CUT_MASK = 0x3F
+COMPRESS_LEVEL = 6
+
+_BOUNDARY = re.compile(rb'[}\]],')
+_UNSAFE = re.compile(r'[^\w.-]+')
+
+
+def split_chunks(plain):
+    """Split plaintext bytes into content-defined chunks (memoryviews)."""
+    view = memoryview(plain)
+    n = len(plain)
+    chunks = []
+    start = 0
+    while n - start > MIN_CHUNK:
+        limit = min(n, start + MAX_CHUNK)
+        cut = limit
+        for m in _BOUNDARY.finditer(plain, start + MIN_CHUNK, limit):
+            end = m.end()
+            if zlib.crc32(view[end - CUT_WINDOW:end]) & CUT_MASK == 0:
+                cut = end
+                break
+        chunks.append(view[start:cut])
+        start = cut
+    if start < n or not chunks:
+        chunks.append(view[start:])
+    return chunks
+
+
+def chunk_id(chunk):
+    return hashlib.blake2b(chunk, digest_size=12).hexdigest()
+
+
+def vault_name(path):
+    """
+    Store name for a save file: its base name without extension plus a
+    short hash of its folder, since every game names its saves Vault1.sav
+    to Vault3.sav and copies from different folders must not share a store.
+    """
+    base = os.path.splitext(os.path.basename(path))[0]
+    folder = os.path.normcase(os.path.abspath(os.path.dirname(path)))
+    digest = hashlib.blake2b(folder.encode("utf-8", "surrogatepass"), digest_size=4).hexdigest()
+    return f"{_UNSAFE.sub('_', base) or 'save'}-{digest}"
+
+
+class BackupStore:
+    """The backups of one vault: a list of versions plus the chunk packs they share."""
+
+    def __init__(self, folder, vault):
+        self.vault = vault
+        self.path = os.path.join(folder, vault)
+        self.pack_dir = os.path.join(self.path, PACK_DIR)
+        self.versions = []
+        self.chunks = {}  # chunk id -> [pack file, offset, length]
+        self.sequence = 0
+        index = os.path.join(self.path, INDEX_NAME)
+        if os.path.exists(index):
+            with open(index, "r") as f:
+                data = json.load(f)
+            self.versions = data.get("versions", [])
+            self.chunks = data.get("chunks", {})
+            self.sequence = data.get("sequence", len(self.versions))
+
+    def _save_index(self):
+        index = os.path.join(self.path, INDEX_NAME)
+        tmp = index + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"format": 1, "vault": self.vault, "sequence": self.sequence,
+                       "versions": self.versions, "chunks": self.chunks}, f)
+        os.replace(tmp, index)
+
+    def find(self, sha256):
+        for v in self.versions:
+            if v["sha256"] == sha256:
+                return v
+        return None
+
+    def version(self, name):
+        for v in self.versions:
+            if v["name"] == name:
+                return v
+        raise KeyError(f"No backup named {name!r} in {self.vault}")
+
+    # ----- Writing -----
+    def add(self, raw, source="", append_timestamp=True):
+        """
+        Store the .sav content raw (bytes) as a new version and return its
+        entry, or None if an identical file is already stored.
+        """
+        sha = hashlib.sha256(raw).hexdigest()
+        if self.find(sha):
+            return None
+        plain = decrypt_stream(raw)
+        self.sequence += 1
+        if append_timestamp:
+            name = f"{self.vault}_{time.strftime('%Y%m%d_%H%M%S')}"
+            if any(v["name"] == name for v in self.versions):
+                name += f"_{self.sequence}"
+        else:
+            name = f"{self.vault}_{self.sequence:03d}"
+        os.makedirs(self.pack_dir, exist_ok=True)
+        pack = name + ".pack"
+        ids = []
+        new = {}
+        with open(os.path.join(self.pack_dir, pack), "wb") as f:
+            offset = 0
+            for chunk in split_chunks(plain):
+                cid = chunk_id(chunk)
+                ids.append(cid)
+                if cid in self.chunks or cid in new:
+                    continue
+                blob = zlib.compress(chunk, COMPRESS_LEVEL)
+                f.write(blob)
+                new[cid] = [pack, offset, len(blob)]
+                offset += len(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        self.chunks.update(new)
+        entry = {"name": name, "created": time.strftime("%Y-%m-%d %H:%M:%S"), "source": source,
+                 "sha256": sha, "size": len(raw), "plain_size": len(plain),
+                 "stored_size": offset, "pack": pack, "chunks": ids}
+        self.versions.append(entry)
+        self._save_index()
+        return entry
+
+    def prune(self, keep):
+        """
+        Drop the oldest versions until at most keep remain. Chunks from a
+        dropped version's pack that newer versions still use are moved into
+        the pack of the oldest remaining version before the pack is deleted.
+        """
+        keep = max(1, keep)
+        removed = []
+        while len(self.versions) > keep:
+            old = self.versions.pop(0)
+            target = self.versions[0]["pack"]
+            live = {cid for v in self.versions for cid in v["chunks"]}
+            old_path = os.path.join(self.pack_dir, old["pack"])
+            located = [cid for cid, loc in self.chunks.items() if loc[0] == old["pack"]]
+            if any(cid in live for cid in located):
+                with open(old_path, "rb") as src, open(os.path.join(self.pack_dir, target), "ab") as dst:
+                    offset = dst.seek(0, os.SEEK_END)
+                    for cid in located:
+                        if cid not in live:
+                            continue
+                        _, start, length = self.chunks[cid]
+                        src.seek(start)
+                        dst.write(src.read(length))
+                        self.chunks[cid] = [target, offset, length]
+                        offset += length
+                    dst.flush()
+                    os.fsync(dst.fileno())
+            for cid in located:
+                if cid not in live:
+                    del self.chunks[cid]
+            # The index must stop pointing at the old pack before it is deleted
+            self._save_index()
+            if os.path.exists(old_path):
+                os.remove(old_path)
+            removed.append(old["name"])
+        return removed
+
+    # ----- Reading -----
+    def plaintext(self, name):
+        """Rebuild the decrypted JSON bytes of a version."""
+        v = self.version(name)
+        handles = {}
+        parts = []
+        try:
+            for cid in v["chunks"]:
+                pack, start, length = self.chunks[cid]
+                f = handles.get(pack)
+                if f is None:
+                    f = handles[pack] = open(os.path.join(self.pack_dir, pack), "rb")
+                f.seek(start)
+                parts.append(zlib.decompress(f.read(length)))
+        finally:
+            for f in handles.values():
+                f.close()
+        return b"".join(parts)
+
+    def restore(self, name, dest):
+        """Write a version back out as an encrypted .sav file at dest."""
+        write_sav(dest, self.plaintext(name))
+
+    def disk_usage(self):
+        total = 0
+        for name in os.listdir(self.pack_dir) if os.path.isdir(self.pack_dir) else []:
+            total += os.path.getsize(os.path.join(self.pack_dir, name))
+        return total
+
+
+def backup_file(path, folder, max_files=5, append_timestamp=True):
+    """
+    Back up the .sav at path into folder and rotate old versions.
+    Returns (store, entry); entry is None when the file was already backed up.
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    store = BackupStore(folder, vault_name(path))
+    entry = store.add(raw, source=os.path.abspath(path), append_timestamp=append_timestamp)
+    if entry is not None:
+        store.prune(max_files)
+    return store, entry
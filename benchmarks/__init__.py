@@ -0,0 +1,10 @@
+# benchmarks/__init__.py
+"""
+Performance benchmarks for the save editor.
+
+    python -m benchmarks.run --dwellers 2000 -o results.json
+    python -m benchmarks.run --compare old.json results.json
+
+synthetic.py builds encrypted saves of any size; run.py times every stage
+of the load / edit / save cycle and writes the results as JSON.
+"""
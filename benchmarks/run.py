@@ -0,0 +1,273 @@
+# benchmarks/run.py
+"""
+Time the load / edit / save cycle on a synthetic save.
+
+    python -m benchmarks.run [--dwellers N] [--rooms N] [--teams N] [--items N]
+                             [--repeat N] [--no-gui] [-o results.json]
+    python -m benchmarks.run --compare baseline.json results.json [--threshold 1.25]
+
+Stages: read, decrypt, index (SaveModel), parse (every section), setData of
+each tab (offscreen Qt), every MainWindow.action_* method, serialize
+(SaveModel.dumps) and encrypt. serialize.one_field times the save of a
+loaded vault after one dweller's name changed, the first time (clean
+items are cut out of the original bytes) and again after a previous save
+(clean items come from the cache). diskcache times reopening the save from
+savecache (read, checksum, unmarshal and build the SaveModel).
+schema.read reads every Dweller field of every dweller through the
+schema views, and schema.update writes the same values back (which
+compares them and writes nothing). validate runs every validation.py rule on
+a parsed save; validate.vault_edit runs the validator again after the vault
+section was marked dirty (only the rules reading it run). startup and startup.eager_tabs time
+`python main.py` from spawning the process to its first paint, with tabs
+built when shown / all up front. Each stage runs --repeat times on fresh
+data and reports min / median / max seconds. --compare exits with status 1 if
+any stage's median got slower than baseline * threshold.
+"""
+import io
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+import subprocess
+
+from savecodec import decrypt_stream, encrypt_stream
+from savemodel import SaveModel
+from savecache import DiskCache
+from schema import Dweller
+from validation import Validator
+from benchmarks.synthetic import generate_save, write_save
+
+TABS = ["vaultTab", "dwellerTab", "wastelandTab", "roomsTab", "advancedTab"]
+
+
+def _git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _summary(runs):
+    return {"min": min(runs), "median": statistics.median(runs), "max": max(runs), "runs": runs}
+
+
+class Bench:
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.results = {}
+
+    def time(self, name, func, setup=None):
+        """Run func(setup()) repeat times, timing only func."""
+        runs = []
+        for _ in range(self.repeat):
+            arg = setup() if setup else None
+            start = time.perf_counter()
+            func(arg) if setup else func()
+            runs.append(time.perf_counter() - start)
+        self.results[name] = _summary(runs)
+        return runs
+
+
+def _saved(plain):
+    model = SaveModel(plain)
+    model["dwellers"]
+    model.mark_dirty("dwellers")
+    model.dumps()
+    return model
+
+
+def _one_field_edit(model):
+    dwellers = model["dwellers"].get("dwellers") or [{}]
+    d = dwellers[len(dwellers) // 2]
+    d["name"] = d.get("name", "") + "x"
+    model.mark_dirty("dwellers", d)
+    return model
+
+
+def bench_codec(bench, path):
+    with open(path, "rb") as f:
+        raw = f.read()
+    bench.time("read", lambda: open(path, "rb").read())
+    bench.time("decrypt", lambda: decrypt_stream(raw))
+    plain = bytes(decrypt_stream(raw))
+    bench.time("index", lambda: SaveModel(plain))
+    bench.time("parse", lambda m: m.to_dict(), setup=lambda: SaveModel(plain))
+    edited = lambda: SaveModel.from_dict(json.loads(plain))
+    bench.time("serialize", lambda m: m.dumps(), setup=edited)
+    bench.time("serialize.one_field", lambda m: m.dumps(), setup=lambda: _one_field_edit(SaveModel(plain)))
+    bench.time("serialize.one_field.resave", lambda m: m.dumps(), setup=lambda: _one_field_edit(_saved(plain)))
+    bench.time("encrypt", lambda: encrypt_stream(plain, io.BytesIO()))
+    import tempfile
+    cache = DiskCache(tempfile.mkdtemp())
+    cache.put("bench", plain, SaveModel(plain).spans())
+    bench.time("diskcache", lambda: SaveModel(*cache.get("bench")))
+    cache.clear()
+    os.rmdir(cache.folder)
+    return plain
+
+
+def bench_schema(bench, plain):
+    dwellers = SaveModel(plain)["dwellers"].get("dwellers", [])
+    names = list(Dweller.FIELDS)
+    bench.time("schema.read", lambda: [Dweller(d).values(*names) for d in dwellers])
+    values = [Dweller(d).values(*names) for d in dwellers]
+    bench.time("schema.update", lambda: [Dweller(d).update(**v) for d, v in zip(dwellers, values)])
+
+
+def _validated(plain):
+    model = SaveModel(plain)
+    model.to_dict()
+    validator = Validator()
+    validator.run(model)
+    model.mark_dirty("vault")
+    return validator, model
+
+
+def bench_validation(bench, plain):
+    def parsed():
+        model = SaveModel(plain)
+        model.to_dict()
+        return model
+    bench.time("validate", lambda m: Validator().run(m), setup=parsed)
+    bench.time("validate.vault_edit", lambda vm: vm[0].run(vm[1]), setup=lambda: _validated(plain))
+
+
+def _startup(extra):
+    """Seconds from spawning main.py until it reports its first paint."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, os.path.join(root, "main.py"), "--startup-time"] + extra,
+                            cwd=root, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    for line in proc.stdout:
+        if line.startswith("startup "):
+            elapsed = time.perf_counter() - start
+            break
+    else:
+        elapsed = float("nan")
+    proc.wait()
+    return elapsed
+
+
+def bench_startup(bench):
+    for name, extra in (("startup", []), ("startup.eager_tabs", ["--eager-tabs"])):
+        bench.results[name] = _summary([_startup(extra) for _ in range(bench.repeat)])
+
+
+def bench_gui(bench, plain):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5 import QtWidgets
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    import main
+    # The actions report through message boxes; keep them from blocking
+    QtWidgets.QMessageBox.information = staticmethod(lambda *a, **k: None)
+    QtWidgets.QMessageBox.warning = staticmethod(lambda *a, **k: None)
+    window = main.MainWindow(lazy=False)
+
+    def fresh():
+        model = SaveModel(plain)
+        model.to_dict()  # time the tab itself, not the lazy section parse
+        window.save_data = model
+        window.populatedTabs = set()
+        return model
+
+    for name in TABS:
+        tab = getattr(window, name)
+        bench.time(f"setData.{name}", lambda _: (window.populateTab(tab), app.processEvents()), setup=fresh)
+    for name in sorted(n for n in dir(main.MainWindow) if n.startswith("action_")):
+        bench.time(name, lambda _: getattr(window, name)(), setup=fresh)
+    window.close()
+
+
+def compare(baseline_path, current_path, threshold, stream=sys.stdout):
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    with open(current_path) as f:
+        current = json.load(f)["results"]
+    regressions = 0
+    print(f"{'stage':<32} {'baseline':>11} {'current':>11} {'ratio':>7}", file=stream)
+    for name in sorted(set(baseline) | set(current)):
+        if name not in baseline or name not in current:
+            print(f"{name:<32} {'(only in ' + ('current' if name in current else 'baseline') + ')':>31}", file=stream)
+            continue
+        old, new = baseline[name]["median"], current[name]["median"]
+        ratio = new / old if old else float("inf")
+        flag = ""
+        if ratio > threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(f"{name:<32} {old * 1000:>8.2f} ms {new * 1000:>8.2f} ms {ratio:>6.2f}x{flag}", file=stream)
+    return regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description="Save editor benchmarks")
+    parser.add_argument("--dwellers", type=int, default=1000)
+    parser.add_argument("--rooms", type=int, default=120)
+    parser.add_argument("--teams", type=int, default=12)
+    parser.add_argument("--items", type=int, default=2000, help="vault inventory items")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-gui", action="store_true", help="skip the Qt tab and action timings")
+    parser.add_argument("-o", "--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="compare two result files instead of running")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="slowdown ratio that counts as a regression in --compare")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.compare:
+        return 1 if compare(args.compare[0], args.compare[1], args.threshold) else 0
+
+    import tempfile
+    params = {"dwellers": args.dwellers, "rooms": args.rooms, "teams": args.teams,
+              "items": args.items, "seed": args.seed, "repeat": args.repeat}
+    data = generate_save(args.dwellers, args.rooms, args.teams, args.items, args.seed)
+    fd, path = tempfile.mkstemp(suffix=".sav")
+    os.close(fd)
+    try:
+        write_save(path, data)
+        bench = Bench(args.repeat)
+        plain = bench_codec(bench, path)
+        bench_schema(bench, plain)
+        bench_validation(bench, plain)
+        if not args.no_gui:
+            bench_gui(bench, plain)
+            bench_startup(bench)
+        size = os.path.getsize(path)
+    finally:
+        os.remove(path)
+
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": params,
+            "file_size": size,
+            "plain_size": len(plain),
+        },
+        "results": bench.results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+        for name, r in bench.results.items():
+            print(f"{name:<32} {r['median'] * 1000:>9.2f} ms", file=sys.stderr)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
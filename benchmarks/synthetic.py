@@ -0,0 +1,153 @@
+# benchmarks/synthetic.py
+"""
+Synthetic Fallout Shelter saves for benchmarking.
+
+generate_save() returns a save dict with the sections the editor tabs read
+(vault resources and rooms, wasteland teams, dwellers, survivalW,
+unlockableMgr, dwellerSpawner). The contents are random but seeded, so the
+same arguments always produce the same save.
+"""
+import json
+import random
+
+from savecodec import encrypt_stream
+
+FIRST_NAMES = ["Abby", "Ben", "Cora", "Dale", "Eve", "Finn", "Gwen", "Hank", "Iris", "Jack",
+               "Kate", "Liam", "Mona", "Nate", "Olga", "Paul", "Quinn", "Rosa", "Sam", "Tara"]
+LAST_NAMES = ["Adams", "Baker", "Cole", "Diaz", "Evans", "Fox", "Gray", "Hill", "Irwin", "Jones"]
+OUTFITS = ["JumpSuit", "V111JumpSuit", "MilitaryJumpSuit", "WastelandGear", "LabCoat", "RadiationSuit"]
+WEAPONS = ["Fist", "Pistol", "AssaultRifle", "LaserPistol", "Shotgun_Rusty", "Railgun"]
+ROOM_TYPES = ["Energy", "Water", "Food", "Storage", "Medbay", "Sciencelab", "LivingQuarters",
+              "Radio", "Overseer", "Training"]
+ROOM_STATES = ["Idle", "Working", "Fire", "Radroach", "MoleRat"]
+JUNK = ["Junk_Cloth", "Junk_Screw", "Junk_Adhesive", "Junk_Circuitry", "Junk_Gold", "Junk_Steel"]
+
+
+def _item(rng):
+    kind = rng.random()
+    if kind < 0.4:
+        return {"id": rng.choice(WEAPONS), "type": "Weapon", "hasBeenAssigned": False,
+                "hasRandonWeaponBeenAssigned": False}
+    if kind < 0.7:
+        return {"id": rng.choice(OUTFITS), "type": "Outfit", "hasBeenAssigned": False,
+                "hasRandonWeaponBeenAssigned": False}
+    return {"id": rng.choice(JUNK), "type": "Junk", "hasBeenAssigned": False,
+            "hasRandonWeaponBeenAssigned": False}
+
+
+def _dweller(rng, serialize_id):
+    level = rng.randint(1, 50)
+    max_health = 105 + level * 10
+    return {
+        "serializeId": serialize_id,
+        "name": rng.choice(FIRST_NAMES),
+        "lastName": rng.choice(LAST_NAMES),
+        "gender": rng.choice([1, 2]),
+        "happiness": {"happinessValue": rng.randint(10, 100)},
+        "health": {"healthValue": rng.randint(1, max_health), "maxHealth": max_health,
+                   "radiationValue": rng.randint(0, 30), "permaDeath": False, "lastLevelUpdated": level},
+        "experience": {"experienceValue": rng.randint(0, 10**6), "currentLevel": level,
+                       "currentXP": rng.randint(0, 5000), "storage": 0, "accum": 0,
+                       "needLvUp": False, "wastelandExperience": 0},
+        "relations": {"relations": [], "partner": -1, "lastPartner": -1},
+        "stats": {"stats": [{"value": rng.randint(1, 10), "mod": 0, "exp": 0} for _ in range(8)]},
+        "equipedOutfit": {"id": rng.choice(OUTFITS), "type": "Outfit", "hasBeenAssigned": False,
+                          "hasRandonWeaponBeenAssigned": False},
+        "equipedWeapon": {"id": rng.choice(WEAPONS), "type": "Weapon", "hasBeenAssigned": False,
+                          "hasRandonWeaponBeenAssigned": False},
+        "pregnant": rng.random() < 0.05,
+        "babyReady": rng.random() < 0.02,
+        "assigned": True,
+        "sawIncident": False,
+        "WillGoToWasteland": False,
+        "skinColor": rng.randint(0, 0xFFFFFFFF),
+        "hairColor": rng.randint(0, 0xFFFFFFFF),
+        "outfitColor": rng.randint(0, 0xFFFFFFFF),
+        "hair": str(rng.randint(1, 20)),
+        "faceMask": "",
+        "rarity": rng.choice(["Normal", "Rare", "Legendary"]),
+        "deathTime": -1,
+        "savedRoom": rng.randint(-1, 200),
+    }
+
+
+def _room(rng, i, dweller_ids):
+    return {
+        "type": "Production",
+        "class": "Production",
+        "RoomType": rng.choice(ROOM_TYPES),
+        "deserializeID": i,
+        "row": i // 8 + 1,
+        "col": (i % 8) * 3,
+        "mergeLevel": rng.randint(1, 3),
+        "level": rng.randint(1, 3),
+        "power": True,
+        "roomHealth": {"damageValue": 0, "initialValue": 100},
+        "currentStateName": rng.choice(ROOM_STATES),
+        "progress": rng.randint(0, 1000),
+        "dwellers": rng.sample(dweller_ids, min(len(dweller_ids), 6)),
+    }
+
+
+def _team(rng, i, dweller, is_actor, items_per_team):
+    team = {
+        "teamIndex": i,
+        "elapsedTimeAliveExploring": rng.randint(0, 200000),
+        "returnTripDuration": rng.randint(0, 20000),
+        "status": rng.choice(["Exploring", "Returning"]),
+    }
+    resources = {"StimPack": rng.randint(0, 25), "RadAway": rng.randint(0, 25),
+                 "Nuka": rng.randint(0, 5000), "NukaColaQuantum": rng.randint(0, 5)}
+    items = [_item(rng) for _ in range(items_per_team)]
+    if is_actor:
+        team["actor"] = {"name": dweller["name"], "equipment": {"storage": {"resources": resources},
+                                                                "inventory": {"items": items}}}
+    else:
+        team["dweller"] = {"name": dweller["name"], "serializeId": dweller["serializeId"]}
+        team["teamEquipment"] = {"storage": {"resources": resources}, "inventory": {"items": items}}
+    return team
+
+
+def generate_save(dwellers=200, rooms=60, teams=5, items=500, seed=0):
+    """Return a synthetic save dict of the requested size."""
+    rng = random.Random(seed)
+    dweller_list = [_dweller(rng, i) for i in range(dwellers)]
+    ids = [d["serializeId"] for d in dweller_list]
+    explorers = dweller_list or [{"name": "Nobody", "serializeId": -1}]
+    # Every fourth team is an actor team (the Wasteland tab lists them separately)
+    team_list = [_team(rng, i, explorers[i % len(explorers)], i % 4 == 3, 5) for i in range(teams)]
+    return {
+        "appVersion": "1.17.1",
+        "timeMgr": {"gameTime": rng.random() * 10**6, "questTime": 0},
+        "vault": {
+            "VaultName": str(rng.randint(0, 999)).zfill(3),
+            "VaultMode": "Normal",
+            "VaultTheme": 0,
+            "XP": rng.randint(0, 10**6),
+            "population": dwellers,
+            "happiness": rng.randint(0, 100),
+            "score": rng.randint(0, 10**6),
+            "storage": {"resources": {"Nuka": rng.randint(0, 10**6), "Food": 5000.0, "Energy": 5000.0,
+                                      "Water": 5000.0, "StimPack": 50, "RadAway": 50,
+                                      "NukaColaQuantum": 10, "Lunchbox": 0}},
+            "LunchBoxesByType": [rng.randint(0, 3) for _ in range(10)],
+            "LunchBoxesCount": 10,
+            "rocks": [{"r": rng.randint(1, 25), "c": rng.randint(0, 25), "rockName": "Rock"}
+                      for _ in range(rooms // 4)],
+            "rooms": [_room(rng, i, ids) for i in range(rooms)],
+            "inventory": {"items": [_item(rng) for _ in range(items)]},
+            "wasteland": {"teams": team_list},
+        },
+        "dwellers": {"dwellers": dweller_list, "id": dwellers, "actors": []},
+        "survivalW": {"recipes": [], "collectedThemes": {"themeList": [
+            {"id": f"Theme{i}", "extraData": {"partsCollectedCount": rng.randint(0, 9), "IsNew": False}}
+            for i in range(12)]}},
+        "unlockableMgr": {"objectivesInProgress": [], "completed": [], "claimed": []},
+        "dwellerSpawner": {"dwellersWaiting": [_dweller(rng, dwellers + i) for i in range(3)]},
+    }
+
+
+def write_save(path, data):
+    """Encrypt a save dict to a .sav file."""
+    with open(path, "wb") as f:
+        encrypt_stream(json.dumps(data, separators=(',', ':')), f)
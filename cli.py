@@ -0,0 +1,320 @@
+# cli.py
+"""
+Headless command-line mode for bulk .sav operations.
+
+Examples:
+    python cli.py decrypt saves/ -o json/ --jobs 4
+    python cli.py encrypt json/Vault1.json -o saves/
+    python cli.py edit saves/ --in-place -a heal-all -a remove-rocks
+    python cli.py edit Vault1.sav -o out/ --set "set Endurance = 10 where level > 30"
+    python cli.py edit saves/ --in-place --script max_caps.py
+    python cli.py decrypt - < Vault1.sav > Vault1.json
+    python cli.py diff before.sav after.sav [--json]
+    python cli.py check saves/
+
+Directories are expanded to the matching files they contain and processed
+across a multiprocessing pool. A path of "-" streams stdin to stdout. A
+per-file timing summary is printed to stderr. Qt is never imported here.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+
+import actions
+import columnar
+import history
+import savediff
+import scripting
+import validation
+from savecodec import decrypt_stream, encrypt_stream
+from savemodel import SaveModel
+
+INPUT_SUFFIX = {"decrypt": ".sav", "encrypt": ".json", "edit": ".sav", "check": ".sav"}
+OUTPUT_SUFFIX = {"decrypt": ".json", "encrypt": ".sav", "edit": ".sav"}
+PHASES = ["read", "decrypt", "parse", "edit", "serialize", "encrypt", "write"]
+
+
+def collect_inputs(paths, command):
+    """Expand directories into the files they contain with the command's input suffix."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            suffix = INPUT_SUFFIX[command]
+            for name in sorted(os.listdir(path)):
+                full = os.path.join(path, name)
+                if name.lower().endswith(suffix) and os.path.isfile(full):
+                    files.append(full)
+        else:
+            files.append(path)
+    return files
+
+
+def output_path(src, command, out_dir, in_place):
+    if in_place:
+        return src
+    base = os.path.splitext(os.path.basename(src))[0] + OUTPUT_SUFFIX[command]
+    return os.path.join(out_dir if out_dir else os.path.dirname(src), base)
+
+
+def run_command(command, src, dst, action_names, indent, statements=(), scripts=()):
+    """
+    Run one command from the binary stream src to the binary stream dst.
+    Returns a dict of phase name -> seconds.
+    """
+    timings = {}
+
+    def mark(phase, start):
+        now = time.perf_counter()
+        timings[phase] = timings.get(phase, 0.0) + now - start
+        return now
+
+    t = time.perf_counter()
+    if command == "encrypt":
+        text = src.read()
+        t = mark("read", t)
+        json.loads(text)  # refuse to encrypt anything that is not valid JSON
+        t = mark("parse", t)
+        encrypt_stream(text, dst)
+        mark("encrypt", t)
+        return timings
+
+    plain = decrypt_stream(src)
+    t = mark("decrypt", t)
+    if command == "decrypt":
+        if indent is not None:
+            data = json.loads(plain)
+            t = mark("parse", t)
+            plain = json.dumps(data, indent=indent).encode('utf-8')
+            t = mark("serialize", t)
+        dst.write(plain)
+        mark("write", t)
+        return timings
+
+    # Only the sections the actions touch are parsed; the rest is copied verbatim.
+    data = SaveModel(plain)
+    t = mark("parse", t)
+    for name in action_names:
+        action = actions.ACTIONS[name]
+        if action(data):
+            for key in actions.SECTIONS[action]:
+                data.mark_dirty(key)
+        else:
+            print(f"warning: {name} not applicable (missing section)", file=sys.stderr)
+    if statements:
+        # Bulk edits run on NumPy columns; changed values are written back once
+        columns = columnar.DwellerColumns(data.get("dwellers", {}).get("dwellers", []))
+        for statement in statements:
+            columns.apply(statement)
+        for i in columns.changed_rows():
+            data.mark_dirty("dwellers", columns.dwellers[i])
+        columns.sync()
+    if scripts:
+        # See scripting.py; script output goes to stderr
+        runner = scripting.ScriptRunner(data, output=lambda text: sys.stderr.write(text))
+        ops = runner.run(scripts)
+        history.apply(data, ops)
+        for op in ops:
+            for path in op.paths():
+                data.mark_path_dirty(path)
+    t = mark("edit", t)
+    json_bytes = data.dumps()
+    t = mark("serialize", t)
+    encrypt_stream(json_bytes, dst)
+    mark("encrypt", t)
+    return timings
+
+
+def process_file(task):
+    """Pool worker: run one command on one file. Returns (src, size, timings, error)."""
+    command, src, dst, action_names, indent, statements, scripts = task
+    tmp = dst + ".tmp"
+    try:
+        size = os.path.getsize(src)
+        os.makedirs(os.path.dirname(os.path.abspath(dst)), exist_ok=True)
+        # Write next to the destination and rename, so --in-place never
+        # truncates the file it is still reading.
+        with open(src, "rb") as fin, open(tmp, "wb") as fout:
+            timings = run_command(command, fin, fout, action_names, indent, statements, scripts)
+        os.replace(tmp, dst)
+        return src, size, timings, None
+    except Exception as e:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return src, 0, {}, str(e)
+
+
+def print_summary(results, wall, jobs, stream=sys.stderr):
+    used = [p for p in PHASES if any(p in r[2] for r in results)]
+    width = max([len(os.path.basename(r[0])) for r in results] + [4])
+    header = f"{'file':<{width}} {'size':>10}" + "".join(f" {p:>10}" for p in used) + f" {'total':>10}"
+    print(header, file=stream)
+    print("-" * len(header), file=stream)
+    for src, size, timings, error in results:
+        name = os.path.basename(src)
+        if error:
+            print(f"{name:<{width}} FAILED: {error}", file=stream)
+            continue
+        row = f"{name:<{width}} {size / 1024:>7.1f} KB"
+        for p in used:
+            row += f" {timings[p] * 1000:>7.1f} ms" if p in timings else f" {'-':>10}"
+        row += f" {sum(timings.values()) * 1000:>7.1f} ms"
+        print(row, file=stream)
+    failed = sum(1 for r in results if r[3])
+    print(f"{len(results)} file(s), {failed} failed, {wall * 1000:.1f} ms wall, {jobs} worker(s)", file=stream)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Fallout Shelter save editor (headless mode)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in [("decrypt", "decrypt .sav files to JSON"),
+                            ("encrypt", "encrypt JSON files to .sav"),
+                            ("edit", "apply vault actions to .sav files")]:
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("paths", nargs="+", help="files or directories, or - for stdin/stdout")
+        p.add_argument("-o", "--output", help="output directory (default: next to each input)")
+        p.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="worker processes")
+        p.add_argument("-q", "--quiet", action="store_true", help="do not print the timing summary")
+        if name == "decrypt":
+            p.add_argument("--indent", type=int, default=None, help="pretty-print JSON with this indent")
+        if name == "edit":
+            p.add_argument("-a", "--action", dest="actions", action="append", default=[],
+                           choices=list(actions.ACTIONS), help="action to apply (repeatable)")
+            p.add_argument("-s", "--set", dest="statements", action="append", default=[], metavar="STATEMENT",
+                           help='bulk dweller edit, e.g. "set Endurance = 10 where level > 30" (repeatable, needs NumPy)')
+            p.add_argument("-x", "--script", dest="scripts", action="append", default=[], metavar="FILE",
+                           help="Python script to run on the save, see scripting.py (repeatable)")
+            p.add_argument("--in-place", action="store_true", help="overwrite the input files")
+    p = sub.add_parser("diff", help="show what changed between two .sav files")
+    p.add_argument("old", help="the earlier save")
+    p.add_argument("new", help="the later save")
+    p.add_argument("--json", action="store_true", help="print the changes as JSON")
+    p.add_argument("-q", "--quiet", action="store_true", help="do not print the timing")
+    p = sub.add_parser("check", help="look for inconsistencies in .sav files")
+    p.add_argument("paths", nargs="+", help="files or directories")
+    sub.add_parser("actions", help="list the available edit actions")
+    return parser
+
+
+def run_diff(args):
+    """Print the changes from args.old to args.new; exit status 1 if there are any (like diff)."""
+    start = time.perf_counter()
+    try:
+        changes = savediff.diff_files(args.old, args.new)
+    except Exception as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    if args.json:
+        print(json.dumps(savediff.to_json(changes), indent=2))
+    else:
+        for line in savediff.format_changes(changes):
+            print(line)
+    if not args.quiet:
+        print(f"{len(changes)} change(s), {(time.perf_counter() - start) * 1000:.1f} ms", file=sys.stderr)
+    return 1 if changes else 0
+
+
+def run_check(args):
+    """Print the problems validation.py finds in each file; exit status 1 if there are any."""
+    files = collect_inputs(args.paths, "check")
+    if not files:
+        print("error: no input files found", file=sys.stderr)
+        return 2
+    status = 0
+    for path in files:
+        try:
+            with open(path, "rb") as f:
+                problems = validation.Validator().run(SaveModel(decrypt_stream(f)))
+        except Exception as e:
+            print(f"{path}: error: {e}", file=sys.stderr)
+            status = 2
+            continue
+        for p in problems:
+            fix = f" (repair: {savediff.format_value(p.fix)})" if p.fixable else ""
+            print(f"{path}: {p.rule}: {savediff.format_path(p.path)}: {p.message}{fix}")
+        print(f"{path}: {validation.summary(problems)}", file=sys.stderr)
+        if problems and not status:
+            status = 1
+    return status
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "actions":
+        for name, func in actions.ACTIONS.items():
+            print(f"{name:<16} actions.{func.__name__}")
+        return 0
+    if args.command == "diff":
+        return run_diff(args)
+    if args.command == "check":
+        return run_check(args)
+
+    action_names = getattr(args, "actions", None) or []
+    statements = getattr(args, "statements", None) or []
+    indent = getattr(args, "indent", None)
+    scripts = []
+    if args.command == "edit":
+        if not (action_names or statements or args.scripts):
+            print("error: edit needs at least one --action, --set or --script", file=sys.stderr)
+            return 2
+        # Read and compile the scripts once up front, like the statements below
+        try:
+            for path in args.scripts:
+                with open(path, encoding="utf-8") as f:
+                    scripts.append((os.path.basename(path), f.read()))
+                scripting.compile_script(scripts[-1][1], scripts[-1][0])
+        except (OSError, scripting.ScriptError) as e:
+            print(f"error: {e}", file=sys.stderr)
+            return 2
+        if statements:
+            # Check the statements once up front instead of failing in every worker
+            try:
+                columns = columnar.DwellerColumns([])
+                for statement in statements:
+                    columns.apply(statement)
+            except columnar.BulkEditError as e:
+                print(f"error: {e}", file=sys.stderr)
+                return 2
+    start = time.perf_counter()
+
+    if args.paths == ["-"]:
+        try:
+            timings = run_command(args.command, sys.stdin.buffer, sys.stdout.buffer, action_names, indent, statements,
+                                  scripts)
+            sys.stdout.buffer.flush()
+            results = [("<stdin>", 0, timings, None)]
+        except Exception as e:
+            results = [("<stdin>", 0, {}, str(e))]
+        if not args.quiet:
+            print_summary(results, time.perf_counter() - start, 1)
+        return 1 if results[0][3] else 0
+    if "-" in args.paths:
+        print("error: '-' cannot be combined with other paths", file=sys.stderr)
+        return 2
+
+    in_place = getattr(args, "in_place", False)
+    if args.command == "edit" and not (in_place or args.output):
+        print("error: edit needs --output or --in-place", file=sys.stderr)
+        return 2
+    files = collect_inputs(args.paths, args.command)
+    if not files:
+        print("error: no input files found", file=sys.stderr)
+        return 2
+    tasks = [(args.command, f, output_path(f, args.command, args.output, in_place), action_names, indent, statements,
+              scripts) for f in files]
+
+    jobs = max(1, min(args.jobs, len(tasks)))
+    if jobs == 1:
+        results = [process_file(t) for t in tasks]
+    else:
+        with multiprocessing.Pool(jobs) as pool:
+            results = pool.map(process_file, tasks, chunksize=1)
+    if not args.quiet:
+        print_summary(results, time.perf_counter() - start, jobs)
+    return 1 if any(r[3] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
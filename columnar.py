@@ -0,0 +1,325 @@
+# columnar.py
+"""
+Columnar view of the dweller numeric fields, for vectorized bulk edits.
+
+DwellerColumns copies a field (SPECIAL, level, XP, health, max health,
+radiation, happiness) out of the dweller dicts into a NumPy array the
+first time an expression uses it. Edits change the arrays only; sync()
+writes the rows whose values actually changed back into the dicts. The
+GUI does that right after each bulk edit, the CLI just before saving.
+
+Bulk edits look like
+
+    set Endurance = 10 where level > 30
+    set happiness = 100, radiation = 0 where health < maxhealth / 2
+    set S = S + 2 where not (level < 10 or luck >= 8)
+
+Field names follow dwellerindex (SPECIAL names, their first letters,
+lvl) plus xp, health/hp, maxhealth, radiation/rads and happiness.
+Assigned values are clamped to the field's valid range; a statement that
+would assign an infinite, undefined (division by zero) or, for integer
+fields, out of int64 range value raises BulkEditError and changes
+nothing. NumPy is optional for the rest of the editor; without it
+DwellerColumns raises BulkEditError. It is imported by the first
+DwellerColumns, not with this module, because it takes longer to import
+than the rest of the editor's modules together.
+This module does not import Qt.
+"""
+import re
+import ast
+import importlib.util
+
+np = None  # numpy, once _import_numpy() has run
+
+from dwellerindex import SPECIAL_NAMES, FIELD_ALIASES
+
+_MISSING = object()
+# Integral fields are written back as int64; larger values would wrap
+_INT64_LIMIT = 2.0 ** 63
+
+
+class BulkEditError(ValueError):
+    pass
+
+
+# field -> (path into the dweller dict, (min, max) for assigned values)
+FIELDS = {name.lower(): (("stats", "stats", i, "value"), (0, 10)) for i, name in enumerate(SPECIAL_NAMES)}
+FIELDS.update({
+    "level": (("experience", "currentLevel"), (1, 50)),
+    "xp": (("experience", "currentXP"), (0, None)),
+    "health": (("health", "healthValue"), (0, None)),
+    "maxhealth": (("health", "maxHealth"), (0, None)),
+    "radiation": (("health", "radiationValue"), (0, None)),
+    "happiness": (("happiness", "happinessValue"), (0, 100)),
+})
+ALIASES = dict(FIELD_ALIASES)
+ALIASES.update({"hp": "health", "max_health": "maxhealth", "rads": "radiation", "experience": "xp"})
+
+_STATEMENT = re.compile(r'^\s*set\s+(.+?)(?:\s+where\s+(.+))?\s*$', re.IGNORECASE | re.DOTALL)
+_ASSIGNMENT = re.compile(r'^\s*([A-Za-z_]+)\s*=(?!=)\s*(.+?)\s*$', re.DOTALL)
+# A lone "=" in a condition means "=="
+_SINGLE_EQUALS = re.compile(r'(?<![<>!=])=(?!=)')
+_KEYWORDS = re.compile(r'\b(and|or|not)\b', re.IGNORECASE)
+
+
+def available():
+    return np is not None or importlib.util.find_spec("numpy") is not None
+
+
+def _import_numpy():
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:  # bulk edits are unavailable without NumPy
+            raise BulkEditError("Bulk edits need NumPy (pip install numpy)")
+        np = numpy
+
+
+def resolve_field(name):
+    field = name.lower()
+    field = ALIASES.get(field, field)
+    if field not in FIELDS:
+        raise BulkEditError(f"Unknown field '{name}'")
+    return field
+
+
+def _read(d, path):
+    value = d
+    for key in path:
+        try:
+            value = value[key]
+        except (KeyError, IndexError, TypeError):
+            return _MISSING
+    return value
+
+
+def _read_all(dwellers, path):
+    """Values at path for every dweller; KeyError etc. if any dweller lacks it."""
+    if len(path) == 2:
+        a, b = path
+        return [d[a][b] for d in dwellers]
+    a, b, c, e = path
+    return [d[a][b][c][e] for d in dwellers]
+
+
+def _split_assignments(text):
+    """Split "a = 1, b = max(a, 2)" on top-level commas."""
+    parts, depth, start = [], 0, 0
+    for i, ch in enumerate(text):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+
+class DwellerColumns:
+    """NumPy arrays over one dweller list; fields are loaded on first use."""
+
+    def __init__(self, dwellers):
+        _import_numpy()
+        self.dwellers = dwellers
+        self.positions = {id(d): i for i, d in enumerate(dwellers)}
+        self.values = {}    # field -> float64 array
+        self.present = {}   # field -> bool array: the dweller has this field
+        self.integral = {}  # field -> every stored value was an int
+        self.dirty = {}     # field -> bool array of rows changed since sync()
+
+    def __len__(self):
+        return len(self.dwellers)
+
+    def column(self, field):
+        if field not in self.values:
+            path = FIELDS[field][0]
+            n = len(self.dwellers)
+            try:
+                raw = _read_all(self.dwellers, path)
+                present = np.ones(n, dtype=bool)
+            except (KeyError, IndexError, TypeError):
+                raw = [_read(d, path) for d in self.dwellers]
+                present = np.fromiter((v is not _MISSING for v in raw), dtype=bool, count=n)
+                raw = [0 if v is _MISSING else v for v in raw]
+            array = np.array(raw) if n else np.zeros(0, dtype=np.int64)
+            if array.dtype.kind not in "iuf":
+                raise BulkEditError(f"'{field}' holds non-numeric values")
+            self.values[field] = array.astype(np.float64)
+            self.present[field] = present
+            self.integral[field] = array.dtype.kind in "iu"
+            self.dirty[field] = np.zeros(n, dtype=bool)
+        return self.values[field]
+
+    def update(self, d):
+        """Re-read one dweller's loaded fields after it was edited elsewhere."""
+        i = self.positions.get(id(d))
+        if i is None:
+            return
+        for field, values in self.values.items():
+            v = _read(d, FIELDS[field][0])
+            self.present[field][i] = v is not _MISSING
+            values[i] = 0 if v is _MISSING else v
+
+    # ----- Expressions -----
+    def _eval(self, node):
+        if isinstance(node, ast.Expression):
+            return self._eval(node.body)
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+            return float(node.value)
+        if isinstance(node, ast.Name):
+            return self.column(resolve_field(node.id))
+        if isinstance(node, ast.UnaryOp):
+            operand = self._eval(node.operand)
+            if isinstance(node.op, ast.USub):
+                return -operand
+            if isinstance(node.op, ast.UAdd):
+                return operand
+            if isinstance(node.op, ast.Not):
+                return np.logical_not(operand)
+        if isinstance(node, ast.BinOp):
+            left, right = self._eval(node.left), self._eval(node.right)
+            if isinstance(node.op, ast.Add):
+                return left + right
+            if isinstance(node.op, ast.Sub):
+                return left - right
+            if isinstance(node.op, ast.Mult):
+                return left * right
+            # Division by zero gives inf / nan here; apply() refuses to assign those
+            if isinstance(node.op, ast.Div):
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    return np.true_divide(left, right)
+            if isinstance(node.op, ast.FloorDiv):
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    return np.floor_divide(left, right)
+        if isinstance(node, ast.BoolOp):
+            values = [self._eval(v) for v in node.values]
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            return combine.reduce(np.broadcast_arrays(*values))
+        if isinstance(node, ast.Compare):
+            result = None
+            left = self._eval(node.left)
+            for op, comparator in zip(node.ops, node.comparators):
+                right = self._eval(comparator)
+                compare = {ast.Lt: np.less, ast.LtE: np.less_equal, ast.Gt: np.greater,
+                           ast.GtE: np.greater_equal, ast.Eq: np.equal, ast.NotEq: np.not_equal}.get(type(op))
+                if compare is None:
+                    break
+                part = compare(left, right)
+                result = part if result is None else np.logical_and(result, part)
+                left = right
+            else:
+                return result
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+            name = node.func.id.lower()
+            args = [self._eval(a) for a in node.args]
+            if name in ("min", "max") and len(args) >= 2:
+                reduce = np.minimum if name == "min" else np.maximum
+                result = args[0]
+                for a in args[1:]:
+                    result = reduce(result, a)
+                return result
+            if name == "abs" and len(args) == 1:
+                return np.abs(args[0])
+            if name == "round" and len(args) == 1:
+                return np.round(args[0])
+        raise BulkEditError(f"Unsupported expression ({type(node).__name__})")
+
+    def _parse(self, text):
+        text = _KEYWORDS.sub(lambda m: m.group(1).lower(), text.strip())
+        try:
+            return ast.parse(text, mode="eval")
+        except SyntaxError:
+            raise BulkEditError(f"Cannot parse '{text.strip()}'")
+
+    def select(self, condition):
+        """Boolean mask of the dwellers matching condition ("" matches all)."""
+        if not condition or not condition.strip():
+            return np.ones(len(self.dwellers), dtype=bool)
+        mask = self._eval(self._parse(_SINGLE_EQUALS.sub("==", condition)))
+        if np.ndim(mask) == 0:
+            return np.full(len(self.dwellers), bool(mask))
+        if mask.dtype != bool:
+            raise BulkEditError("The where clause must be a condition")
+        return mask
+
+    def apply(self, statement, rows=None):
+        """
+        Run one "set ... [where ...]" statement, optionally only on the
+        positions in rows. All right-hand sides see the values from before
+        the statement. Returns the number of dwellers with a changed value.
+        """
+        m = _STATEMENT.match(statement)
+        if not m:
+            raise BulkEditError("Expected: set <field> = <value>[, ...] [where <condition>]")
+        mask = self.select(m.group(2))
+        if rows is not None:
+            allowed = np.zeros(len(self.dwellers), dtype=bool)
+            allowed[np.fromiter(rows, dtype=np.int64)] = True
+            mask = mask & allowed
+        assignments = []
+        for part in _split_assignments(m.group(1)):
+            a = _ASSIGNMENT.match(part)
+            if not a:
+                raise BulkEditError(f"Expected <field> = <value>, got '{part.strip()}'")
+            field = resolve_field(a.group(1))
+            # A copy: a bare field name evaluates to the live column, which an
+            # earlier assignment of this statement may overwrite
+            value = np.array(self._eval(self._parse(a.group(2))), dtype=np.float64, copy=True)
+            assignments.append((field, value))
+        # Check every assignment before changing any column
+        updates = []
+        for field, value in assignments:
+            column = self.column(field)
+            lo, hi = FIELDS[field][1]
+            new = np.broadcast_to(np.asarray(value, dtype=np.float64), column.shape)
+            if lo is not None or hi is not None:
+                new = np.clip(new, lo, hi)
+            if self.integral[field]:
+                new = np.round(new)
+            assigned = new[mask & self.present[field]]
+            if not np.isfinite(assigned).all():
+                raise BulkEditError(f"'{field}' would be set to an infinite or undefined value "
+                                    "(division by zero?)")
+            if self.integral[field] and (np.abs(assigned) >= _INT64_LIMIT).any():
+                raise BulkEditError(f"'{field}' would be set to a value too large to store")
+            updates.append((field, column, new))
+        changed = np.zeros(len(self.dwellers), dtype=bool)
+        for field, column, new in updates:
+            rows = mask & self.present[field] & (new != column)
+            column[rows] = new[rows]
+            self.dirty[field] |= rows
+            changed |= rows
+        return int(changed.sum())
+
+    def sync(self):
+        """Write changed values back into the dweller dicts. Returns the number of values written."""
+        written = 0
+        for field, dirty in self.dirty.items():
+            rows = np.flatnonzero(dirty)
+            if not len(rows):
+                continue
+            path = FIELDS[field][0]
+            values = self.values[field][rows]
+            values = values.astype(np.int64).tolist() if self.integral[field] else values.tolist()
+            dwellers = self.dwellers
+            if len(path) == 2:
+                a, b = path
+                for i, v in zip(rows.tolist(), values):
+                    dwellers[i][a][b] = v
+            else:
+                a, b, c, e = path
+                for i, v in zip(rows.tolist(), values):
+                    dwellers[i][a][b][c][e] = v
+            written += len(rows)
+            dirty[:] = False
+        return written
+
+    def changed_rows(self):
+        """Positions with edits not yet synced."""
+        rows = np.zeros(len(self.dwellers), dtype=bool)
+        for dirty in self.dirty.values():
+            rows |= dirty
+        return np.flatnonzero(rows).tolist()
@@ -0,0 +1,283 @@
+# dwellerindex.py
+"""
+Search index over the dweller list, used by the Dwellers tab filter bar.
+
+The index is rebuilt once per DwellersTab.setData: one sorted array per
+SPECIAL stat and level, a trie over first and last names, and sets for the
+boolean flags (each created on first use). Queries look like
+
+    Endurance >= 8 and level < 20 and not pregnant
+    E>=8 al                 (bare words are name prefixes)
+
+Clauses are separated by spaces or "and"; every clause must match ("or"
+and parentheses are refused with a QueryError). After a single dweller
+is edited, update() moves only that dweller's entries.
+This module does not import Qt.
+"""
+import re
+import operator
+from bisect import bisect_left, bisect_right
+
+from schema import Dweller
+
+SPECIAL_NAMES = ["Strength", "Perception", "Endurance", "Charisma", "Intelligence", "Agility", "Luck"]
+# Names are indexed in the trie up to this many characters; longer prefixes
+# are finished with a startswith check on the trie's candidates.
+TRIE_DEPTH = 8
+
+
+def _stat_getter(i):
+    return Dweller.FIELDS[Dweller.SPECIAL[i]].read
+
+
+_first_name = Dweller.first_name.read
+_last_name = Dweller.last_name.read
+
+
+def dweller_name(d):
+    return f"{_first_name(d)} {_last_name(d)}".strip() or "Unnamed"
+
+
+# Column getters (see schema.py)
+dweller_level = Dweller.level.read
+dweller_health = Dweller.health.read
+dweller_radiation = Dweller.radiation.read
+dweller_happiness = Dweller.happiness.read
+dweller_outfit = Dweller.outfit.read
+dweller_weapon = Dweller.weapon.read
+
+
+# Indexed numeric fields: query name -> getter. SPECIAL stats also accept
+# their first letter (E >= 8).
+NUMERIC_FIELDS = {"level": dweller_level}
+for _i, _name in enumerate(SPECIAL_NAMES):
+    NUMERIC_FIELDS[_name.lower()] = _stat_getter(_i)
+FIELD_ALIASES = {name[0].lower(): name.lower() for name in SPECIAL_NAMES}
+FIELD_ALIASES.update({"lvl": "level"})
+FLAG_FIELDS = {"pregnant": "pregnant", "babyready": "babyReady"}
+
+_OPERATOR = re.compile(r'\s*(>=|<=|==|!=|=|>|<)\s*')
+_CLAUSE = re.compile(r'^([A-Za-z]+)(>=|<=|==|!=|=|>|<)(-?\d+)$')
+
+
+class QueryError(ValueError):
+    pass
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children = {}
+        self.ids = set()
+
+
+class SortedColumn:
+    """Dweller positions ordered by (value, position), searchable by value range."""
+    __slots__ = ("keys", "ids")
+
+    def __init__(self, values):
+        order = sorted(range(len(values)), key=values.__getitem__)
+        self.keys = [values[i] for i in order]
+        self.ids = order
+
+    def _find(self, value, i):
+        lo = bisect_left(self.keys, value)
+        hi = bisect_right(self.keys, value, lo)
+        return bisect_left(self.ids, i, lo, hi)
+
+    def remove(self, value, i):
+        pos = self._find(value, i)
+        del self.keys[pos]
+        del self.ids[pos]
+
+    def insert(self, value, i):
+        pos = self._find(value, i)
+        self.keys.insert(pos, value)
+        self.ids.insert(pos, i)
+
+    def range(self, op, value):
+        keys = self.keys
+        if op == ">=":
+            return self.ids[bisect_left(keys, value):]
+        if op == ">":
+            return self.ids[bisect_right(keys, value):]
+        if op == "<=":
+            return self.ids[:bisect_right(keys, value)]
+        if op == "<":
+            return self.ids[:bisect_left(keys, value)]
+        lo = bisect_left(keys, value)
+        hi = bisect_right(keys, value, lo)
+        if op in ("=", "=="):
+            return self.ids[lo:hi]
+        return self.ids[:lo] + self.ids[hi:]  # "!="
+
+
+_COMPARE = {">=": operator.ge, ">": operator.gt, "<=": operator.le, "<": operator.lt,
+            "=": operator.eq, "==": operator.eq, "!=": operator.ne}
+
+
+class DwellerIndex:
+    """
+    Columns and the name trie are built the first time a query needs them,
+    then kept up to date by update() until the next build().
+    """
+    def __init__(self, dwellers=()):
+        self.build(dwellers)
+
+    def build(self, dwellers):
+        self.dwellers = dwellers
+        self.positions = {id(d): i for i, d in enumerate(dwellers)}
+        self.values = {}
+        self.columns = {}
+        self.flags = {}
+        self.names = None
+        self.trie = None
+
+    def column(self, field):
+        if field not in self.columns:
+            get = NUMERIC_FIELDS[field]
+            self.values[field] = [get(d) for d in self.dwellers]
+            self.columns[field] = SortedColumn(self.values[field])
+        return self.columns[field]
+
+    def flag(self, field):
+        if field not in self.flags:
+            key = FLAG_FIELDS[field]
+            self.flags[field] = {i for i, d in enumerate(self.dwellers) if d.get(key)}
+        return self.flags[field]
+
+    # ----- Name trie -----
+    @staticmethod
+    def _name_words(d):
+        return (_first_name(d).lower(), _last_name(d).lower())
+
+    def _build_trie(self):
+        self.names = [self._name_words(d) for d in self.dwellers]
+        self.trie = _TrieNode()
+        for i, words in enumerate(self.names):
+            self._trie_add(i, words)
+
+    def _trie_add(self, i, words):
+        for word in words:
+            node = self.trie
+            for ch in word[:TRIE_DEPTH]:
+                node = node.children.setdefault(ch, _TrieNode())
+                node.ids.add(i)
+
+    def _trie_remove(self, i, words):
+        for word in words:
+            node = self.trie
+            for ch in word[:TRIE_DEPTH]:
+                node = node.children.get(ch)
+                if node is None:
+                    break
+                node.ids.discard(i)
+
+    def name_prefix(self, prefix):
+        """Positions whose first or last name starts with prefix (the set is shared; do not modify it)."""
+        if self.trie is None:
+            self._build_trie()
+        prefix = prefix.lower()
+        node = self.trie
+        for ch in prefix[:TRIE_DEPTH]:
+            node = node.children.get(ch)
+            if node is None:
+                return set()
+        if len(prefix) <= TRIE_DEPTH:
+            return node.ids
+        return {i for i in node.ids if any(w.startswith(prefix) for w in self.names[i])}
+
+    # ----- Incremental update -----
+    def update(self, d):
+        """Re-index one edited dweller dict; only its own entries move."""
+        i = self.positions.get(id(d))
+        if i is None:
+            return
+        for f, column in self.columns.items():
+            old, new = self.values[f][i], NUMERIC_FIELDS[f](d)
+            if old != new:
+                column.remove(old, i)
+                column.insert(new, i)
+                self.values[f][i] = new
+        for f, ids in self.flags.items():
+            if d.get(FLAG_FIELDS[f]):
+                ids.add(i)
+            else:
+                ids.discard(i)
+        if self.trie is not None:
+            words = self._name_words(d)
+            if words != self.names[i]:
+                self._trie_remove(i, self.names[i])
+                self._trie_add(i, words)
+                self.names[i] = words
+
+    # ----- Queries -----
+    def query(self, text):
+        """
+        Return the set of matching dweller positions, or None when the query
+        is empty (everything matches). Raises QueryError for bad clauses.
+
+        Each clause knows its match count up front (a bisect on a sorted
+        column, or a set size), so only the most selective clause produces
+        candidates; the others are checked against those candidates directly.
+        """
+        tokens = _OPERATOR.sub(r'\1', text.replace(",", " ")).split()
+        clauses = []
+        negate = False
+        for token in tokens:
+            word = token.lower()
+            if word in ("and", "&", "&&"):
+                continue
+            if word in ("or", "|", "||"):
+                raise QueryError("'or' is not supported in the filter; every clause must match")
+            if "(" in token or ")" in token:
+                raise QueryError("Parentheses are not supported in the filter")
+            if word == "not":
+                negate = not negate
+                continue
+            clauses.append(self._clause(token, negate))
+            negate = False
+        if negate:
+            raise QueryError("'not' must be followed by pregnant or babyReady")
+        if not clauses:
+            return None
+        clauses.sort(key=lambda c: c[0])
+        _, candidates, _ = clauses[0]
+        candidates = set(candidates())
+        for _, _, narrow in clauses[1:]:
+            if not candidates:
+                break
+            candidates = narrow(candidates)
+        return candidates
+
+    def _clause(self, token, negate):
+        """
+        Return (match count, candidates, narrow) for one clause: candidates()
+        lists every match, narrow(set) keeps only the matching members.
+        """
+        n = len(self.dwellers)
+        m = _CLAUSE.match(token)
+        if m:
+            field = m.group(1).lower()
+            field = FIELD_ALIASES.get(field, field)
+            if field not in NUMERIC_FIELDS:
+                raise QueryError(f"Unknown field '{m.group(1)}'")
+            if negate:
+                raise QueryError(f"'not' cannot be applied to '{token}'")
+            op, value = m.group(2), int(m.group(3))
+            ids = self.column(field).range(op, value)
+            values, compare = self.values[field], _COMPARE[op]
+            return len(ids), lambda: ids, lambda c: {i for i in c if compare(values[i], value)}
+        if _OPERATOR.search(token):
+            raise QueryError(f"Cannot parse '{token}'")
+        field = token.lower()
+        if field in FLAG_FIELDS:
+            ids = self.flag(field)
+            if negate:
+                return n - len(ids), lambda: set(range(n)).difference(ids), lambda c: c - ids
+            return len(ids), lambda: ids, lambda c: c & ids
+        if negate:
+            raise QueryError("'not' must be followed by pregnant or babyReady")
+        ids = self.name_prefix(token)
+        return len(ids), lambda: ids, lambda c: c & ids
@@ -0,0 +1,304 @@
+# history.py
+"""
+Undo / redo for edits to a loaded save.
+
+An edit is recorded as the values it replaced, not as a copy of the save:
+
+    Replace(path, old, new)          one value, e.g. ("vault", "rocks")
+    ColumnReplace(base, tail, ...)   the same field in many items of one
+                                     list, e.g. every dweller's Endurance
+
+Paths are tuples of dict keys and list indices from the top of the save,
+as in a JSON patch; MISSING as old/new means the key was absent. Old and
+new values are the objects themselves, shared with the save instead of
+copied. That is safe because edits made later are recorded too, and are
+undone before an earlier entry is.
+
+History keeps at most `depth` entries and drops the oldest ones when the
+values they hold add up to more than max_values, so hundreds of bulk
+edits on a large vault stay bounded. Values are counted all the way down
+(a replaced dweller list weighs every value of every dweller), once,
+when the entry is pushed; recorded values are never edited afterwards.
+This module does not import Qt.
+"""
+import json
+from array import array
+
+MISSING = object()
+# Values (scalars, or container elements) all entries may hold together.
+MAX_VALUES = 2000000
+
+
+def _resolve(root, path):
+    node = root
+    for key in path:
+        node = node[key]
+    return node
+
+
+def _get(node, path):
+    for key in path:
+        try:
+            node = node[key]
+        except (KeyError, IndexError, TypeError):
+            return MISSING
+    return node
+
+
+def _put(node, key, value):
+    if value is MISSING:
+        if key in node:
+            del node[key]
+    else:
+        node[key] = value
+
+
+def _weight(value):
+    """Scalars in value plus one per container, at every depth."""
+    total = 0
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        total += 1
+        if type(value) is dict:
+            stack.extend(value.values())
+        elif type(value) is list:
+            stack.extend(value)
+    return total
+
+
+def snapshot(value):
+    """Deep copy of plain JSON data (faster than copy.deepcopy)."""
+    return json.loads(json.dumps(value))
+
+
+def _differs(a, b):
+    return a is not b and (type(a) is not type(b) or a != b)
+
+
+def _diff(a, b, path, ops):
+    if type(a) is dict and type(b) is dict:
+        for k, v in a.items():
+            if k not in b:
+                ops.append(Replace(path + (k,), v, MISSING))
+            elif _differs(v, b[k]):
+                _diff(v, b[k], path + (k,), ops)
+        for k, v in b.items():
+            if k not in a:
+                ops.append(Replace(path + (k,), MISSING, v))
+    elif type(a) is list and type(b) is list and len(a) == len(b):
+        for i, (x, y) in enumerate(zip(a, b)):
+            if _differs(x, y):
+                _diff(x, y, path + (i,), ops)
+    else:
+        ops.append(Replace(path, a, b))
+
+
+def diff(before, after, path=()):
+    """
+    Replace operations that turn before into after, placed under path.
+    Lists whose length changed are replaced whole. Values that are the same
+    object in both are skipped, so before may be a shallow copy as long as
+    nothing below it was edited in place.
+    """
+    ops = []
+    if _differs(before, after):
+        _diff(before, after, tuple(path), ops)
+    return ops
+
+
+class Replace:
+    __slots__ = ("path", "old", "new")
+
+    def __init__(self, path, old, new):
+        self.path = tuple(path)
+        self.old = old
+        self.new = new
+
+    def apply(self, root, undo=False):
+        """Write new (or old, for undo) into root; returns the paths touched."""
+        _put(_resolve(root, self.path[:-1]), self.path[-1], self.old if undo else self.new)
+        return self.paths()
+
+    def paths(self):
+        return [self.path]
+
+    def weight(self):
+        return _weight(self.old) + _weight(self.new)
+
+
+class ColumnReplace:
+    """One field (tail) of the items at base[rows]; new is a list, or one value for every row."""
+    __slots__ = ("base", "tail", "rows", "old", "new")
+
+    def __init__(self, base, tail, rows, old, new):
+        self.base = tuple(base)
+        self.tail = tuple(tail)
+        self.rows = array("q", rows)
+        self.old = old
+        self.new = new
+
+    def apply(self, root, undo=False):
+        items = _resolve(root, self.base)
+        values = self.old if undo else self.new
+        if not isinstance(values, list):
+            values = [values] * len(self.rows)
+        parent, key = self.tail[:-1], self.tail[-1]
+        for row, value in zip(self.rows, values):
+            _put(_resolve(items[row], parent), key, value)
+        return self.paths()
+
+    def paths(self):
+        return [self.base + (row,) for row in self.rows]
+
+    def weight(self):
+        return _weight(self.old) + _weight(self.new)
+
+
+def apply(root, ops, undo=False):
+    """Apply ops to root (in reverse for undo) and return the paths touched."""
+    touched = []
+    for op in (reversed(ops) if undo else ops):
+        touched.extend(op.apply(root, undo))
+    return touched
+
+
+def _expand(items, tails):
+    """Concrete tails: a "*" becomes every index up to the longest such list."""
+    concrete = []
+    for tail in tails:
+        if "*" not in tail:
+            concrete.append(tuple(tail))
+            continue
+        star = tail.index("*")
+        longest = 0
+        for item in items:
+            value = _get(item, tail[:star])
+            if isinstance(value, list) and len(value) > longest:
+                longest = len(value)
+        concrete.extend(tuple(tail[:star]) + (i,) + tuple(tail[star + 1:]) for i in range(longest))
+    return concrete
+
+
+def _column(items, tail):
+    try:
+        if len(tail) == 1:
+            (a,) = tail
+            return [d[a] for d in items]
+        if len(tail) == 2:
+            a, b = tail
+            return [d[a][b] for d in items]
+        if len(tail) == 4:
+            a, b, c, e = tail
+            return [d[a][b][c][e] for d in items]
+    except (KeyError, IndexError, TypeError):
+        pass
+    return [_get(d, tail) for d in items]
+
+
+class ItemCapture:
+    """
+    Remembers some fields of every item in the list at base before a bulk
+    edit; ops() then returns one ColumnReplace per field that changed.
+    A "*" in a field path stands for every element of that list.
+    """
+
+    def __init__(self, root, base, tails):
+        self.base = tuple(base)
+        items = _get(root, self.base)
+        self.items = items if isinstance(items, list) else []
+        self.before = {tail: _column(self.items, tail) for tail in _expand(self.items, tails)}
+
+    def ops(self):
+        ops = []
+        for tail, old in self.before.items():
+            new = _column(self.items, tail)
+            rows = [i for i, (a, b) in enumerate(zip(old, new)) if _differs(a, b)]
+            if not rows:
+                continue
+            changed = [new[i] for i in rows]
+            first = changed[0]
+            if all(not _differs(first, v) for v in changed):
+                changed = first
+            ops.append(ColumnReplace(self.base, tail, rows, [old[i] for i in rows], changed))
+        return ops
+
+
+class SectionCapture:
+    """Shallow copies of top-level sections, for edits that only replace their keys."""
+
+    def __init__(self, root, keys):
+        self.root = root
+        self.before = {k: dict(root[k]) if isinstance(root[k], dict) else root[k]
+                       for k in keys if k in root}
+
+    def ops(self):
+        ops = []
+        for k, old in self.before.items():
+            ops += diff(old, self.root[k], (k,))
+        return ops
+
+
+class Entry:
+    __slots__ = ("label", "ops", "weight")
+
+    def __init__(self, label, ops):
+        self.label = label
+        self.ops = ops
+        self.weight = sum(op.weight() for op in ops)
+
+
+class History:
+    """Linear undo / redo stacks of Entry objects."""
+
+    def __init__(self, depth=100, max_values=MAX_VALUES):
+        self.depth = max(1, depth)
+        self.max_values = max_values
+        self.undo_stack = []
+        self.redo_stack = []
+
+    def push(self, label, ops):
+        """Record an edit that has already been applied. Returns the entry, or None if ops is empty."""
+        if not ops:
+            return None
+        entry = Entry(label, ops)
+        self.undo_stack.append(entry)
+        self.redo_stack = []
+        self._trim()
+        return entry
+
+    def undo(self, root):
+        """Revert the newest entry in root; returns (entry, touched paths)."""
+        entry = self.undo_stack.pop()
+        touched = apply(root, entry.ops, undo=True)
+        self.redo_stack.append(entry)
+        return entry, touched
+
+    def redo(self, root):
+        entry = self.redo_stack.pop()
+        touched = apply(root, entry.ops)
+        self.undo_stack.append(entry)
+        return entry, touched
+
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def total_weight(self):
+        return sum(e.weight for e in self.undo_stack) + sum(e.weight for e in self.redo_stack)
+
+    def set_depth(self, depth):
+        self.depth = max(1, depth)
+        self._trim()
+
+    def clear(self):
+        self.undo_stack = []
+        self.redo_stack = []
+
+    def _trim(self):
+        del self.undo_stack[:-self.depth]
+        total = self.total_weight()
+        while total > self.max_values and len(self.undo_stack) > 1:
+            total -= self.undo_stack.pop(0).weight
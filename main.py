@@ -1,77 +1,237 @@
+import time
+STARTED = time.perf_counter()  # before the imports, for MainWindow.startupTime
 import sys
 import os
 import json
-import base64
-import struct
 from PyQt5 import QtWidgets, QtCore, QtGui
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QTabWidget, QFormLayout, QVBoxLayout, QHBoxLayout,
-    QLabel, QLineEdit, QSpinBox, QComboBox, QPushButton, QListWidget, QListWidgetItem,
+    QLabel, QLineEdit, QSpinBox, QComboBox, QPushButton,
     QFileDialog, QMessageBox, QScrollArea, QToolBar, QPlainTextEdit, QGroupBox
 )
 from PyQt5.QtCore import QUrl
 from PyQt5.QtGui import QDesktopServices
-from Crypto.Cipher import AES
-from Crypto.Util.Padding import pad, unpad
-from qt_material import apply_stylesheet
 
-# Import additional modules: Information and Settings dialogs
-from info import InformationDialog
+# Import additional modules: Settings dialog, vault actions. qt_material,
+# info, backup, savediff and scripting are imported where they are first used, so
+# they do not slow down startup.
 from settings import Settings, SettingsDialog
+import actions
+import history
+import savecache
+import tracing
+import workspace
+import validation
 
 # ============================================================
-#  Encryption / Decryption Functions
+#  Encryption / Decryption Functions (see savecodec.py)
 # ============================================================
-key_ints = [2815074099, 1725469378, 4039046167, 874293617,
-            3063605751, 3133984764, 4097598161, 3620741625]
-key = struct.pack('>8I', *key_ints)
-iv = bytes.fromhex("7475383967656A693334307438397532")
-
-def decrypt_sav(content):
-    try:
-        cipher_data = base64.b64decode(content)
-        cipher = AES.new(key, AES.MODE_CBC, iv)
-        plain = cipher.decrypt(cipher_data)
-        try:
-            plain = unpad(plain, AES.block_size)
-        except ValueError:
-            pass
-        return plain.decode('utf-8')
-    except Exception as e:
-        raise Exception(f"Decryption failed: {str(e)}")
-
-def encrypt_sav(json_text):
-    try:
-        data = json_text.encode('utf-8')
-        padded_data = pad(data, AES.block_size)
-        cipher = AES.new(key, AES.MODE_CBC, iv)
-        encrypted = cipher.encrypt(padded_data)
-        return base64.b64encode(encrypted).decode('utf-8')
-    except Exception as e:
-        raise Exception(f"Encryption failed: {str(e)}")
+from savecodec import decrypt_stream, write_sav
+from savemodel import SaveModel
+from schema import Vault, Dweller, Room, Team, child
+from models import DwellerTableModel, RoomTableModel, TeamTableModel, JsonTreeModel
+from vaultmap import VaultMapView
+from dwellerindex import DwellerIndex, QueryError
+import columnar
 
 # ============================================================
 #  Worker Thread for File Loading
 # ============================================================
-class FileLoaderWorker(QtCore.QThread):
-    loaded = QtCore.pyqtSignal(dict)
+class LoadSignals(QtCore.QObject):
+    loaded = QtCore.pyqtSignal(str, object, object)  # filename, file key, SaveModel
+    error = QtCore.pyqtSignal(str, str)
+    phase = QtCore.pyqtSignal(str)
+    finished = QtCore.pyqtSignal(str)
+
+class FileLoadTask(QtCore.QRunnable):
+    """
+    Loads one .sav on MainWindow.loadPool, or takes it from the save caches.
+    parse=True also parses every section (for prefetching). cancel() stops
+    the task at the next step; a cancelled task emits only finished. The
+    owner must keep a reference until finished (signals live on the task).
+    """
+    def __init__(self, filename, cache, disk_cache, parse=False):
+        super().__init__()
+        self.filename = filename
+        self.cache = cache
+        self.disk_cache = disk_cache
+        self.parse = parse
+        self.cancelled = False
+        self.signals = LoadSignals()
+        self.setAutoDelete(False)
+        
+    def cancel(self):
+        self.cancelled = True
+        
+    def run(self):
+        try:
+            with open(self.filename, "rb") as f:
+                raw = f.read()
+            key = workspace.file_key(self.filename, raw)
+            data = self.cache.get(key)
+            if data is not None:
+                # Already open or prefetched; the GUI may be using it, so never parse it here
+                self.signals.loaded.emit(self.filename, key, data)
+                return
+            with tracing.span("diskcache"):
+                entry = self.disk_cache.get(key[2])
+            if entry is not None:
+                data = SaveModel(*entry)
+            elif not self.cancelled:
+                # Decrypt (this may take a while), then index the top-level
+                # sections; they are parsed on first use.
+                self.signals.phase.emit("Decrypting save...")
+                plain = decrypt_stream(raw)
+                self.signals.phase.emit("Indexing sections...")
+                data = SaveModel(plain)
+                try:
+                    self.disk_cache.put(key[2], plain, data.spans())
+                except OSError as e:
+                    tracing.logger.warning("Could not cache %s: %s", self.filename, e)
+            if self.parse and not self.cancelled:
+                for section in data:
+                    if self.cancelled:
+                        break
+                    data[section]
+            if not self.cancelled:
+                self.signals.loaded.emit(self.filename, key, data)
+        except Exception as e:
+            self.signals.error.emit(self.filename, str(e))
+        finally:
+            self.signals.finished.emit(self.filename)
+
+class ReloadSignals(QtCore.QObject):
+    # filename, key the vault had, key of the file now, SaveModel of the file (None
+    # if only its mtime changed), changed sections (parsed in theirs)
+    reloaded = QtCore.pyqtSignal(str, object, object, object, list)
+    error = QtCore.pyqtSignal(str, str)
+    finished = QtCore.pyqtSignal(str)
+
+class ReloadTask(QtCore.QRunnable):
+    """Reads an open vault's file again after it changed on disk and finds the sections that differ."""
+    def __init__(self, filename, key, bases):
+        super().__init__()
+        self.filename = filename
+        self.key = key
+        self.bases = bases  # {section: base_bytes()} of the open model
+        self.signals = ReloadSignals()
+        self.setAutoDelete(False)
+        
+    def run(self):
+        try:
+            with open(self.filename, "rb") as f:
+                raw = f.read()
+            key = workspace.file_key(self.filename, raw)
+            if key[2] == self.key[2]:
+                # Same bytes (our own save, or only touched)
+                self.signals.reloaded.emit(self.filename, self.key, key, None, [])
+                return
+            theirs = SaveModel(decrypt_stream(raw))
+            changed = workspace.changed_sections(self.bases, theirs)
+            for section in changed:
+                if section in theirs:
+                    theirs[section]
+            self.signals.reloaded.emit(self.filename, self.key, key, theirs, changed)
+        except Exception as e:
+            self.signals.error.emit(self.filename, str(e))
+        finally:
+            self.signals.finished.emit(self.filename)
+
+class SaveWorker(QtCore.QThread):
+    progress = QtCore.pyqtSignal(int, str)
+    saved = QtCore.pyqtSignal(str)
     error = QtCore.pyqtSignal(str)
-    
-    def __init__(self, filename, parent=None):
+
+    def __init__(self, save_data, filename, parent=None):
         super().__init__(parent)
+        self.save_data = save_data
         self.filename = filename
-        
+
     def run(self):
         try:
-            with open(self.filename, "r") as f:
-                content = f.read()
-            # Perform decryption and JSON decoding (this may take a while)
-            json_text = decrypt_sav(content)
-            data = json.loads(json_text)
-            self.loaded.emit(data)
+            self.progress.emit(0, "Serializing")
+            # Sections that were never opened are written back verbatim
+            json_bytes = self.save_data.dumps()
+            last = [-1]
+
+            def report(done, total):
+                percent = done * 100 // total if total else 100
+                if percent != last[0]:
+                    last[0] = percent
+                    self.progress.emit(percent, "Encrypting")
+            # Written to a temp file, fsynced, then renamed over the target
+            write_sav(self.filename, json_bytes, report)
+            self.saved.emit(self.filename)
         except Exception as e:
             self.error.emit(str(e))
 
+class ValidateWorker(QtCore.QThread):
+    """Runs a validation.Validator over the save off the GUI thread."""
+    checked = QtCore.pyqtSignal(list)  # validation.Problems
+    error = QtCore.pyqtSignal(str)
+
+    def __init__(self, validator, save_data, parent=None):
+        super().__init__(parent)
+        self.validator = validator
+        self.save_data = save_data
+
+    def run(self):
+        try:
+            self.checked.emit(self.validator.run(self.save_data))
+        except Exception as e:
+            self.error.emit(str(e))
+
+class ScriptWorker(QtCore.QThread):
+    """Runs scripts (see scripting.py) on copies of the save; ran carries the ops that apply the result."""
+    progress = QtCore.pyqtSignal(int, str)
+    output = QtCore.pyqtSignal(str)
+    ran = QtCore.pyqtSignal(list, list)  # history ops, timing lines
+    error = QtCore.pyqtSignal(str)
+    cancelled = QtCore.pyqtSignal()
+
+    def __init__(self, save_data, scripts, parent=None):
+        super().__init__(parent)
+        import scripting
+        self.scripts = scripts
+        self.runner = scripting.ScriptRunner(save_data, self.progress.emit, self.output.emit)
+
+    def cancel(self):
+        self.runner.cancel()
+
+    def run(self):
+        import scripting
+        try:
+            ops = self.runner.run(self.scripts)
+            self.ran.emit(ops, self.runner.report())
+        except scripting.ScriptCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.error.emit(str(e))
+
+class BackupWorker(QtCore.QThread):
+    done = QtCore.pyqtSignal(str)
+    error = QtCore.pyqtSignal(str)
+
+    def __init__(self, filename, settings, parent=None):
+        super().__init__(parent)
+        self.filename = filename
+        self.folder = settings.get_option("backup_folder")
+        self.max_files = settings.get_option("max_backup_files", 5)
+        self.append_timestamp = settings.get_option("append_timestamp", True)
+
+    def run(self):
+        try:
+            # Background backups must not show up in the load/save breakdown
+            with tracing.ungrouped():
+                import backup
+                store, entry = backup.backup_file(self.filename, self.folder, self.max_files, self.append_timestamp)
+            if entry is None:
+                self.done.emit("Backup skipped (unchanged since last backup)")
+            else:
+                self.done.emit(f"Backup {entry['name']} created ({entry['stored_size'] / 1024:.1f} KB stored)")
+        except Exception as e:
+            self.error.emit(f"Backup failed: {e}")
+
 # ============================================================
 #  Borderless Loading Dialog with Progress Bar
 # ============================================================
@@ -91,6 +251,170 @@ class LoadingDialog(QtWidgets.QDialog):
         self.setLayout(layout)
         self.resize(300, 100)
 
+# ============================================================
+#  Save Diff Dialog (see savediff.py)
+# ============================================================
+class DiffDialog(QtWidgets.QDialog):
+    def __init__(self, changes, title, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(title)
+        layout = QVBoxLayout(self)
+        import savediff
+        groups = savediff.group_by_tab(changes)
+        summary = ", ".join(f"{tab}: {len(items)}" for tab, items in groups.items())
+        layout.addWidget(QLabel(f"{len(changes)} change(s)" + (f" — {summary}" if summary else "")))
+        self.tree = QtWidgets.QTreeWidget()
+        self.tree.setHeaderLabels(["Item / Field", "Change", "Old", "New"])
+        self.tree.setUniformRowHeights(True)
+        for tab, items in groups.items():
+            top = QtWidgets.QTreeWidgetItem([f"{tab} ({len(items)})"])
+            for c in items:
+                where = " ".join(part for part in (c.item, savediff.format_path(c.path)) if part)
+                QtWidgets.QTreeWidgetItem(top, [where, savediff.kind(c),
+                                                savediff.format_value(c.old), savediff.format_value(c.new)])
+            self.tree.addTopLevelItem(top)
+            top.setExpanded(len(items) <= 200)
+        self.tree.header().resizeSection(0, 360)
+        layout.addWidget(self.tree)
+        buttons = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.Close)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+        self.resize(900, 600)
+
+# ============================================================
+#  Save Check Dialog (see validation.py)
+# ============================================================
+class ProblemsDialog(QtWidgets.QDialog):
+    """Lists validation problems; choice is "repair", "save" or None after it closes."""
+
+    def __init__(self, problems, saving, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Save Check")
+        self.choice = None
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel(validation.summary(problems) + (" — saving now may break the vault in game."
+                                                                  if saving else ".")))
+        self.tree = QtWidgets.QTreeWidget()
+        self.tree.setHeaderLabels(["Problem", "Location", "Repair"])
+        self.tree.setUniformRowHeights(True)
+        import savediff
+        groups = {}
+        for p in problems:
+            groups.setdefault(p.rule, []).append(p)
+        for name, items in groups.items():
+            top = QtWidgets.QTreeWidgetItem([f"{name} ({len(items)})"])
+            for p in items:
+                fix = f"set to {savediff.format_value(p.fix)}" if p.fixable else "(manual)"
+                QtWidgets.QTreeWidgetItem(top, [p.message, savediff.format_path(p.path), fix])
+            self.tree.addTopLevelItem(top)
+            top.setExpanded(len(items) <= 200)
+        self.tree.header().resizeSection(0, 480)
+        layout.addWidget(self.tree)
+        buttons = QtWidgets.QDialogButtonBox()
+        repair = buttons.addButton("Repair and Save" if saving else "Repair",
+                                   QtWidgets.QDialogButtonBox.AcceptRole)
+        repair.setEnabled(any(p.fixable for p in problems))
+        repair.clicked.connect(lambda: self.choose("repair"))
+        if saving:
+            buttons.addButton("Save Anyway", QtWidgets.QDialogButtonBox.DestructiveRole).clicked.connect(
+                lambda: self.choose("save"))
+        buttons.addButton(QtWidgets.QDialogButtonBox.Cancel if saving else QtWidgets.QDialogButtonBox.Close)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+        self.resize(900, 500)
+
+    def choose(self, choice):
+        self.choice = choice
+        self.accept()
+
+# ============================================================
+#  Script Console (see scripting.py)
+# ============================================================
+class ScriptConsole(QtWidgets.QDialog):
+    """Editor and output for scripts; MainWindow runs what runRequested names."""
+    runRequested = QtCore.pyqtSignal(list)  # [(name, source)]
+    cancelRequested = QtCore.pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Script Console")
+        layout = QVBoxLayout(self)
+        font = QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont)
+        self.editor = QPlainTextEdit()
+        self.editor.setFont(font)
+        self.editor.setPlaceholderText(
+            "# vault, resources, dwellers, rooms, teams, data, run_action(name), progress(done, total), print()\n"
+            "for d in dwellers:\n"
+            "    if d.level < 10:\n"
+            "        d.update(endurance=10, happiness=100)\n"
+            "resources.caps += 5000")
+        self.output = QPlainTextEdit()
+        self.output.setFont(font)
+        self.output.setReadOnly(True)
+        splitter = QtWidgets.QSplitter(QtCore.Qt.Vertical)
+        splitter.addWidget(self.editor)
+        splitter.addWidget(self.output)
+        splitter.setSizes([350, 150])
+        layout.addWidget(splitter)
+        self.progressBar = QtWidgets.QProgressBar()
+        self.progressBar.setVisible(False)
+        layout.addWidget(self.progressBar)
+        btnLayout = QHBoxLayout()
+        self.btnOpen = QPushButton("Open...")
+        self.btnOpen.clicked.connect(self.openScript)
+        btnLayout.addWidget(self.btnOpen)
+        self.btnRunFiles = QPushButton("Run Files...")
+        self.btnRunFiles.clicked.connect(self.runFiles)
+        btnLayout.addWidget(self.btnRunFiles)
+        btnLayout.addStretch()
+        self.btnRun = QPushButton("Run (Ctrl+Enter)")
+        self.btnRun.setShortcut(QtGui.QKeySequence("Ctrl+Return"))
+        self.btnRun.clicked.connect(self.runEditor)
+        btnLayout.addWidget(self.btnRun)
+        self.btnCancel = QPushButton("Cancel")
+        self.btnCancel.setEnabled(False)
+        self.btnCancel.clicked.connect(self.cancelRequested.emit)
+        btnLayout.addWidget(self.btnCancel)
+        layout.addLayout(btnLayout)
+        self.scriptName = "console"
+        self.resize(800, 600)
+
+    def openScript(self):
+        fname, _ = QFileDialog.getOpenFileName(self, "Open Script", "", "Python Scripts (*.py);;All Files (*)")
+        if fname:
+            with open(fname, encoding="utf-8") as f:
+                self.editor.setPlainText(f.read())
+            self.scriptName = os.path.basename(fname)
+
+    def runEditor(self):
+        self.runRequested.emit([(self.scriptName, self.editor.toPlainText())])
+
+    def runFiles(self):
+        """Run script files in the order chosen, as one change."""
+        fnames, _ = QFileDialog.getOpenFileNames(self, "Run Scripts", "", "Python Scripts (*.py);;All Files (*)")
+        scripts = []
+        for fname in fnames:
+            with open(fname, encoding="utf-8") as f:
+                scripts.append((os.path.basename(fname), f.read()))
+        if scripts:
+            self.runRequested.emit(scripts)
+
+    def setRunning(self, running):
+        self.btnRun.setEnabled(not running)
+        self.btnRunFiles.setEnabled(not running)
+        self.btnCancel.setEnabled(running)
+        self.progressBar.setValue(0)
+        self.progressBar.setVisible(running)
+
+    def onProgress(self, percent, name):
+        self.progressBar.setValue(percent)
+        self.progressBar.setFormat(f"{name} %p%")
+
+    def write(self, text):
+        self.output.moveCursor(QtGui.QTextCursor.End)
+        self.output.insertPlainText(text)
+        self.output.ensureCursorVisible()
+
 # ============================================================
 #  Vault Tab Widget (with Advanced Vault Options)
 # ============================================================
@@ -189,66 +513,67 @@ class VaultTab(QWidget):
         self.setLayout(mainLayout)
         
     def setData(self, data):
-        vault = data.get("vault", {})
-        try:
-            self.vaultNameSpin.setValue(int(vault.get("VaultName", "0")))
-        except:
-            self.vaultNameSpin.setValue(0)
-        resources = vault.get("storage", {}).get("resources", {})
-        self.capsSpin.setValue(int(resources.get("Nuka") or 0))
-        self.nukaSpin.setValue(int(resources.get("NukaColaQuantum") or 0))
-        self.foodSpin.setValue(int(resources.get("Food") or 0))
-        self.energySpin.setValue(int(resources.get("Energy") or 0))
-        self.waterSpin.setValue(int(resources.get("Water") or 0))
-        self.stimpackSpin.setValue(int(resources.get("StimPack") or 0))
-        self.radawaySpin.setValue(int(resources.get("RadAway") or 0))
-        lb = vault.get("LunchBoxesByType", [])
+        vault = Vault(data.get("vault") or {})
+        self.vaultNameSpin.setValue(vault.number)
+        resources = vault.resources()
+        self.capsSpin.setValue(resources.caps)
+        self.nukaSpin.setValue(resources.quantum)
+        self.foodSpin.setValue(resources.food)
+        self.energySpin.setValue(resources.energy)
+        self.waterSpin.setValue(resources.water)
+        self.stimpackSpin.setValue(resources.stimpacks)
+        self.radawaySpin.setValue(resources.radaway)
+        lb = vault.lunchboxes
         self.lunchboxSpin.setValue(lb.count(0))
         self.handySpin.setValue(lb.count(1))
         self.petCarrierSpin.setValue(lb.count(2))
         self.starterPackSpin.setValue(lb.count(3))
-        mode = vault.get("VaultMode", "Normal")
-        idx = self.modeCombo.findText(mode)
+        idx = self.modeCombo.findText(vault.mode)
         if idx >= 0:
             self.modeCombo.setCurrentIndex(idx)
-        theme = vault.get("VaultTheme", 0)
-        idx = self.themeCombo.findData(int(theme or 0))
+        idx = self.themeCombo.findData(vault.theme)
         if idx >= 0:
             self.themeCombo.setCurrentIndex(idx)
-        self.xpSpin.setValue(int(vault.get("XP") or 0))
-        self.populationSpin.setValue(int(vault.get("population") or 0))
-        self.happinessSpinVault.setValue(int(vault.get("happiness") or 0))
-        self.scoreSpin.setValue(int(vault.get("score") or 0))
+        self.xpSpin.setValue(vault.xp)
+        self.populationSpin.setValue(vault.population)
+        self.happinessSpinVault.setValue(vault.happiness)
+        self.scoreSpin.setValue(vault.score)
         
     def updateData(self, data):
-        if "vault" not in data:
-            data["vault"] = {}
-        vault = data["vault"]
-        vault["VaultName"] = str(self.vaultNameSpin.value()).zfill(3)
-        if "storage" not in vault:
-            vault["storage"] = {}
-        if "resources" not in vault["storage"]:
-            vault["storage"]["resources"] = {}
-        resources = vault["storage"]["resources"]
-        resources["Nuka"] = self.capsSpin.value()
-        resources["NukaColaQuantum"] = self.nukaSpin.value()
-        resources["Food"] = self.foodSpin.value()
-        resources["Energy"] = self.energySpin.value()
-        resources["Water"] = self.waterSpin.value()
-        resources["StimPack"] = self.stimpackSpin.value()
-        resources["RadAway"] = self.radawaySpin.value()
-        lb = ([0] * self.lunchboxSpin.value() +
-              [1] * self.handySpin.value() +
-              [2] * self.petCarrierSpin.value() +
-              [3] * self.starterPackSpin.value())
-        vault["LunchBoxesByType"] = lb
-        vault["LunchBoxesCount"] = len(lb)
-        vault["VaultMode"] = self.modeCombo.currentText()
-        vault["VaultTheme"] = self.themeCombo.currentData()
-        vault["XP"] = self.xpSpin.value()
-        vault["population"] = self.populationSpin.value()
-        vault["happiness"] = self.happinessSpinVault.value()
-        vault["score"] = self.scoreSpin.value()
+        vault = Vault(child(data, "vault"))
+        resources = vault.resources(create=True)
+        # Only keys of these two dicts are replaced, so shallow copies can be diffed
+        before, beforeResources = dict(vault.data), dict(resources.data)
+        changed = resources.update(
+            caps=self.capsSpin.value(),
+            quantum=self.nukaSpin.value(),
+            food=self.foodSpin.value(),
+            energy=self.energySpin.value(),
+            water=self.waterSpin.value(),
+            stimpacks=self.stimpackSpin.value(),
+            radaway=self.radawaySpin.value(),
+        )
+        counts = [self.lunchboxSpin.value(), self.handySpin.value(),
+                  self.petCarrierSpin.value(), self.starterPackSpin.value()]
+        lb = vault.lunchboxes
+        # Keep the game's order unless a count changed, so viewing the tab is not an edit
+        if [lb.count(t) for t in range(4)] != counts or len(lb) != sum(counts):
+            lb = [t for t, n in enumerate(counts) for _ in range(n)]
+            changed |= vault.update(lunchboxes=lb)
+        changed |= vault.update(
+            number=self.vaultNameSpin.value(),
+            lunchbox_count=len(lb),
+            mode=self.modeCombo.currentText(),
+            theme=self.themeCombo.currentData(),
+            xp=self.xpSpin.value(),
+            population=self.populationSpin.value(),
+            happiness=self.happinessSpinVault.value(),
+            score=self.scoreSpin.value(),
+        )
+        if changed:
+            self.main_window.recordEdit("Edit vault", history.diff(before, vault.data, ("vault",)) +
+                                        history.diff(beforeResources, resources.data,
+                                                     ("vault", "storage", "resources")))
 
 # ============================================================
 #  Dwellers Tab Widget (with extra XP field)
@@ -273,9 +598,50 @@ class DwellersTab(QWidget):
         
     def initUI(self):
         mainLayout = QHBoxLayout()
-        self.dwellerList = QListWidget()
-        self.dwellerList.itemClicked.connect(self.onItemSelected)
-        mainLayout.addWidget(self.dwellerList, 1)
+        # Virtualized table: only visible rows are ever asked for data
+        self.dwellerModel = DwellerTableModel(DWELLER_OUTFITS, DWELLER_WEAPONS, self)
+        self.dwellerTable = QtWidgets.QTreeView()
+        self.dwellerTable.setModel(self.dwellerModel)
+        self.dwellerTable.setUniformRowHeights(True)
+        self.dwellerTable.setRootIsDecorated(False)
+        self.dwellerTable.setItemsExpandable(False)
+        self.dwellerTable.setAlternatingRowColors(True)
+        self.dwellerTable.setSortingEnabled(True)
+        self.dwellerTable.sortByColumn(-1, QtCore.Qt.AscendingOrder)
+        self.dwellerTable.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+        self.dwellerTable.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        header = self.dwellerTable.header()
+        header.setStretchLastSection(False)
+        header.setDefaultSectionSize(48)
+        header.resizeSection(0, 160)
+        self.dwellerTable.selectionModel().currentRowChanged.connect(self.onRowSelected)
+        # Filter bar backed by DwellerIndex (see dwellerindex.py for the syntax)
+        self.dwellerIndex = DwellerIndex()
+        self.filterEdit = QLineEdit()
+        self.filterEdit.setPlaceholderText("Filter: e.g. Endurance >= 8 and level < 20 and not pregnant, or a name prefix")
+        self.filterEdit.setClearButtonEnabled(True)
+        self.filterEdit.textChanged.connect(self.applyFilter)
+        self.filterStatusLabel = QLabel("")
+        # Bulk edits run on NumPy columns (see columnar.py for the syntax)
+        self.dwellerColumns = None
+        self.bulkEdit = QLineEdit()
+        self.bulkEdit.setPlaceholderText("Bulk edit: e.g. set Endurance = 10 where level > 30")
+        self.bulkEdit.returnPressed.connect(self.applyBulkEdit)
+        self.btnBulkEdit = QPushButton("Apply")
+        self.btnBulkEdit.clicked.connect(self.applyBulkEdit)
+        if not columnar.available():
+            for w in (self.bulkEdit, self.btnBulkEdit):
+                w.setEnabled(False)
+                w.setToolTip("Bulk edits need NumPy (pip install numpy)")
+        bulkLayout = QHBoxLayout()
+        bulkLayout.addWidget(self.bulkEdit)
+        bulkLayout.addWidget(self.btnBulkEdit)
+        listLayout = QVBoxLayout()
+        listLayout.addWidget(self.filterEdit)
+        listLayout.addWidget(self.dwellerTable)
+        listLayout.addWidget(self.filterStatusLabel)
+        listLayout.addLayout(bulkLayout)
+        mainLayout.addLayout(listLayout, 3)
         detailLayout = QFormLayout()
         self.firstNameEdit = QLineEdit()
         detailLayout.addRow("First Name:", self.firstNameEdit)
@@ -336,66 +702,128 @@ class DwellersTab(QWidget):
         self.setLayout(mainLayout)
         
     def setData(self, dwellers):
-        self.dwellerList.clear()
+        self.current_dweller = None
         self.dwellers = dwellers
-        for d in dwellers:
-            item = QListWidgetItem(d.get("name", "Unnamed") + " " + d.get("lastName", ""))
-            item.setData(QtCore.Qt.UserRole, d)
-            self.dwellerList.addItem(item)
+        self.dwellerColumns = None
+        self.dwellerModel.setDwellers(dwellers)
+        self.dwellerIndex.build(dwellers)
+        self.applyFilter()
+
+    def applyFilter(self, *args):
+        text = self.filterEdit.text()
+        try:
+            matches = self.dwellerIndex.query(text)
+        except QueryError as e:
+            self.filterStatusLabel.setText(str(e))
+            return
+        self.dwellerModel.setFilter(matches)
+        total = len(self.dwellerModel.dwellers)
+        shown = self.dwellerModel.filteredCount()
+        self.filterStatusLabel.setText(f"{shown} of {total} dwellers" if matches is not None else f"{total} dwellers")
+
+    def applyBulkEdit(self):
+        """Run the bulk edit on the dwellers the filter currently shows."""
+        text = self.bulkEdit.text().strip()
+        if not text or not hasattr(self, "dwellers"):
+            return
+        self.updateCurrentDweller()
+        try:
+            if self.dwellerColumns is None:
+                self.dwellerColumns = columnar.DwellerColumns(self.dwellers)
+            try:
+                rows = self.dwellerIndex.query(self.filterEdit.text())
+            except QueryError as e:
+                # Never fall back to every dweller when the filter does not parse
+                QMessageBox.warning(self, "Bulk Edit", f"Fix the filter first: {e}")
+                return
+            changed = self.dwellerColumns.apply(text, rows)
+        except columnar.BulkEditError as e:
+            QMessageBox.warning(self, "Bulk Edit", str(e))
+            return
+        fields = [f for f, dirty in self.dwellerColumns.dirty.items() if dirty.any()]
+        capture = history.ItemCapture(self.main_window.save_data, ("dwellers", "dwellers"),
+                                      [columnar.FIELDS[f][0] for f in fields])
+        self.dwellerColumns.sync()
+        self.main_window.recordEdit("Bulk edit: " + text, capture.ops())
+        # Values moved under the index and the table; rebuild lazily and repaint
+        self.dwellerIndex.build(self.dwellers)
+        self.dwellerModel.refreshAll()
+        self.applyFilter()
+        if self.current_dweller:
+            self.populateDetails(self.current_dweller)
+        self.main_window.statusMsgLabel.setText(f"Bulk edit changed {changed} dweller(s)")
             
-    def onItemSelected(self, item):
-        self.current_dweller = item.data(QtCore.Qt.UserRole)
+    def onRowSelected(self, current, previous):
+        if not current.isValid():
+            return
+        self.current_dweller = self.dwellerModel.dwellerAt(current.row())
         self.populateDetails(self.current_dweller)
         
     def populateDetails(self, d):
-        self.firstNameEdit.setText(d.get("name", ""))
-        self.lastNameEdit.setText(d.get("lastName", ""))
-        idx = self.genderCombo.findData(d.get("gender", 2))
+        d = Dweller(d)
+        self.firstNameEdit.setText(d.first_name)
+        self.lastNameEdit.setText(d.last_name)
+        idx = self.genderCombo.findData(d.gender)
         if idx >= 0:
             self.genderCombo.setCurrentIndex(idx)
-        self.happinessSpin.setValue(int(d.get("happiness", {}).get("happinessValue", 0)))
-        self.healthSpin.setValue(int(d.get("health", {}).get("healthValue", 0)))
-        self.maxHealthSpin.setValue(int(d.get("health", {}).get("maxHealth", 0)))
-        self.radiationSpin.setValue(int(d.get("health", {}).get("radiationValue", 0)))
-        self.levelSpin.setValue(int(d.get("experience", {}).get("currentLevel", 1)))
-        self.xpSpin.setValue(int(d.get("experience", {}).get("currentXP", 0)))
-        self.skinColorEdit.setText(str(d.get("skinColor", "")))
-        self.hairColorEdit.setText(str(d.get("hairColor", "")))
-        self.pregnantCombo.setCurrentIndex(0 if not d.get("pregnant", False) else 1)
-        self.babyReadyCombo.setCurrentIndex(0 if not d.get("babyReady", False) else 1)
-        idx = self.outfitCombo.findData(d.get("equipedOutfit", {}).get("id", ""))
-        if idx >= 0:
-            self.outfitCombo.setCurrentIndex(idx)
-        idx = self.weaponCombo.findData(d.get("equipedWeapon", {}).get("id", ""))
-        if idx >= 0:
-            self.weaponCombo.setCurrentIndex(idx)
-        stats = d.get("stats", {}).get("stats", [])
-        for i in range(min(7, len(self.statsSpins))):
-            self.statsSpins[i].setValue(int(stats[i].get("value", 0)))
+        self.happinessSpin.setValue(d.happiness)
+        self.healthSpin.setValue(d.health)
+        self.maxHealthSpin.setValue(d.max_health)
+        self.radiationSpin.setValue(d.radiation)
+        self.levelSpin.setValue(d.level)
+        self.xpSpin.setValue(d.xp)
+        self.skinColorEdit.setText(d.skin_color)
+        self.hairColorEdit.setText(d.hair_color)
+        self.pregnantCombo.setCurrentIndex(1 if d.pregnant else 0)
+        self.babyReadyCombo.setCurrentIndex(1 if d.baby_ready else 0)
+        # An item the combos do not list shows as blank and is left alone
+        self.outfitCombo.setCurrentIndex(self.outfitCombo.findData(d.outfit))
+        self.weaponCombo.setCurrentIndex(self.weaponCombo.findData(d.weapon))
+        for spin, name in zip(self.statsSpins, Dweller.SPECIAL[:len(d.stats)]):
+            spin.setValue(getattr(d, name))
             
     def updateCurrentDweller(self):
         if not self.current_dweller:
             return
         d = self.current_dweller
-        d["name"] = self.firstNameEdit.text()
-        d["lastName"] = self.lastNameEdit.text()
-        d["gender"] = self.genderCombo.currentData()
-        d.setdefault("happiness", {})["happinessValue"] = self.happinessSpin.value()
-        d.setdefault("health", {})["healthValue"] = self.healthSpin.value()
-        d["health"]["maxHealth"] = self.maxHealthSpin.value()
-        d["health"]["radiationValue"] = self.radiationSpin.value()
-        d.setdefault("experience", {})["currentLevel"] = self.levelSpin.value()
-        d["experience"]["currentXP"] = self.xpSpin.value()
-        d["skinColor"] = self.skinColorEdit.text()
-        d["hairColor"] = self.hairColorEdit.text()
-        d["pregnant"] = self.pregnantCombo.currentData()
-        d["babyReady"] = self.babyReadyCombo.currentData()
-        d["equipedOutfit"] = {"id": self.outfitCombo.currentData()}
-        d["equipedWeapon"] = {"id": self.weaponCombo.currentData()}
-        stats = d.get("stats", {}).get("stats", [])
-        for i in range(min(7, len(self.statsSpins))):
-            if i < len(stats):
-                stats[i]["value"] = self.statsSpins[i].value()
+        view = Dweller(d)
+        before = history.snapshot(d)
+        changed = view.update(
+            first_name=self.firstNameEdit.text(),
+            last_name=self.lastNameEdit.text(),
+            gender=self.genderCombo.currentData(),
+            skin_color=self.skinColorEdit.text(),
+            hair_color=self.hairColorEdit.text(),
+            pregnant=self.pregnantCombo.currentData(),
+            baby_ready=self.babyReadyCombo.currentData(),
+            happiness=self.happinessSpin.value(),
+            health=self.healthSpin.value(),
+            max_health=self.maxHealthSpin.value(),
+            radiation=self.radiationSpin.value(),
+            level=self.levelSpin.value(),
+            xp=self.xpSpin.value(),
+        )
+        for name, combo in (("outfit", self.outfitCombo), ("weapon", self.weaponCombo)):
+            if combo.currentIndex() >= 0:
+                changed |= view.update(**{name: combo.currentData()})
+        # Only the stats the dweller has (the list is not extended)
+        names = Dweller.SPECIAL[:len(view.stats)]
+        changed |= view.update(**{name: spin.value() for name, spin in zip(names, self.statsSpins)})
+        if not changed:
+            return
+        position = self.dwellerIndex.positions.get(id(d))
+        if position is not None:
+            self.main_window.recordEdit("Edit " + (view.full_name or "dweller"),
+                                        history.diff(before, d, ("dwellers", "dwellers", position)))
+        else:
+            self.main_window.markDirty("dwellers", d)
+        self.dwellerModel.refreshDweller(d)
+        # Only this dweller's index entries move; then re-run the (cheap) query
+        self.dwellerIndex.update(d)
+        if self.dwellerColumns is not None:
+            self.dwellerColumns.update(d)
+        if self.filterEdit.text().strip():
+            self.applyFilter()
                 
     def maxStats(self):
         if not self.current_dweller:
@@ -408,54 +836,62 @@ class DwellersTab(QWidget):
 #  Wasteland Teams Tab Widget
 # ============================================================
 class WastelandTeamEditor(QWidget):
-    def __init__(self, team, is_actor=False):
+    """One editor per team list, bound to the selected team with setTeam()."""
+    def __init__(self, is_actor=False):
         super().__init__()
-        self.team = team
+        self.team = None
+        self.position = None
         self.is_actor = is_actor
         self.initUI()
+        self.setTeam(None, None)
     def initUI(self):
         layout = QFormLayout()
-        self.teamIndexLabel = QLabel("Team Index: " + str(self.team.get("teamIndex", "N/A")))
+        self.teamIndexLabel = QLabel()
         layout.addRow(self.teamIndexLabel)
         self.timeSpentSpin = QSpinBox(); self.timeSpentSpin.setRange(0, 10**6)
-        self.timeSpentSpin.setValue(int(self.team.get("elapsedTimeAliveExploring") or 0))
         layout.addRow("Time Spent (sec):", self.timeSpentSpin)
         self.returnDurationSpin = QSpinBox(); self.returnDurationSpin.setRange(0, 10**6)
-        self.returnDurationSpin.setValue(int(self.team.get("returnTripDuration") or 0))
         layout.addRow("Return Duration (sec):", self.returnDurationSpin)
-        equip = {}
-        if self.is_actor:
-            equip = self.team.get("actor", {}).get("equipment", {}).get("storage", {}).get("resources", {})
-        else:
-            equip = self.team.get("teamEquipment", {}).get("storage", {}).get("resources", {})
         self.stimSpin = QSpinBox(); self.stimSpin.setRange(0, 10**6)
-        self.stimSpin.setValue(int(equip.get("StimPack") or 0))
         layout.addRow("StimPack:", self.stimSpin)
         self.radSpin = QSpinBox(); self.radSpin.setRange(0, 10**6)
-        self.radSpin.setValue(int(equip.get("RadAway") or 0))
         layout.addRow("RadAway:", self.radSpin)
         self.capsSpin = QSpinBox(); self.capsSpin.setRange(0, 10**6)
-        self.capsSpin.setValue(int(equip.get("Nuka") or 0))
         layout.addRow("Caps:", self.capsSpin)
         self.nukaSpin = QSpinBox(); self.nukaSpin.setRange(0, 10**6)
-        self.nukaSpin.setValue(int(equip.get("NukaColaQuantum") or 0))
         layout.addRow("Nuka Cola Quantum:", self.nukaSpin)
         self.setLayout(layout)
+    def resourceSpins(self):
+        return {"stimpacks": self.stimSpin, "radaway": self.radSpin,
+                "caps": self.capsSpin, "quantum": self.nukaSpin}
+    def setTeam(self, team, position):
+        """Show team (position is its index in the save's team list); None clears the editor."""
+        self.team, self.position = team, position
+        self.setEnabled(team is not None)
+        view = Team(team or {})
+        self.teamIndexLabel.setText("Team Index: " + ("N/A" if view.index is None else str(view.index)))
+        self.timeSpentSpin.setValue(view.time_spent)
+        self.returnDurationSpin.setValue(view.return_duration)
+        resources = view.resources()
+        for name, spin in self.resourceSpins().items():
+            spin.setValue(getattr(resources, name))
     def updateTeam(self):
-        self.team["elapsedTimeAliveExploring"] = self.timeSpentSpin.value()
-        self.team["returnTripDuration"] = self.returnDurationSpin.value()
-        resources = {
-            "StimPack": self.stimSpin.value(),
-            "RadAway": self.radSpin.value(),
-            "Nuka": self.capsSpin.value(),
-            "NukaColaQuantum": self.nukaSpin.value()
-        }
-        if self.is_actor:
-            if "actor" in self.team and "equipment" in self.team["actor"]:
-                self.team["actor"]["equipment"]["storage"]["resources"] = resources
-        else:
-            if "teamEquipment" in self.team:
-                self.team["teamEquipment"]["storage"]["resources"] = resources
+        """Write the editor back into the bound team; returns the history operations."""
+        if self.team is None:
+            return []
+        view = Team(self.team)
+        path = ("vault", "wasteland", "teams", self.position)
+        before = dict(self.team)
+        view.update(time_spent=self.timeSpentSpin.value(), return_duration=self.returnDurationSpin.value())
+        ops = history.diff(before, self.team, path)
+        values = {name: spin.value() for name, spin in self.resourceSpins().items()}
+        if view.storage() is not None and view.resources().values(*values) != values:
+            # Other resources the team carries are kept
+            resources = view.resources(create=True)
+            beforeResources = dict(resources.data)
+            resources.update(**values)
+            ops += history.diff(beforeResources, resources.data, path + view.storage_path + ("resources",))
+        return ops
 
 class WastelandTeamsTab(QWidget):
     def __init__(self, main_window, is_actor=False):
@@ -465,107 +901,266 @@ class WastelandTeamsTab(QWidget):
         self.initUI()
     def initUI(self):
         layout = QHBoxLayout()
-        self.teamList = QListWidget()
-        self.teamList.itemClicked.connect(self.onTeamSelected)
-        layout.addWidget(self.teamList, 1)
-        self.editorArea = QScrollArea()
-        self.editorArea.setWidgetResizable(True)
-        layout.addWidget(self.editorArea, 2)
+        self.teamModel = TeamTableModel(self)
+        self.teamTable = QtWidgets.QTreeView()
+        self.teamTable.setModel(self.teamModel)
+        self.teamTable.setUniformRowHeights(True)
+        self.teamTable.setRootIsDecorated(False)
+        self.teamTable.setItemsExpandable(False)
+        self.teamTable.setAlternatingRowColors(True)
+        self.teamTable.setSortingEnabled(True)
+        self.teamTable.sortByColumn(-1, QtCore.Qt.AscendingOrder)
+        self.teamTable.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+        self.teamTable.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.teamTable.header().setStretchLastSection(False)
+        self.teamTable.header().setDefaultSectionSize(64)
+        self.teamTable.header().resizeSection(1, 120)
+        self.teamTable.selectionModel().currentRowChanged.connect(self.onTeamSelected)
+        layout.addWidget(self.teamTable, 3)
+        self.editor = WastelandTeamEditor(self.is_actor)
+        editorArea = QScrollArea()
+        editorArea.setWidgetResizable(True)
+        editorArea.setWidget(self.editor)
+        layout.addWidget(editorArea, 2)
         self.setLayout(layout)
-        self.teams = []
-    def setData(self, teams):
-        self.teamList.clear()
-        self.teams = teams
-        for t in teams:
-            name = t.get("actor", {}).get("name", "Unnamed") if self.is_actor else t.get("dweller", {}).get("name", "Unnamed")
-            item = QListWidgetItem("Team " + str(t.get("teamIndex", "N/A")) + " - " + name)
-            item.setData(QtCore.Qt.UserRole, t)
-            self.teamList.addItem(item)
-    def onTeamSelected(self, item):
-        team = item.data(QtCore.Qt.UserRole)
-        editor = WastelandTeamEditor(team, self.is_actor)
-        self.editorArea.setWidget(editor)
-        self.currentEditor = editor
+    def setData(self, teams, positions):
+        self.editor.setTeam(None, None)
+        self.teamModel.setTeams(teams, positions)
+    def onTeamSelected(self, current, previous):
+        # Keep the edits of the team being left before showing the next one
+        self.updateCurrentTeam()
+        if current.isValid():
+            i = self.teamModel.positionAt(current.row())
+            self.editor.setTeam(self.teamModel.items[i], self.teamModel.positions[i])
+        else:
+            self.editor.setTeam(None, None)
     def updateCurrentTeam(self):
-        if hasattr(self, "currentEditor"):
-            self.currentEditor.updateTeam()
+        team = self.editor.team
+        ops = self.editor.updateTeam()
+        if ops:
+            index = Team(team).index
+            self.main_window.recordEdit(f"Edit team {self.editor.position if index is None else index}", ops)
+            self.teamModel.refreshTeam(team)
+
+class WastelandTab(QWidget):
+    # (checkbox text, action, summary line for the number of teams it changed)
+    TEAM_OPERATIONS = [
+        ("Recall all teams", actions.recall_teams, "{} team(s) recalled"),
+        (f"Refill StimPacks / RadAway (to {actions.TEAM_SUPPLY_LIMIT})", actions.refill_team_supplies,
+         "{} team(s) refilled"),
+        ("Set return duration to 0", actions.instant_return, "{} team(s) return instantly"),
+    ]
 
-class WastelandTab(QTabWidget):
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
+        layout = QVBoxLayout()
+        self.tabs = QTabWidget()
         self.dwellerTab = WastelandTeamsTab(main_window, is_actor=False)
         self.actorTab = WastelandTeamsTab(main_window, is_actor=True)
-        self.addTab(self.dwellerTab, "Dweller Teams")
-        self.addTab(self.actorTab, "Actor Teams")
+        self.tabs.addTab(self.dwellerTab, "Dweller Teams")
+        self.tabs.addTab(self.actorTab, "Actor Teams")
+        layout.addWidget(self.tabs)
+        # Bulk operations over dweller and actor teams, applied as one edit
+        bulkBox = QGroupBox("All Teams")
+        bulkLayout = QHBoxLayout()
+        self.operationChecks = []
+        for text, action, summary in self.TEAM_OPERATIONS:
+            check = QtWidgets.QCheckBox(text)
+            bulkLayout.addWidget(check)
+            self.operationChecks.append(check)
+        bulkLayout.addStretch()
+        btnApply = QPushButton("Apply to All Teams")
+        btnApply.clicked.connect(self.applyTeamOperations)
+        bulkLayout.addWidget(btnApply)
+        bulkBox.setLayout(bulkLayout)
+        layout.addWidget(bulkBox)
+        self.setLayout(layout)
     def setData(self, data):
-        teams = data.get("vault", {}).get("wasteland", {}).get("teams", [])
-        dweller_teams = [t for t in teams if "dweller" in t]
-        actor_teams = [t for t in teams if "actor" in t]
-        self.dwellerTab.setData(dweller_teams)
-        self.actorTab.setData(actor_teams)
+        teams = Vault(data.get("vault") or {}).teams
+        for tab, key in ((self.dwellerTab, "dweller"), (self.actorTab, "actor")):
+            positions = [i for i, t in enumerate(teams) if key in t]
+            tab.setData([teams[i] for i in positions], positions)
     def updateData(self):
         self.dwellerTab.updateCurrentTeam()
         self.actorTab.updateCurrentTeam()
+    def applyTeamOperations(self):
+        """Run the ticked operations over every team; one undo entry and one summary."""
+        chosen = [op for op, check in zip(self.TEAM_OPERATIONS, self.operationChecks) if check.isChecked()]
+        data = self.main_window.save_data
+        if not chosen or data is None:
+            return
+        self.main_window.collectTabEdits()
+        ops, lines = [], []
+        for text, action, summary in chosen:
+            capture = history.ItemCapture(data, *actions.ITEM_FIELDS[action])
+            if not action(data):
+                continue
+            done = capture.ops()
+            lines.append(summary.format(len({path for op in done for path in op.paths()})))
+            ops += done
+        if not lines:
+            QMessageBox.information(self, "Team Operations", "This save has no wasteland teams.")
+            return
+        self.main_window.recordEdit("Team operations", ops)
+        self.main_window.refreshSections(["vault"])
+        QMessageBox.information(self, "Team Operations", "\n".join(lines))
 
 # ============================================================
 #  Rooms Tab Widget
 # ============================================================
 class RoomsTab(QWidget):
-    def __init__(self):
-        super().__init__()
-        self.initUI()
-    def initUI(self):
-        layout = QHBoxLayout()
-        self.roomList = QListWidget()
-        self.roomList.itemClicked.connect(self.onRoomSelected)
-        layout.addWidget(self.roomList, 1)
-        self.editorArea = QScrollArea()
-        self.editorArea.setWidgetResizable(True)
-        layout.addWidget(self.editorArea, 2)
-        self.setLayout(layout)
-    def setData(self, rooms):
-        self.roomList.clear()
-        self.rooms = rooms
-        for i, room in enumerate(rooms):
-            text = f"Room {i+1}: {room.get('RoomType', 'Unknown')}"
-            item = QListWidgetItem(text)
-            item.setData(QtCore.Qt.UserRole, (i, room))
-            self.roomList.addItem(item)
-    def onRoomSelected(self, item):
-        idx, room = item.data(QtCore.Qt.UserRole)
-        editor = RoomEditor(idx, room)
-        self.editorArea.setWidget(editor)
-        self.currentEditor = editor
-    def updateData(self):
-        if hasattr(self, "currentEditor"):
-            self.currentEditor.updateRoom()
+    # Offered in the edit boxes besides the values found in the save
+    ROOM_STATES = ["Idle", "Working", "Fire", "Radroach", "MoleRat", "Deathclaw", "Raider", "FeralGhoul"]
 
-class RoomEditor(QWidget):
-    def __init__(self, idx, room):
+    def __init__(self, main_window):
         super().__init__()
-        self.idx = idx
-        self.room = room
+        self.main_window = main_window
+        self.rooms = []
         self.initUI()
     def initUI(self):
-        layout = QFormLayout()
-        self.roomTypeEdit = QLineEdit(str(self.room.get("RoomType", "")))
-        layout.addRow("Room Type:", self.roomTypeEdit)
-        self.stateEdit = QLineEdit(str(self.room.get("currentStateName", "")))
-        layout.addRow("Current State:", self.stateEdit)
+        layout = QHBoxLayout()
+        splitter = QtWidgets.QSplitter(QtCore.Qt.Horizontal)
+        # Table: cells are edited in place, several rows at once below
+        self.roomModel = RoomTableModel(self)
+        self.roomModel.valueEdited.connect(self.onValueEdited)
+        self.roomTable = QtWidgets.QTreeView()
+        self.roomTable.setModel(self.roomModel)
+        self.roomTable.setUniformRowHeights(True)
+        self.roomTable.setRootIsDecorated(False)
+        self.roomTable.setItemsExpandable(False)
+        self.roomTable.setAlternatingRowColors(True)
+        self.roomTable.setSortingEnabled(True)
+        self.roomTable.sortByColumn(-1, QtCore.Qt.AscendingOrder)
+        self.roomTable.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.roomTable.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.roomTable.setEditTriggers(QtWidgets.QAbstractItemView.DoubleClicked |
+                                       QtWidgets.QAbstractItemView.EditKeyPressed)
+        self.roomTable.header().setStretchLastSection(False)
+        self.roomTable.header().setDefaultSectionSize(56)
+        self.roomTable.header().resizeSection(1, 130)
+        self.roomTable.header().resizeSection(2, 100)
+        self.roomTable.selectionModel().selectionChanged.connect(self.onTableSelection)
+        bulkBox = QGroupBox("Edit Selected Rooms")
+        bulkLayout = QFormLayout()
+        self.typeCheck = QtWidgets.QCheckBox("Room Type:")
+        self.typeCombo = QComboBox()
+        self.typeCombo.setEditable(True)
+        bulkLayout.addRow(self.typeCheck, self.typeCombo)
+        self.stateCheck = QtWidgets.QCheckBox("Current State:")
+        self.stateCombo = QComboBox()
+        self.stateCombo.setEditable(True)
+        bulkLayout.addRow(self.stateCheck, self.stateCombo)
+        self.progressCheck = QtWidgets.QCheckBox("Progress (%):")
         self.progressSpin = QSpinBox()
         self.progressSpin.setRange(0, 100)
-        self.progressSpin.setValue(int(self.room.get("progress", 0)))
-        layout.addRow("Progress (%):", self.progressSpin)
-        btnUpdate = QPushButton("Apply Changes")
-        btnUpdate.clicked.connect(self.updateRoom)
-        layout.addRow(btnUpdate)
+        bulkLayout.addRow(self.progressCheck, self.progressSpin)
+        # Changing a value ticks its box: only ticked fields are applied
+        self.typeCombo.currentTextChanged.connect(lambda: self.typeCheck.setChecked(True))
+        self.stateCombo.currentTextChanged.connect(lambda: self.stateCheck.setChecked(True))
+        self.progressSpin.valueChanged.connect(lambda: self.progressCheck.setChecked(True))
+        self.btnApply = QPushButton("Apply to Selected")
+        self.btnApply.setEnabled(False)
+        self.btnApply.clicked.connect(self.applyToSelected)
+        bulkLayout.addRow(self.btnApply)
+        bulkBox.setLayout(bulkLayout)
+        tableWidget = QWidget()
+        tableLayout = QVBoxLayout()
+        tableLayout.setContentsMargins(0, 0, 0, 0)
+        tableLayout.addWidget(self.roomTable)
+        tableLayout.addWidget(bulkBox)
+        tableWidget.setLayout(tableLayout)
+        splitter.addWidget(tableWidget)
+        # Map: drag to pan, wheel to zoom, click (Ctrl+click) to select
+        self.mapView = VaultMapView()
+        self.mapView.roomsSelected.connect(self.onMapSelection)
+        mapWidget = QWidget()
+        mapLayout = QVBoxLayout()
+        mapLayout.setContentsMargins(0, 0, 0, 0)
+        mapLayout.addWidget(self.mapView)
+        zoomLayout = QHBoxLayout()
+        for text, slot in (("Zoom In", lambda: self.mapView.zoom(1.25)),
+                           ("Zoom Out", lambda: self.mapView.zoom(0.8)),
+                           ("Fit Vault", self.mapView.fitAll)):
+            btn = QPushButton(text)
+            btn.clicked.connect(slot)
+            zoomLayout.addWidget(btn)
+        zoomLayout.addStretch()
+        mapLayout.addLayout(zoomLayout)
+        mapWidget.setLayout(mapLayout)
+        splitter.addWidget(mapWidget)
+        splitter.setStretchFactor(0, 3)
+        splitter.setStretchFactor(1, 2)
+        layout.addWidget(splitter)
         self.setLayout(layout)
-    def updateRoom(self):
-        self.room["RoomType"] = self.roomTypeEdit.text()
-        self.room["currentStateName"] = self.stateEdit.text()
-        self.room["progress"] = self.progressSpin.value()
-        QMessageBox.information(self, "Room Updated", f"Room {self.idx+1} updated.")
+    def setData(self, rooms):
+        # The same list again (undo, redo, a reload) keeps the selection
+        keep = self.selectedPositions() if rooms is self.rooms else []
+        self.rooms = rooms
+        self.roomModel.setItems(rooms)
+        self.mapView.setRooms(rooms)
+        for combo, key, extra in ((self.typeCombo, "RoomType", []),
+                                  (self.stateCombo, "currentStateName", self.ROOM_STATES)):
+            combo.blockSignals(True)
+            combo.clear()
+            combo.addItems(sorted(set(extra) | {str(r[key]) for r in rooms if r.get(key)}))
+            combo.blockSignals(False)
+        self.selectPositions(keep)
+        self.onTableSelection()
+    def selectedPositions(self):
+        rows = self.roomTable.selectionModel().selectedRows()
+        return sorted(self.roomModel.positionAt(i.row()) for i in rows)
+    def selectPositions(self, positions):
+        selection = QtCore.QItemSelection()
+        for position in positions:
+            row = self.roomModel.rowOfPosition(position)
+            if row >= 0:
+                selection.select(self.roomModel.index(row, 0),
+                                 self.roomModel.index(row, self.roomModel.columnCount() - 1))
+        self.roomTable.selectionModel().select(selection, QtCore.QItemSelectionModel.ClearAndSelect)
+        if positions:
+            row = self.roomModel.rowOfPosition(positions[0])
+            if row >= 0:
+                self.roomTable.scrollTo(self.roomModel.index(row, 0))
+    def onTableSelection(self, *args):
+        positions = self.selectedPositions()
+        self.mapView.selectRooms(positions)
+        self.btnApply.setEnabled(bool(positions))
+        self.btnApply.setText(f"Apply to {len(positions)} Selected" if positions else "Apply to Selected")
+        if positions:
+            room = Room(self.rooms[positions[0]])
+            for widget in (self.typeCombo, self.stateCombo, self.progressSpin):
+                widget.blockSignals(True)
+            self.typeCombo.setCurrentText(room.kind)
+            self.stateCombo.setCurrentText(room.state)
+            self.progressSpin.setValue(room.progress)
+            for widget in (self.typeCombo, self.stateCombo, self.progressSpin):
+                widget.blockSignals(False)
+        for check in (self.typeCheck, self.stateCheck, self.progressCheck):
+            check.setChecked(False)
+    def onMapSelection(self, positions):
+        self.selectPositions(positions)
+    def onValueEdited(self, position, key, old, new):
+        self.main_window.recordEdit(f"Edit room {position + 1}",
+                                    [history.Replace(("vault", "rooms", position, key), old, new)])
+        self.mapView.refreshRooms([position])
+    def applyToSelected(self):
+        """Write the ticked fields into every selected room, as one undo entry."""
+        positions = self.selectedPositions()
+        values = {}
+        if self.typeCheck.isChecked() and self.typeCombo.currentText().strip():
+            values["RoomType"] = self.typeCombo.currentText().strip()
+        if self.stateCheck.isChecked() and self.stateCombo.currentText().strip():
+            values["currentStateName"] = self.stateCombo.currentText().strip()
+        if self.progressCheck.isChecked():
+            values["progress"] = self.progressSpin.value()
+        if not positions or not values:
+            return
+        capture = history.ItemCapture(self.main_window.save_data, ("vault", "rooms"), [(k,) for k in values])
+        changed = self.roomModel.setValues(positions, values)
+        self.main_window.recordEdit(f"Edit {len(positions)} room(s)", capture.ops())
+        self.mapView.refreshRooms(positions)
+        self.main_window.statusMsgLabel.setText(f"Updated {changed} room(s)")
 
 # ============================================================
 #  Advanced Tab (Raw JSON Editor)
@@ -574,45 +1169,150 @@ class AdvancedTab(QWidget):
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
+        self.data = None
         self.initUI()
     def initUI(self):
         layout = QVBoxLayout()
+        # Tree view: nodes are created as branches are expanded
+        self.treeModel = JsonTreeModel(self)
+        self.treeModel.valueEdited.connect(self.onValueEdited)
+        self.tree = QtWidgets.QTreeView()
+        self.tree.setModel(self.treeModel)
+        self.tree.setUniformRowHeights(True)
+        self.tree.setAlternatingRowColors(True)
+        self.tree.setEditTriggers(QtWidgets.QAbstractItemView.DoubleClicked |
+                                  QtWidgets.QAbstractItemView.EditKeyPressed)
+        self.tree.header().resizeSection(0, 300)
+        self.tree.header().resizeSection(1, 400)
+        # Raw text view: only generated on request
         self.rawEditor = QPlainTextEdit()
-        layout.addWidget(self.rawEditor)
-        btnApply = QPushButton("Apply Raw JSON Changes")
-        btnApply.clicked.connect(self.applyChanges)
-        layout.addWidget(btnApply)
+        self.stack = QtWidgets.QStackedWidget()
+        self.stack.addWidget(self.tree)
+        self.stack.addWidget(self.rawEditor)
+        layout.addWidget(self.stack)
+        btnLayout = QHBoxLayout()
+        self.btnToggle = QPushButton("Show Full JSON Text")
+        self.btnToggle.clicked.connect(self.toggleView)
+        btnLayout.addWidget(self.btnToggle)
+        self.btnApply = QPushButton("Apply Raw JSON Changes")
+        self.btnApply.clicked.connect(self.applyChanges)
+        self.btnApply.setVisible(False)
+        btnLayout.addWidget(self.btnApply)
+        btnLayout.addStretch()
+        layout.addLayout(btnLayout)
         self.setLayout(layout)
     def setData(self, data):
-        self.rawEditor.setPlainText(json.dumps(data, indent=4))
+        self.data = data
+        self.treeModel.setRoot(data)
+        self.showTree()
+    def toggleView(self):
+        if self.stack.currentWidget() is self.tree:
+            self.showFullText()
+        else:
+            self.showTree()
+    def showTree(self):
+        self.rawEditor.clear()
+        self.stack.setCurrentWidget(self.tree)
+        self.btnToggle.setText("Show Full JSON Text")
+        self.btnApply.setVisible(False)
+    def showFullText(self):
+        if self.data is None:
+            return
+        QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
+        try:
+            self.rawEditor.setPlainText(json.dumps(dict(self.data), indent=4))
+        finally:
+            QtWidgets.QApplication.restoreOverrideCursor()
+        self.stack.setCurrentWidget(self.rawEditor)
+        self.btnToggle.setText("Back to Tree View")
+        self.btnApply.setVisible(True)
+    def onValueEdited(self, path, old, new):
+        self.main_window.recordEdit("Edit " + "/".join(str(k) for k in path),
+                                    [history.Replace(path, old, new)])
+        # The other tabs re-read save_data the next time they are shown
+        self.main_window.refreshTabs(keep=self)
+        self.main_window.statusMsgLabel.setText("Edited " + "/".join(str(k) for k in path))
     def applyChanges(self):
         try:
             newData = json.loads(self.rawEditor.toPlainText())
-            self.main_window.save_data = newData
-            self.main_window.vaultTab.setData(newData)
-            dwellers = newData.get("dwellers", {}).get("dwellers", [])
-            self.main_window.dwellerTab.setData(dwellers)
-            self.main_window.wastelandTab.setData(newData)
-            if "rooms" in newData.get("vault", {}):
-                self.main_window.roomsTab.setData(newData["vault"]["rooms"])
-            QMessageBox.information(self, "Advanced", "Raw JSON changes applied.")
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Invalid JSON: {str(e)}")
+            return
+        if not isinstance(newData, dict):
+            QMessageBox.critical(self, "Error", "Invalid JSON: the save must be a JSON object")
+            return
+        # Apply only the differences, so they can be undone and the
+        # unchanged sections keep their cached encodings.
+        ops = history.diff(self.data.to_dict(), newData)
+        history.apply(self.data, ops)
+        self.main_window.recordEdit("Apply raw JSON", ops)
+        self.main_window.refreshTabs(keep=self)
+        self.setData(self.data)
+        QMessageBox.information(self, "Advanced", "Raw JSON changes applied.")
 
 # ============================================================
 #  Main Application Window with Toolbar, Menu, and Status Bar
 # ============================================================
 class MainWindow(QMainWindow):
-    def __init__(self):
+    firstPainted = QtCore.pyqtSignal(float)  # seconds since STARTED
+    RELOAD_DELAY_MS = 500  # quiet time after a watched file changes before it is read
+    # Top-level sections each tab shows (None: all of them)
+    TAB_SECTIONS = {"vaultTab": {"vault"}, "dwellerTab": {"dwellers"}, "wastelandTab": {"vault"},
+                    "roomsTab": {"vault"}, "advancedTab": None}
+    # Attribute, title and class of each tab, in order
+    TABS = [("vaultTab", "Vault", VaultTab), ("dwellerTab", "Dwellers", DwellersTab),
+            ("wastelandTab", "Wasteland", WastelandTab), ("roomsTab", "Rooms", RoomsTab),
+            ("advancedTab", "Advanced", AdvancedTab)]
+    
+    def __init__(self, settings=None, lazy=None):
+        """lazy: build each tab when it is first shown (default: the lazy_startup setting)."""
         super().__init__()
         self.setWindowTitle("Fallout Shelter Save Editor")
         self.resize(1200, 900)
         self.save_data = None
+        self.saver = None
+        self.checker = None  # ValidateWorker of the running save check
+        self.scriptWorker = None
+        self.scriptConsole = None
+        self.validator = validation.Validator()
+        self.current_file = None
+        self.backupWorker = None
         
-        # Create our global settings instance and load settings
-        self.app_settings = Settings()
+        # Shared settings service; components react to its changed signal
+        self.app_settings = settings if settings is not None else Settings.instance()
+        self.history = history.History(self.app_settings.get_option("undo_depth", 100))
+        # Open vaults; decoded saves are cached so switching between them is instant
+        self.workspace = workspace.Workspace(self.app_settings.get_option("cache_size_mb", workspace.DEFAULT_CACHE_MB) << 20)
+        self.loadPool = QtCore.QThreadPool(self)
+        self.loadPool.setMaxThreadCount(workspace.LOAD_THREADS)
+        self.loadTasks = {}  # filename -> FileLoadTask still running
+        # Decrypted saves on disk, next to settings.json, for instant reopening
+        self.diskCache = savecache.DiskCache(
+            os.path.join(os.path.dirname(self.app_settings.settings_file), "cache"),
+            self.app_settings.get_option("disk_cache_mb", savecache.DEFAULT_MB) << 20)
+        self.loadingDialog = None
+        self.activatePath = None
+        self.prefetchTask = None  # FileLoadTask reading last_opened_file at startup
+        self.reopenPending = False
+        # Open files rewritten by others are reloaded and merged (see reloadChangedFiles)
+        self.fileWatcher = QtCore.QFileSystemWatcher(self)
+        self.fileWatcher.fileChanged.connect(self.onWatchedFileChanged)
+        self.reloadTimer = QtCore.QTimer(self)
+        self.reloadTimer.setSingleShot(True)
+        self.reloadTimer.setInterval(self.RELOAD_DELAY_MS)
+        self.reloadTimer.timeout.connect(self.reloadChangedFiles)
+        self.changedFiles = set()
+        self.reloadTasks = {}  # filename -> ReloadTask still running
+        self.lazyStartup = self.app_settings.get_option("lazy_startup", True) if lazy is None else lazy
+        self.startupTime = None  # seconds from STARTED to the first paint
         
         self.initUI()
+        self.backupTimer = QtCore.QTimer(self)
+        self.backupTimer.timeout.connect(self.runBackup)
+        self.applyBackupSettings()
+        self.traceOperation = None
+        self.applyTraceSettings()
+        self.app_settings.changed.connect(self.onSettingChanged)
         
     def initUI(self):
         self.setDockOptions(QtWidgets.QMainWindow.AllowTabbedDocks | 
@@ -620,17 +1320,21 @@ class MainWindow(QMainWindow):
                             QtWidgets.QMainWindow.AllowNestedDocks)
         self.createToolBar()
         self.tabs = QTabWidget()
-        self.vaultTab = VaultTab(self)
-        self.dwellerTab = DwellersTab(self)
-        self.wastelandTab = WastelandTab(self)
-        self.roomsTab = RoomsTab()
-        self.advancedTab = AdvancedTab(self)
-        self.tabs.addTab(self.vaultTab, "Vault")
-        self.tabs.addTab(self.dwellerTab, "Dwellers")
-        self.tabs.addTab(self.wastelandTab, "Wasteland")
-        self.tabs.addTab(self.roomsTab, "Rooms")
-        self.tabs.addTab(self.advancedTab, "Advanced")
+        for attr, title, cls in self.TABS:
+            if self.lazyStartup:
+                # An empty page until the tab is first shown (see buildTab)
+                page = QWidget()
+                QVBoxLayout(page).setContentsMargins(0, 0, 0, 0)
+                setattr(self, attr, None)
+            else:
+                page = cls(self)
+                setattr(self, attr, page)
+            self.tabs.addTab(page, title)
+        # Tabs are populated from save_data the first time they are shown
+        self.populatedTabs = set()
+        self.tabs.currentChanged.connect(self.onTabChanged)
         self.setCentralWidget(self.tabs)
+        self.createVaultDock()
         self.createMenuBar()
         self.setupStatusBar()
         self.statusMsgLabel.setText("Ready")
@@ -655,6 +1359,7 @@ class MainWindow(QMainWindow):
         saveAction = QtWidgets.QAction(saveIcon, "Save", self)
         saveAction.triggered.connect(self.save_file)
         toolbar.addAction(saveAction)
+        self.fileActions = [openAction, saveAction]
         
         aboutAction = QtWidgets.QAction(aboutIcon, "About", self)
         aboutAction.triggered.connect(self.about)
@@ -668,6 +1373,14 @@ class MainWindow(QMainWindow):
         settingsAction.triggered.connect(self.open_settings)
         toolbar.addAction(settingsAction)
         
+    def createVaultDock(self):
+        self.vaultList = QtWidgets.QListWidget()
+        self.vaultList.currentRowChanged.connect(self.onVaultSelected)
+        dock = QtWidgets.QDockWidget("Vaults", self)
+        dock.setObjectName("vaultsDock")
+        dock.setWidget(self.vaultList)
+        self.addDockWidget(QtCore.Qt.LeftDockWidgetArea, dock)
+        
     def createMenuBar(self):
         menubar = self.menuBar()
         fileMenu = menubar.addMenu("File")
@@ -677,11 +1390,52 @@ class MainWindow(QMainWindow):
         saveAct = QtWidgets.QAction("Save .sav", self)
         saveAct.triggered.connect(self.save_file)
         fileMenu.addAction(saveAct)
+        self.reopenAct = QtWidgets.QAction("Reopen Last", self)
+        self.reopenAct.setShortcut(QtGui.QKeySequence("Ctrl+Shift+O"))
+        self.reopenAct.triggered.connect(self.reopenLast)
+        fileMenu.addAction(self.reopenAct)
+        closeAct = QtWidgets.QAction("Close Vault", self)
+        closeAct.setShortcut(QtGui.QKeySequence.Close)
+        closeAct.triggered.connect(self.closeVault)
+        fileMenu.addAction(closeAct)
+        restoreAct = QtWidgets.QAction("Restore Backup...", self)
+        restoreAct.triggered.connect(self.restoreBackup)
+        fileMenu.addAction(restoreAct)
+        fileMenu.addSeparator()
+        compareAct = QtWidgets.QAction("Compare With File...", self)
+        compareAct.triggered.connect(self.compareWithFile)
+        fileMenu.addAction(compareAct)
+        compareBackupAct = QtWidgets.QAction("Compare With Backup...", self)
+        compareBackupAct.triggered.connect(self.compareWithBackup)
+        fileMenu.addAction(compareBackupAct)
+        checkAct = QtWidgets.QAction("Check Save...", self)
+        checkAct.triggered.connect(self.checkSave)
+        fileMenu.addAction(checkAct)
+        self.fileActions += [openAct, self.reopenAct, saveAct, closeAct]
         
         optionsMenu = menubar.addMenu("Options")
         settingsAct = QtWidgets.QAction("Settings", self)
         settingsAct.triggered.connect(self.open_settings)
         optionsMenu.addAction(settingsAct)
+        editMenu = menubar.addMenu("Edit")
+        self.undoAct = QtWidgets.QAction("Undo", self)
+        self.undoAct.setShortcut(QtGui.QKeySequence.Undo)
+        self.undoAct.triggered.connect(self.undo)
+        editMenu.addAction(self.undoAct)
+        self.redoAct = QtWidgets.QAction("Redo", self)
+        self.redoAct.setShortcut(QtGui.QKeySequence.Redo)
+        self.redoAct.triggered.connect(self.redo)
+        editMenu.addAction(self.redoAct)
+        self.fileActions += [self.undoAct, self.redoAct]
+        editMenu.addSeparator()
+        scriptAct = QtWidgets.QAction("Script Console...", self)
+        scriptAct.triggered.connect(self.showScriptConsole)
+        editMenu.addAction(scriptAct)
+        self.updateUndoActions()
+        
+        self.exportTraceAct = QtWidgets.QAction("Export Trace...", self)
+        self.exportTraceAct.triggered.connect(self.exportTrace)
+        optionsMenu.addAction(self.exportTraceAct)
         
         helpMenu = menubar.addMenu("Help")
         aboutAct = QtWidgets.QAction("About", self)
@@ -700,6 +1454,14 @@ class MainWindow(QMainWindow):
         self.statusMsgLabel.setAlignment(QtCore.Qt.AlignCenter)
         self.statusMsgLabel.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Preferred)
         self.statusBar().addWidget(self.statusMsgLabel, 1)
+        self.saveProgressBar = QtWidgets.QProgressBar()
+        self.saveProgressBar.setMaximumWidth(200)
+        self.saveProgressBar.setVisible(False)
+        self.statusBar().addWidget(self.saveProgressBar)
+        # Phase breakdown of the last load/save (debug mode only)
+        self.traceStatusLabel = QtWidgets.QLabel("")
+        self.traceStatusLabel.setVisible(False)
+        self.statusBar().addWidget(self.traceStatusLabel)
         self.developerStatusLabel = QtWidgets.QLabel("Developed with <span style='color: red;'>❤️</span> by Robin Doak")
         self.developerStatusLabel.setTextFormat(QtCore.Qt.RichText)
         self.statusBar().addPermanentWidget(self.developerStatusLabel)
@@ -712,143 +1474,764 @@ class MainWindow(QMainWindow):
             "Source code is available on GitHub.")
             
     def information(self):
+        from info import InformationDialog
         dlg = InformationDialog(self)
         dlg.exec_()
         
     def open_settings(self):
         dlg = SettingsDialog(self.app_settings, self)
         if dlg.exec_() == QtWidgets.QDialog.Accepted:
+            self.statusMsgLabel.setText("Settings updated and theme applied.")
+
+    def onSettingChanged(self, key, value):
+        if key == "theme":
             from qt_material import apply_stylesheet
             app = QtWidgets.QApplication.instance()
-            theme = self.app_settings.get_option("theme", "dark_teal")
-            apply_stylesheet(app, theme=f"{theme}.xml")
-            self.statusMsgLabel.setText("Settings updated and theme applied.")
+            apply_stylesheet(app, theme=f"{value}.xml")
+        elif key in ("auto_backup", "backup_frequency"):
+            self.applyBackupSettings()
+        elif key in ("debug_mode", "log_level"):
+            self.applyTraceSettings()
+        elif key == "undo_depth":
+            for vault in self.workspace.vaults:
+                vault.history.set_depth(value)
+            self.history.set_depth(value)
+            self.updateUndoActions()
+        elif key == "cache_size_mb":
+            self.workspace.cache.set_limit(value << 20)
+        elif key == "prefetch_last_file" and not value:
+            self.cancelPrefetch()
+        elif key == "disk_cache_mb":
+            self.diskCache.max_bytes = value << 20
+            self.diskCache.evict()
         
     def open_file(self):
-        fname, _ = QFileDialog.getOpenFileName(self, "Open .sav File", "", "Save Files (*.sav);;All Files (*)")
-        if fname:
-            progressDialog = LoadingDialog(self)
-            progressDialog.show()
+        fnames, _ = QFileDialog.getOpenFileNames(self, "Open .sav File", "", "Save Files (*.sav);;All Files (*)")
+        self.loadFiles(fnames)
             
-            self.loader = FileLoaderWorker(fname)
-            self.loader.loaded.connect(self.onFileLoaded)
-            self.loader.error.connect(self.onFileLoadError)
-            self.loader.finished.connect(progressDialog.close)
-            self.loader.start()
+    def loadFiles(self, fnames):
+        """Load saves on the load pool; vaults already open and cached are just shown."""
+        if not fnames:
+            return
+        self.activatePath = os.path.abspath(fnames[-1])
+        for fname in fnames:
+            vault = self.workspace.find(fname)
+            if vault is not None and vault.key in self.workspace.cache:
+                self.activateVault(vault)
+                continue
+            if fname in self.loadTasks:
+                continue
+            if self.prefetchTask is not None and not self.prefetchTask.cancelled and self.prefetchTask.filename == fname:
+                # Still prefetching: open it as soon as that finishes
+                self.reopenPending = True
+                self.statusMsgLabel.setText("Loading " + os.path.basename(fname) + "...")
+                continue
+            if not self.loadTasks:
+                tracing.begin("load")
+                self.traceOperation = "load"
+            if self.loadingDialog is None:
+                self.loadingDialog = LoadingDialog(self)
+                self.loadingDialog.show()
+            task = FileLoadTask(fname, self.workspace.cache, self.diskCache)
+            task.signals.phase.connect(self.loadingDialog.label.setText)
+            task.signals.loaded.connect(self.onFileLoaded)
+            task.signals.error.connect(self.onFileLoadError)
+            task.signals.finished.connect(self.onLoadFinished)
+            self.loadTasks[fname] = task
+            self.loadPool.start(task)
+            
+    def onLoadFinished(self, filename):
+        self.loadTasks.pop(filename, None)
+        if not self.loadTasks and self.loadingDialog is not None:
+            self.loadingDialog.close()
+            self.loadingDialog = None
             
-    def onFileLoaded(self, data):
+    def onFileLoaded(self, filename, key, data):
+        vault = self.workspace.find(filename)
+        if vault is None:
+            vault = self.workspace.open(filename, key, history.History(self.app_settings.get_option("undo_depth", 100)))
+        elif vault.key != key:
+            # Dropped from the cache and changed on disk since: old edits no longer apply
+            vault.history.clear()
+            vault.key = key
+        if self.workspace.active is None or vault.path == self.activatePath:
+            self.activateVault(vault, data)
+        else:
+            self.workspace.cache.put(key, data)
+            self.updateVaultList()
+        self.showTraceSummary(log=True)
+        self.statusMsgLabel.setText("File loaded successfully")
+        with self.app_settings.transaction():
+            self.app_settings.set_option("last_opened_file", filename)
+            recent = self.app_settings.get_option("recent_files", [])
+            if filename not in recent:
+                recent.append(filename)
+                self.app_settings.set_option("recent_files", recent)
+        if self.app_settings.get_option("backup_on_load", False) and vault is self.workspace.active:
+            self.runBackup()
+        
+    def onFileLoadError(self, filename, errorMessage):
+        QMessageBox.critical(self, "Error", f"{os.path.basename(filename)}: {errorMessage}")
+        
+    # ----- Open Vaults (see workspace.py) -----
+    def activateVault(self, vault, data=None):
+        """Show an open vault, after collecting pending tab edits of the current one."""
+        if self.save_data is not None and self.workspace.active is not None:
+            self.collectTabEdits()
+        if data is None:
+            data = self.workspace.model(vault)
+            if data is None:
+                # Dropped from the cache to stay under the memory limit
+                self.loadFiles([vault.path])
+                return
+        self.workspace.activate(vault, data)
         self.save_data = data
-        self.vaultTab.setData(self.save_data)
-        dwellers = self.save_data.get("dwellers", {}).get("dwellers", [])
-        self.dwellerTab.setData(dwellers)
-        self.wastelandTab.setData(self.save_data)
-        if "rooms" in self.save_data.get("vault", {}):
-            self.roomsTab.setData(self.save_data["vault"]["rooms"])
-        self.advancedTab.setData(self.save_data)
+        self.current_file = vault.path
+        self.history = vault.history
+        self.tabs.setEnabled(True)
+        self.updateUndoActions()
+        self.refreshTabs()
         version = self.save_data.get("appVersion", "1.0.0")
         self.versionStatusLabel.setText("App Version: " + str(version))
-        self.statusMsgLabel.setText("File loaded successfully")
-        self.app_settings.set_option("last_opened_file", self.loader.filename)
-        recent = self.app_settings.get_option("recent_files", [])
-        if self.loader.filename not in recent:
-            recent.append(self.loader.filename)
-            self.app_settings.set_option("recent_files", recent)
-        
-    def onFileLoadError(self, errorMessage):
-        QMessageBox.critical(self, "Error", errorMessage)
+        self.updateVaultList()
+
+    def closeVault(self):
+        vault = self.workspace.active
+        if vault is None:
+            return
+        self.collectTabEdits()
+        if vault.modified:
+            reply = QMessageBox.question(self, "Close Vault", f"Discard unsaved changes to {vault.name}?",
+                                         QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            if reply != QMessageBox.Yes:
+                return
+        self.workspace.close(vault)
+        self.save_data = None
+        self.current_file = None
+        if self.workspace.vaults:
+            self.activateVault(self.workspace.vaults[-1])
+        else:
+            self.history = history.History(self.app_settings.get_option("undo_depth", 100))
+            self.tabs.setEnabled(False)
+            self.updateUndoActions()
+            self.updateVaultList()
+
+    def onVaultSelected(self, row):
+        if 0 <= row < len(self.workspace.vaults) and self.workspace.vaults[row] is not self.workspace.active:
+            self.activateVault(self.workspace.vaults[row])
+
+    def setModified(self):
+        vault = self.workspace.active
+        if vault is not None and not vault.modified:
+            vault.modified = True
+            self.updateVaultList()
+
+    def updateVaultList(self):
+        self.vaultList.blockSignals(True)
+        self.vaultList.clear()
+        for vault in self.workspace.vaults:
+            item = QtWidgets.QListWidgetItem(vault.name + (" *" if vault.modified else ""))
+            item.setToolTip(vault.path)
+            self.vaultList.addItem(item)
+            if vault is self.workspace.active:
+                self.vaultList.setCurrentItem(item)
+        self.vaultList.blockSignals(False)
+        self.updateWatchedFiles()
+        active = self.workspace.active
+        self.setWindowTitle("Fallout Shelter Save Editor" + (f" - {active.name}" if active else ""))
         
     def save_file(self):
         if not self.save_data:
             QMessageBox.warning(self, "No Data", "Please load a save file first.")
             return
-        self.dwellerTab.updateCurrentDweller()
-        self.vaultTab.updateData(self.save_data)
-        self.wastelandTab.updateData()
-        self.roomsTab.updateData()
-        json_text = json.dumps(self.save_data, separators=(',', ':'))
-        try:
-            encrypted = encrypt_sav(json_text)
-            fname, _ = QFileDialog.getSaveFileName(self, "Save .sav File", "", "Save Files (*.sav);;All Files (*)")
-            if fname:
-                with open(fname, "w") as f:
-                    f.write(encrypted)
-                self.statusMsgLabel.setText("Save file written successfully!")
+        if self.isBusy():
+            return
+        self.collectTabEdits()
+        tracing.begin("save")
+        self.traceOperation = "save"
+        if self.app_settings.get_option("check_before_save", True):
+            self.startCheck(saving=True)
+        else:
+            self.writeSave()
+
+    def writeSave(self):
+        fname, _ = QFileDialog.getSaveFileName(self, "Save .sav File", "", "Save Files (*.sav);;All Files (*)")
+        if not fname:
+            self.statusMsgLabel.setText("Save cancelled")
+            return
+        # Serialize and encrypt on a worker; edits are locked until it finishes
+        self.setSaving(True)
+        self.saver = SaveWorker(self.save_data, fname)
+        self.saver.progress.connect(self.onSaveProgress)
+        self.saver.saved.connect(self.onFileSaved)
+        self.saver.error.connect(self.onFileSaveError)
+        self.saver.finished.connect(lambda: self.setSaving(False))
+        self.saver.start()
+
+    def isBusy(self):
+        return any(w is not None and w.isRunning() for w in (self.saver, self.checker, self.scriptWorker))
+
+    # ----- Save Check (see validation.py) -----
+    def checkSave(self):
+        if not self.save_data:
+            QMessageBox.warning(self, "No Data", "Please load a save file first.")
+            return
+        if self.isBusy():
+            return
+        self.collectTabEdits()
+        tracing.begin("validate")
+        self.traceOperation = "validate"
+        self.startCheck(saving=False)
+
+    def startCheck(self, saving):
+        """Validate save_data on a worker (edits locked), then continue in onChecked."""
+        self.setSaving(True)
+        self.statusMsgLabel.setText("Checking save...")
+        self.checker = ValidateWorker(self.validator, self.save_data)
+        self.checker.checked.connect(lambda problems: self.onChecked(problems, saving))
+        self.checker.error.connect(self.onCheckError)
+        self.checker.start()
+
+    def onCheckError(self, errorMessage):
+        self.setSaving(False)
+        self.statusMsgLabel.setText("Save check failed")
+        QMessageBox.critical(self, "Error", f"Save check failed: {errorMessage}")
+
+    def onChecked(self, problems, saving):
+        self.setSaving(False)
+        if not problems:
+            self.statusMsgLabel.setText("Save check found no problems")
+            if saving:
+                self.writeSave()
             else:
-                self.statusMsgLabel.setText("Save cancelled")
+                QMessageBox.information(self, "Save Check", "No problems found.")
+            return
+        self.statusMsgLabel.setText("Save check: " + validation.summary(problems))
+        dialog = ProblemsDialog(problems, saving, self)
+        dialog.exec_()
+        if dialog.choice == "repair":
+            self.repairSave(problems)
+        if saving and dialog.choice is not None:
+            self.writeSave()
+        elif saving:
+            self.statusMsgLabel.setText("Save cancelled")
+
+    def repairSave(self, problems):
+        """Apply the fixes as one undo entry and refresh the tabs that show them."""
+        ops = validation.repair(self.save_data, problems)
+        if not ops:
+            return
+        self.recordEdit("Repair save", ops)
+        self.refreshSections({op.path[0] for op in ops})
+        self.statusMsgLabel.setText(f"Repaired {len(ops)} value(s)")
+
+    # ----- Scripts (see scripting.py) -----
+    def showScriptConsole(self):
+        if self.scriptConsole is None:
+            self.scriptConsole = ScriptConsole(self)
+            self.scriptConsole.runRequested.connect(self.runScripts)
+            self.scriptConsole.cancelRequested.connect(self.cancelScripts)
+        self.scriptConsole.show()
+        self.scriptConsole.raise_()
+
+    def runScripts(self, scripts):
+        """Run scripts on a worker (edits locked); their edits are applied in onScriptsRan."""
+        if not self.save_data:
+            QMessageBox.warning(self, "No Data", "Please load a save file first.")
+            return
+        if self.isBusy():
+            return
+        self.collectTabEdits()
+        console = self.scriptConsole
+        self.setSaving(True)
+        console.setRunning(True)
+        console.write(f"--- {', '.join(name for name, _ in scripts)}\n")
+        self.statusMsgLabel.setText("Running script...")
+        self.scriptWorker = ScriptWorker(self.save_data, scripts)
+        self.scriptWorker.progress.connect(console.onProgress)
+        self.scriptWorker.output.connect(console.write)
+        label = f"Script {scripts[0][0]}" if len(scripts) == 1 else f"{len(scripts)} scripts"
+        self.scriptWorker.ran.connect(lambda ops, timings: self.onScriptsRan(label, ops, timings))
+        self.scriptWorker.error.connect(lambda message: self.onScriptsStopped(f"Error: {message}"))
+        self.scriptWorker.cancelled.connect(lambda: self.onScriptsStopped("Cancelled; the save was not changed"))
+        self.scriptWorker.start()
+
+    def cancelScripts(self):
+        if self.scriptWorker is not None and self.scriptWorker.isRunning():
+            self.scriptWorker.cancel()
+
+    def onScriptsRan(self, label, ops, timings):
+        self.onScriptsStopped("\n".join(timings))
+        if not ops:
+            self.scriptConsole.write("No changes\n")
+            return
+        # Every edit of the run lands at once, as one undo entry
+        history.apply(self.save_data, ops)
+        self.recordEdit(label, ops)
+        self.refreshSections({op.path[0] for op in ops})
+        self.scriptConsole.write(f"{len(ops)} value(s) changed\n")
+        self.statusMsgLabel.setText(f"{label}: {len(ops)} value(s) changed")
+
+    def onScriptsStopped(self, message):
+        self.setSaving(False)
+        self.scriptConsole.setRunning(False)
+        self.scriptConsole.write(message + "\n")
+        self.statusMsgLabel.setText(message.splitlines()[0] if message else "")
+
+    def setSaving(self, saving):
+        self.tabs.setEnabled(not saving)
+        self.vaultList.setEnabled(not saving)
+        for action in self.fileActions:
+            action.setEnabled(not saving)
+        if not saving:
+            self.updateUndoActions()
+        self.saveProgressBar.setValue(0)
+        self.saveProgressBar.setVisible(saving)
+
+    def onSaveProgress(self, percent, phase):
+        if phase == "Serializing":
+            self.saveProgressBar.setRange(0, 0)
+        else:
+            self.saveProgressBar.setRange(0, 100)
+            self.saveProgressBar.setValue(percent)
+        self.statusMsgLabel.setText(f"{phase} save...")
+
+    def onFileSaved(self, filename):
+        self.workspace.saved(self.workspace.active, filename)
+        self.current_file = self.workspace.active.path
+        self.updateVaultList()
+        self.statusMsgLabel.setText("Save file written successfully!")
+        self.showTraceSummary(log=True)
+
+    # ----- Startup Time -----
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.startupTime is None:
+            self.startupTime = time.perf_counter() - STARTED
+            QtCore.QTimer.singleShot(0, self.onFirstPaint)
+
+    def onFirstPaint(self):
+        tracing.record("startup", STARTED, self.startupTime)
+        tracing.logger.debug("First paint %.0f ms after start", self.startupTime * 1000)
+        if self.app_settings.get_option("debug_mode", False):
+            self.traceStatusLabel.setText(f"startup {self.startupTime * 1000:.0f} ms")
+        # The visible tab is built right after the first paint, not before it
+        self.buildTab(self.tabs.currentIndex())
+        self.firstPainted.emit(self.startupTime)
+        self.startPrefetch()
+
+    # ----- External Changes -----
+    def updateWatchedFiles(self):
+        """Watch exactly the open vaults' files (a file replaced by a rename drops out)."""
+        paths = {v.path for v in self.workspace.vaults if os.path.exists(v.path)}
+        watched = set(os.path.abspath(p) for p in self.fileWatcher.files())
+        if paths - watched:
+            self.fileWatcher.addPaths(sorted(paths - watched))
+        if watched - paths:
+            self.fileWatcher.removePaths(sorted(watched - paths))
+
+    def onWatchedFileChanged(self, path):
+        # Writers often touch a file several times; wait until it has been quiet
+        self.changedFiles.add(os.path.abspath(path))
+        self.reloadTimer.start()
+
+    def reloadChangedFiles(self):
+        if self.isBusy():
+            self.reloadTimer.start()  # look again once our own save or check is done
+            return
+        self.updateWatchedFiles()
+        for path in list(self.changedFiles):
+            if path in self.reloadTasks:
+                continue  # read again when the running reload finishes
+            self.changedFiles.discard(path)
+            vault = self.workspace.find(path)
+            model = self.workspace.model(vault) if vault is not None else None
+            if model is None or not os.path.exists(path):
+                continue  # not in memory: it is read from disk when selected anyway
+            task = ReloadTask(path, vault.key, {k: model.base_bytes(k) for k in model})
+            task.signals.reloaded.connect(self.onFileReloaded)
+            task.signals.error.connect(self.onReloadError)
+            task.signals.finished.connect(self.onReloadFinished)
+            self.reloadTasks[path] = task
+            self.loadPool.start(task)
+
+    def onReloadFinished(self, filename):
+        self.reloadTasks.pop(filename, None)
+        if filename in self.changedFiles:
+            self.reloadTimer.start()
+
+    def onReloadError(self, filename, errorMessage):
+        # Often a write still in progress; the watcher reports the next one
+        self.statusMsgLabel.setText(f"Could not read changes to {os.path.basename(filename)}: {errorMessage}")
+
+    def onFileReloaded(self, filename, oldKey, key, theirs, changed):
+        if self.isBusy():
+            # A save, validation or script is using the model: merge once it is done
+            self.changedFiles.add(filename)
+            self.reloadTimer.start()
+            return
+        vault = self.workspace.find(filename)
+        model = self.workspace.model(vault) if vault is not None else None
+        if model is None:
+            return
+        if vault.key != oldKey:
+            # Saved while the file was being read: compare again
+            self.changedFiles.add(filename)
+            self.reloadTimer.start()
+            return
+        self.workspace.cache.rekey(vault.key, key)
+        vault.key = key
+        if not changed:
+            return
+        active = vault is self.workspace.active
+        if active:
+            self.collectTabEdits()  # pending tab edits count as unsaved edits
+        merged, conflicts, ops = workspace.merge(model, theirs, changed)
+        # Pushed, not recorded: merged sections match the file, so they stay clean
+        vault.history.push("External changes", ops)
+        if active:
+            self.updateUndoActions()
+            self.refreshSections(merged)
+        message = f"{vault.name} changed on disk"
+        if merged:
+            message += "; updated " + ", ".join(merged)
+        self.statusMsgLabel.setText(message)
+        if conflicts:
+            QMessageBox.warning(self, "File Changed",
+                f"{vault.name} was changed by another program.\n\n"
+                f"Your unsaved edits to {', '.join(conflicts)} were kept; saving will "
+                "overwrite those parts of the file. Other changes were taken over.")
+
+    def refreshSections(self, sections):
+        """Repopulate only the tabs that show one of sections (top-level keys)."""
+        sections = set(sections)
+        for attr, shown in self.TAB_SECTIONS.items():
+            tab = getattr(self, attr)
+            if tab is not None and (shown is None or shown & sections):
+                self.populatedTabs.discard(tab)
+        if "appVersion" in sections:
+            self.versionStatusLabel.setText("App Version: " + str(self.save_data.get("appVersion", "1.0.0")))
+        self.populateTab(self.buildTab(self.tabs.currentIndex()))
+
+    # ----- Prefetch of the last opened file -----
+    def startPrefetch(self):
+        """Decrypt and parse last_opened_file in the background, into the save cache."""
+        path = self.app_settings.get_option("last_opened_file", "")
+        if (not self.app_settings.get_option("prefetch_last_file", True) or not path
+                or not os.path.isfile(path) or self.workspace.vaults or self.prefetchTask is not None):
+            return
+        self.prefetchTask = FileLoadTask(path, self.workspace.cache, self.diskCache, parse=True)
+        self.prefetchTask.signals.loaded.connect(self.onPrefetched)
+        self.prefetchTask.signals.finished.connect(self.onPrefetchFinished)
+        self.loadPool.start(self.prefetchTask)
+
+    def cancelPrefetch(self):
+        """Stop the prefetch at its next step; the task is dropped once it has finished."""
+        if self.prefetchTask is not None:
+            self.prefetchTask.cancel()
+            self.reopenPending = False
+
+    def onPrefetched(self, filename, key, data):
+        if self.prefetchTask is None or self.prefetchTask.cancelled:
+            return  # cancelled after it emitted
+        # Cached by file key: reopening hashes the file again, so a changed file is loaded anew
+        self.workspace.cache.put(key, data)
+        if self.reopenPending:
+            self.reopenPending = False
+            self.loadFiles([filename])
+
+    def onPrefetchFinished(self, filename):
+        if self.prefetchTask is not None:
+            self.prefetchTask = None
+            if self.reopenPending:
+                # It failed: load it the normal way, which reports the error
+                self.reopenPending = False
+                self.loadFiles([filename])
+
+    def reopenLast(self):
+        path = self.app_settings.get_option("last_opened_file", "")
+        if not path or not os.path.isfile(path):
+            QMessageBox.warning(self, "Reopen Last", "The last opened file no longer exists.")
+            return
+        self.loadFiles([path])
+
+    # ----- Tracing (see tracing.py) -----
+    def applyTraceSettings(self):
+        debug = self.app_settings.get_option("debug_mode", False)
+        tracing.configure(debug, self.app_settings.get_option("log_level", "Info"))
+        self.exportTraceAct.setEnabled(debug)
+        self.traceStatusLabel.setVisible(debug)
+
+    def showTraceSummary(self, log=False):
+        if tracing.enabled() and self.traceOperation:
+            self.traceStatusLabel.setText(tracing.summary(self.traceOperation, log=log))
+
+    def exportTrace(self):
+        fname, _ = QFileDialog.getSaveFileName(self, "Export Trace", "trace.json", "Trace Files (*.json);;All Files (*)")
+        if fname:
+            try:
+                count = tracing.export_chrome_trace(fname)
+                self.statusMsgLabel.setText(f"Exported {count} trace events (open in chrome://tracing or Perfetto)")
+            except Exception as e:
+                QMessageBox.critical(self, "Error", str(e))
+
+    # ----- Backups (see backup.py) -----
+    def applyBackupSettings(self):
+        """(Re)start the backup timer from the current Backup settings."""
+        if self.app_settings.get_option("auto_backup", False):
+            minutes = max(1, int(self.app_settings.get_option("backup_frequency", 10)))
+            self.backupTimer.start(minutes * 60 * 1000)
+        else:
+            self.backupTimer.stop()
+
+    def runBackup(self):
+        """Back up the current .sav file on a worker; unchanged files are skipped."""
+        if not self.current_file or not os.path.exists(self.current_file):
+            return
+        if self.backupWorker is not None and self.backupWorker.isRunning():
+            return
+        self.backupWorker = BackupWorker(self.current_file, self.app_settings)
+        self.backupWorker.done.connect(self.statusMsgLabel.setText)
+        self.backupWorker.error.connect(self.statusMsgLabel.setText)
+        self.backupWorker.start()
+
+    def chooseBackup(self, title):
+        """Let the user pick a backup of the current vault; returns (store, version) or None."""
+        if not self.current_file:
+            QMessageBox.warning(self, "No Data", "Please load a save file first.")
+            return None
+        import backup
+        store = backup.BackupStore(self.app_settings.get_option("backup_folder"), backup.vault_name(self.current_file))
+        if not store.versions:
+            QMessageBox.information(self, title, f"No backups found for {store.vault}.")
+            return None
+        labels = [f"{v['name']}  ({v['created']}, {v['size'] / 1024:.0f} KB)" for v in reversed(store.versions)]
+        label, ok = QtWidgets.QInputDialog.getItem(self, title, "Backup:", labels, 0, False)
+        if not ok:
+            return None
+        return store, list(reversed(store.versions))[labels.index(label)]
+
+    def restoreBackup(self):
+        chosen = self.chooseBackup("Restore Backup")
+        if chosen is None:
+            return
+        store, version = chosen
+        fname, _ = QFileDialog.getSaveFileName(self, "Restore Backup As", version["name"] + ".sav",
+                                               "Save Files (*.sav);;All Files (*)")
+        if not fname:
+            return
+        try:
+            store.restore(version["name"], fname)
+            self.statusMsgLabel.setText(f"Backup {version['name']} restored to {fname}")
         except Exception as e:
-            QMessageBox.critical(self, "Error", str(e))
-            
-    # ----- Vault Action Functions -----
+            QMessageBox.critical(self, "Error", f"Restore failed: {e}")
+
+    # ----- Save Diff (see savediff.py) -----
+    def compareWithFile(self):
+        if self.save_data is None:
+            QMessageBox.warning(self, "No Data", "Please load a save file first.")
+            return
+        fname, _ = QFileDialog.getOpenFileName(self, "Compare With", "", "Save Files (*.sav);;All Files (*)")
+        if fname:
+            import savediff
+            self.showDiff(lambda: savediff.load_plaintext(fname), os.path.basename(fname))
+
+    def compareWithBackup(self):
+        chosen = self.chooseBackup("Compare With Backup")
+        if chosen is not None:
+            store, version = chosen
+            self.showDiff(lambda: store.plaintext(version["name"]), version["name"])
+
+    def showDiff(self, loadOther, name):
+        """Diff another save (old) against the current one, including unsaved edits."""
+        import savediff
+        self.collectTabEdits()
+        QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
+        try:
+            changes = savediff.diff_saves(loadOther(), self.save_data)
+        except Exception as e:
+            QtWidgets.QApplication.restoreOverrideCursor()
+            QMessageBox.critical(self, "Error", f"Compare failed: {e}")
+            return
+        QtWidgets.QApplication.restoreOverrideCursor()
+        DiffDialog(changes, f"Changes from {name} to the current save", self).exec_()
+
+    def onFileSaveError(self, errorMessage):
+        self.statusMsgLabel.setText("Save failed")
+        QMessageBox.critical(self, "Error", errorMessage)
+
+    def closeEvent(self, event):
+        if self.saver is not None and self.saver.isRunning():
+            # Never abandon a save half way; the temp file is renamed at the end
+            self.statusMsgLabel.setText("Finishing save...")
+            self.saver.wait()
+        if self.checker is not None and self.checker.isRunning():
+            self.checker.wait()
+        if self.scriptWorker is not None and self.scriptWorker.isRunning():
+            self.scriptWorker.cancel()
+            self.scriptWorker.wait()
+        if self.backupWorker is not None and self.backupWorker.isRunning():
+            self.backupWorker.wait()
+        self.cancelPrefetch()
+        self.loadPool.waitForDone()
+        self.app_settings.flush()
+        super().closeEvent(event)
+
+    # ----- Lazy Tab Population -----
+    def refreshTabs(self, keep=None):
+        """Mark every tab (except keep) stale and populate the visible one."""
+        self.populatedTabs = {keep} if keep is not None else set()
+        self.populateTab(self.buildTab(self.tabs.currentIndex()))
+    def buildTab(self, index):
+        """The tab at index, constructed first if it is still a placeholder."""
+        attr, _, cls = self.TABS[index]
+        tab = getattr(self, attr)
+        if tab is None:
+            with tracing.span("build." + cls.__name__):
+                tab = cls(self)
+            self.tabs.widget(index).layout().addWidget(tab)
+            setattr(self, attr, tab)
+        return tab
+    def onTabChanged(self, index):
+        tab = self.buildTab(index)
+        if tab is self.advancedTab and self.save_data is not None:
+            # The tree shows save_data directly, so bring in pending edits first
+            self.collectTabEdits()
+            self.populatedTabs.discard(tab)
+        self.populateTab(tab)
+    def populateTab(self, tab):
+        """Fill a tab from save_data; only the sections it shows get parsed."""
+        if self.save_data is None or tab in self.populatedTabs:
+            return
+        self.populatedTabs.add(tab)
+        with tracing.span("setData." + type(tab).__name__):
+            if tab is self.vaultTab:
+                self.vaultTab.setData(self.save_data)
+            elif tab is self.dwellerTab:
+                self.dwellerTab.setData(self.save_data.get("dwellers", {}).get("dwellers", []))
+            elif tab is self.wastelandTab:
+                self.wastelandTab.setData(self.save_data)
+            elif tab is self.roomsTab:
+                if "rooms" in self.save_data.get("vault", {}):
+                    self.roomsTab.setData(self.save_data["vault"]["rooms"])
+            elif tab is self.advancedTab:
+                self.advancedTab.setData(self.save_data)
+        self.showTraceSummary()
+    def collectTabEdits(self):
+        """Write pending edits back into save_data, skipping tabs that were never shown."""
+        if self.save_data is None:
+            return
+        if self.dwellerTab in self.populatedTabs:
+            self.dwellerTab.updateCurrentDweller()
+        if self.vaultTab in self.populatedTabs:
+            self.vaultTab.updateData(self.save_data)
+        if self.wastelandTab in self.populatedTabs:
+            self.wastelandTab.updateData()
+
+    def markDirty(self, section, item=None):
+        """Tell save_data that a tab edited a section (or one dweller) in place."""
+        if self.save_data is not None:
+            self.save_data.mark_dirty(section, item)
+            self.setModified()
+
+    # ----- Undo / Redo (see history.py) -----
+    def recordEdit(self, label, ops):
+        """Mark what an applied edit touched and push it onto the undo stack."""
+        if self.save_data is None or not ops:
+            return
+        for op in ops:
+            for path in op.paths():
+                self.save_data.mark_path_dirty(path)
+        self.history.push(label, ops)
+        self.setModified()
+        self.updateUndoActions()
+
+    def undo(self):
+        if self.save_data is None or not self.history.can_undo():
+            return
+        # Pending tab edits become their own entry, undone first
+        self.collectTabEdits()
+        entry, touched = self.history.undo(self.save_data)
+        self.afterHistoryStep("Undid: " + entry.label, touched)
+
+    def redo(self):
+        if self.save_data is None or not self.history.can_redo():
+            return
+        self.collectTabEdits()
+        if not self.history.can_redo():
+            return  # a pending tab edit started a new branch
+        entry, touched = self.history.redo(self.save_data)
+        self.afterHistoryStep("Redid: " + entry.label, touched)
+
+    def afterHistoryStep(self, message, touched):
+        for path in touched:
+            self.save_data.mark_path_dirty(path)
+        self.setModified()
+        self.refreshTabs()
+        self.updateUndoActions()
+        self.statusMsgLabel.setText(message)
+
+    def updateUndoActions(self):
+        undo, redo = self.history.undo_stack, self.history.redo_stack
+        idle = self.tabs.isEnabled()  # the tabs are disabled while a save runs
+        self.undoAct.setEnabled(bool(undo) and idle)
+        self.undoAct.setText("Undo " + undo[-1].label if undo else "Undo")
+        self.redoAct.setEnabled(bool(redo) and idle)
+        self.redoAct.setText("Redo " + redo[-1].label if redo else "Redo")
+
+    # ----- Vault Action Functions (see actions.py) -----
+    def runAction(self, action, message):
+        """Apply an actions.py function to save_data and refresh the tabs that show it."""
+        if not self.save_data:
+            return
+        self.collectTabEdits()
+        fields = actions.ITEM_FIELDS.get(action)
+        if fields:
+            capture = history.ItemCapture(self.save_data, *fields)
+        else:
+            capture = history.SectionCapture(self.save_data, actions.SECTIONS[action])
+        if action(self.save_data):
+            self.recordEdit(message.rstrip("!"), capture.ops())
+            self.refreshTabs()
+            QMessageBox.information(self, "Action", message)
     def action_removeRocks(self):
-        if self.save_data and "vault" in self.save_data:
-            self.save_data["vault"]["rocks"] = []
-            QMessageBox.information(self, "Action", "Rocks removed!")
+        self.runAction(actions.remove_rocks, "Rocks removed!")
     def action_unlockRooms(self):
-        if self.save_data and "unlockableMgr" in self.save_data:
-            self.save_data["unlockableMgr"]["objectivesInProgress"] = []
-            self.save_data["unlockableMgr"]["completed"] = []
-            self.save_data["unlockableMgr"]["claimed"] = [
-                "StorageUnlock", "MedbayUnlock", "SciencelabUnlock", "OverseerUnlock",
-                "RadioStationUnlock", "WeaponFactoryUnlock", "GymUnlock", "DojoUnlock",
-                "ArmoryUnlock", "ClassUnlock", "OutfitFactoryUnlock", "CardioUnlock",
-                "BarUnlock", "GameRoomUnlock", "BarberShopUnlock", "PowerPlantUnlock",
-                "WaterroomUnlock", "HydroponicUnlock", "NukacolaUnlock", "DesignFactoryUnlock"
-            ]
-            QMessageBox.information(self, "Action", "All rooms unlocked!")
+        self.runAction(actions.unlock_rooms, "All rooms unlocked!")
     def action_unlockRecipes(self):
-        if self.save_data and "survivalW" in self.save_data:
-            self.save_data["survivalW"]["recipes"] = [
-                "Shotgun_Rusty", "Railgun", "LaserPistol_Focused", "PlasmaThrower_Boosted",
-                "PlasmaThrower_Overcharged", "PipePistol_LittleBrother", "CombatShotgun_Hardened"
-            ]
-            QMessageBox.information(self, "Action", "Recipes unlocked!")
+        self.runAction(actions.unlock_recipes, "Recipes unlocked!")
     def action_maxSpecialAll(self):
-        if self.save_data and "dwellers" in self.save_data:
-            for d in self.save_data["dwellers"].get("dwellers", []):
-                if "stats" in d and "stats" in d["stats"]:
-                    for stat in d["stats"]["stats"]:
-                        stat["value"] = 10
-            QMessageBox.information(self, "Action", "All dweller stats set to max!")
+        self.runAction(actions.max_special_all, "All dweller stats set to max!")
     def action_maxHappinessAll(self):
-        if self.save_data and "dwellers" in self.save_data:
-            for d in self.save_data["dwellers"].get("dwellers", []):
-                if "happiness" in d:
-                    d["happiness"]["happinessValue"] = 100
-            QMessageBox.information(self, "Action", "All dweller happiness maxed!")
+        self.runAction(actions.max_happiness_all, "All dweller happiness maxed!")
     def action_healAll(self):
-        if self.save_data and "dwellers" in self.save_data:
-            for d in self.save_data["dwellers"].get("dwellers", []):
-                if "health" in d:
-                    d["health"]["radiationValue"] = 0
-                    d["health"]["healthValue"] = d["health"].get("maxHealth", 0)
-            QMessageBox.information(self, "Action", "All dwellers healed!")
+        self.runAction(actions.heal_all, "All dwellers healed!")
     def action_clearEmergency(self):
-        if self.save_data and "vault" in self.save_data and "rooms" in self.save_data["vault"]:
-            for room in self.save_data["vault"]["rooms"]:
-                room["currentStateName"] = "Idle"
-            QMessageBox.information(self, "Action", "Emergency cleared on all rooms!")
+        self.runAction(actions.clear_emergency, "Emergency cleared on all rooms!")
     def action_acceptWaiting(self):
-        if self.save_data and "dwellerSpawner" in self.save_data:
-            self.save_data["dwellerSpawner"]["dwellersWaiting"] = []
-            QMessageBox.information(self, "Action", "All waiting dwellers accepted!")
+        self.runAction(actions.accept_waiting, "All waiting dwellers accepted!")
     def action_unlockThemes(self):
-        if self.save_data and "survivalW" in self.save_data and "collectedThemes" in self.save_data["survivalW"]:
-            for theme in self.save_data["survivalW"]["collectedThemes"].get("themeList", []):
-                if "extraData" in theme:
-                    theme["extraData"]["partsCollectedCount"] = 9
-                    theme["extraData"]["IsNew"] = True
-            QMessageBox.information(self, "Action", "Themes unlocked!")
+        self.runAction(actions.unlock_themes, "Themes unlocked!")
 
 # ============================================================
 #  Main Function – Using qt-material Theme
 # ============================================================
 def main():
+    # --startup-time: print the seconds until the first paint and quit (for benchmarks)
+    # --eager-tabs: build every tab before showing the window
+    report_startup = "--startup-time" in sys.argv
+    eager = "--eager-tabs" in sys.argv
     app = QtWidgets.QApplication(sys.argv)
-    settings_instance = Settings()
-    theme = settings_instance.get_option("theme", "dark_teal")
+    settings = Settings.instance()
+    app.aboutToQuit.connect(settings.flush)
+    theme = settings.get_option("theme", "dark_teal")
+    # The theme must be in place before the first paint, so this import stays on the startup path
+    from qt_material import apply_stylesheet
     apply_stylesheet(app, theme=f"{theme}.xml")
     
-    window = MainWindow()
+    window = MainWindow(settings, lazy=False if eager else None)
+    if report_startup:
+        window.firstPainted.connect(lambda seconds: (print(f"startup {seconds:.4f}", flush=True), app.quit()))
     window.showMaximized()
     sys.exit(app.exec_())
 
@@ -0,0 +1,580 @@
+# models.py
+"""
+Qt item models used by the editor tabs.
+
+The models wrap the save's own lists and dicts instead of copying them into
+widget items, and compute cell values only when a view asks for them, so
+views stay fast with very large vaults.
+"""
+import json
+import math
+from PyQt5 import QtCore
+
+import history
+from schema import Dweller, Room, Team
+
+from dwellerindex import (
+    SPECIAL_NAMES, dweller_name, dweller_level, dweller_health,
+    dweller_radiation, dweller_happiness, dweller_outfit, dweller_weapon
+)
+
+
+# ============================================================
+#  Dweller Table Model
+# ============================================================
+class DwellerTableModel(QtCore.QAbstractTableModel):
+    """
+    Table over the save's dweller dicts. Rows map to dwellers through an
+    index list, so sorting only permutes integers and never touches the dicts.
+    An optional filter (a set of dweller positions) hides the other rows.
+    """
+    COLUMNS = (
+        [("Name", dweller_name), ("Level", dweller_level), ("Health", dweller_health),
+         ("Radiation", dweller_radiation), ("Happiness", dweller_happiness)]
+        + [(name[0], Dweller.FIELDS[name.lower()].read) for name in SPECIAL_NAMES]
+        + [("Outfit", dweller_outfit), ("Weapon", dweller_weapon)]
+    )
+    OUTFIT_COLUMN = len(COLUMNS) - 2
+    WEAPON_COLUMN = len(COLUMNS) - 1
+
+    def __init__(self, outfit_names=None, weapon_names=None, parent=None):
+        super().__init__(parent)
+        self.outfit_names = outfit_names or {}
+        self.weapon_names = weapon_names or {}
+        self.dwellers = []
+        self._order = []    # every dweller position, in sort order
+        self._rows = []     # the positions actually shown (after filtering)
+        self._filter = None
+        self._sort = None
+        self._rank = None   # dweller position -> index in _order, built on demand
+
+    def setDwellers(self, dwellers):
+        self.beginResetModel()
+        self.dwellers = dwellers
+        self._order = list(range(len(dwellers)))
+        self._rank = None
+        self._filter = None
+        self._rows = self._order
+        self.endResetModel()
+        if self._sort is not None:
+            self.sort(*self._sort)
+
+    def setFilter(self, positions):
+        """Show only the given dweller positions (None shows everyone)."""
+        self.layoutAboutToBeChanged.emit()
+        old_rows = self._rows
+        persistent = self.persistentIndexList()
+        self._filter = positions
+        self._applyFilter()
+        self._remapPersistent(old_rows, persistent)
+        self.layoutChanged.emit()
+
+    def _applyFilter(self):
+        if self._filter is None:
+            self._rows = self._order
+        elif len(self._filter) * 8 < len(self._order):
+            # Few matches: order them by rank instead of scanning every row.
+            if self._sort is None:
+                self._rows = sorted(self._filter)
+            else:
+                if self._rank is None:
+                    self._rank = {d: r for r, d in enumerate(self._order)}
+                self._rows = sorted(self._filter, key=self._rank.__getitem__)
+        else:
+            keep = self._filter
+            self._rows = [d for d in self._order if d in keep]
+
+    def _remapPersistent(self, old_rows, persistent):
+        if not persistent:
+            return
+        position = {d: row for row, d in enumerate(self._rows)}
+        new = []
+        for i in persistent:
+            d = old_rows[i.row()] if i.row() < len(old_rows) else None
+            new.append(self.index(position[d], i.column()) if d in position else QtCore.QModelIndex())
+        self.changePersistentIndexList(persistent, new)
+
+    def filteredCount(self):
+        return len(self._rows)
+
+    # ----- QAbstractTableModel interface -----
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal:
+            if role == QtCore.Qt.DisplayRole:
+                return self.COLUMNS[section][0]
+            if role == QtCore.Qt.ToolTipRole and 5 <= section < 5 + len(SPECIAL_NAMES):
+                return SPECIAL_NAMES[section - 5]
+        return None
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        d = self.dwellers[self._rows[index.row()]]
+        col = index.column()
+        if role == QtCore.Qt.DisplayRole:
+            value = self.COLUMNS[col][1](d)
+            if col == self.OUTFIT_COLUMN:
+                return self.outfit_names.get(value, value)
+            if col == self.WEAPON_COLUMN:
+                return self.weapon_names.get(value, value)
+            return value
+        if role == QtCore.Qt.UserRole:
+            return d
+        if role == QtCore.Qt.TextAlignmentRole and 0 < col < self.OUTFIT_COLUMN:
+            return int(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+        return None
+
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        """Sort by one column: each key is computed once per dweller, then the row list is permuted."""
+        if column < 0 or column >= len(self.COLUMNS):
+            self._sort = None
+            self.layoutAboutToBeChanged.emit()
+            old_rows, persistent = self._rows, self.persistentIndexList()
+            self._order = list(range(len(self.dwellers)))
+            self._rank = None
+            self._applyFilter()
+            self._remapPersistent(old_rows, persistent)
+            self.layoutChanged.emit()
+            return
+        self._sort = (column, order)
+        getter = self.COLUMNS[column][1]
+        if column == 0:
+            keys = [getter(d).lower() for d in self.dwellers]
+        else:
+            keys = [getter(d) for d in self.dwellers]
+        self.layoutAboutToBeChanged.emit()
+        old_rows = self._rows
+        persistent = self.persistentIndexList()
+        self._order = sorted(range(len(self.dwellers)), key=keys.__getitem__,
+                             reverse=(order == QtCore.Qt.DescendingOrder))
+        self._rank = None
+        self._applyFilter()
+        self._remapPersistent(old_rows, persistent)
+        self.layoutChanged.emit()
+
+    # ----- Helpers -----
+    def dwellerAt(self, row):
+        return self.dwellers[self._rows[row]]
+
+    def rowOfDweller(self, d):
+        """Current row of a dweller dict, or -1 if it is not shown."""
+        for row, i in enumerate(self._rows):
+            if self.dwellers[i] is d:
+                return row
+        return -1
+
+    def refreshDweller(self, d):
+        """Tell views that one dweller's values changed."""
+        row = self.rowOfDweller(d)
+        if row >= 0:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.COLUMNS) - 1))
+
+    def refreshAll(self):
+        if self._rows:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self._rows) - 1, len(self.COLUMNS) - 1))
+
+
+# ============================================================
+#  Room and Team Table Models
+# ============================================================
+def _sort_key(value):
+    # Mixed types (a missing key reads as "") sort as strings after numbers
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (0, value, "")
+    return (1, 0, str(value).lower())
+
+
+class _ListTableModel(QtCore.QAbstractTableModel):
+    """
+    Sortable table over a list of dicts from the save. Rows map to list
+    positions, so sorting never moves the dicts. Subclasses define COLUMNS
+    as (title, getter(item)) pairs.
+    """
+    COLUMNS = ()
+    NUMERIC_COLUMNS = ()    # right-aligned
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.items = []
+        self._rows = []     # item positions, in sort order
+        self._sort = None
+
+    def setItems(self, items):
+        self.beginResetModel()
+        self.items = items
+        self._rows = list(range(len(items)))
+        self.endResetModel()
+        if self._sort is not None:
+            self.sort(*self._sort)
+
+    def value(self, position, column):
+        return self.COLUMNS[column][1](self.items[position])
+
+    # ----- QAbstractTableModel interface -----
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return self.COLUMNS[section][0]
+        return None
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        position = self._rows[index.row()]
+        if role in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+            return self.value(position, index.column())
+        if role == QtCore.Qt.UserRole:
+            return position
+        if role == QtCore.Qt.TextAlignmentRole and index.column() in self.NUMERIC_COLUMNS:
+            return int(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+        return None
+
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        self.layoutAboutToBeChanged.emit()
+        old_rows, persistent = self._rows, self.persistentIndexList()
+        if column < 0 or column >= len(self.COLUMNS):
+            self._sort = None
+            self._rows = list(range(len(self.items)))
+        else:
+            self._sort = (column, order)
+            keys = [_sort_key(self.value(p, column)) for p in range(len(self.items))]
+            self._rows = sorted(range(len(self.items)), key=keys.__getitem__,
+                                reverse=(order == QtCore.Qt.DescendingOrder))
+        if persistent:
+            row_of = {p: row for row, p in enumerate(self._rows)}
+            self.changePersistentIndexList(persistent, [
+                self.index(row_of[old_rows[i.row()]], i.column()) for i in persistent])
+        self.layoutChanged.emit()
+
+    # ----- Helpers -----
+    def positionAt(self, row):
+        return self._rows[row]
+
+    def rowOfPosition(self, position):
+        try:
+            return self._rows.index(position)
+        except ValueError:
+            return -1
+
+    def refreshPosition(self, position):
+        row = self.rowOfPosition(position)
+        if row >= 0:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.COLUMNS) - 1))
+
+    def refreshAll(self):
+        if self._rows:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self._rows) - 1, len(self.COLUMNS) - 1))
+
+
+class RoomTableModel(_ListTableModel):
+    """
+    The save's room dicts. Type, state and progress are edited in place;
+    each edit is reported through valueEdited, and setValues() edits many
+    rooms at once.
+    """
+    COLUMNS = (
+        ("#", None),    # position + 1, see value()
+        ("Type", Room.kind.read),
+        ("State", Room.state.read),
+        ("Progress", Room.progress.read),
+        ("Level", Room.level.read),
+        ("Merge", Room.merge_level.read),
+        ("Row", Room.row.read),
+        ("Col", Room.col.read),
+        ("Dwellers", lambda room: len(Room.dwellers.read(room))),
+    )
+    NUMERIC_COLUMNS = (0, 3, 4, 5, 6, 7, 8)
+    EDITABLE = {1: "RoomType", 2: "currentStateName", 3: "progress"}
+    valueEdited = QtCore.pyqtSignal(int, str, object, object)  # room position, key, old value, new value
+
+    def value(self, position, column):
+        return position + 1 if column == 0 else super().value(position, column)
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        flags = QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+        if index.column() in self.EDITABLE:
+            flags |= QtCore.Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        if role != QtCore.Qt.EditRole or not index.isValid() or index.column() not in self.EDITABLE:
+            return False
+        key = self.EDITABLE[index.column()]
+        if key == "progress":
+            try:
+                value = int(str(value).strip())
+            except ValueError:
+                return False
+        else:
+            value = str(value).strip()
+            if not value:
+                return False
+        position = self._rows[index.row()]
+        room = self.items[position]
+        old = room.get(key, history.MISSING)
+        if old == value and type(old) is type(value):
+            return True
+        room[key] = value
+        self.dataChanged.emit(index, index)
+        self.valueEdited.emit(position, key, old, value)
+        return True
+
+    def setValues(self, positions, values):
+        """Assign values ({key: value}) to the rooms at positions; returns how many rooms changed."""
+        changed = 0
+        for position in positions:
+            room = self.items[position]
+            differs = False
+            for key, value in values.items():
+                if key not in room or room[key] != value:
+                    room[key] = value
+                    differs = True
+            changed += differs
+        self.refreshAll()
+        return changed
+
+
+def _team_resource(name):
+    return lambda team: getattr(Team(team).resources(), name)
+
+
+class TeamTableModel(_ListTableModel):
+    """
+    Wasteland teams of one kind (dweller or actor teams). The items are the
+    team dicts themselves; positions[i] is the index of items[i] in the
+    save's full team list, for undo paths.
+    """
+    COLUMNS = (
+        ("Team", Team.index.read),
+        ("Name", lambda team: Team(team).name),
+        ("Status", Team.status.read),
+        ("Time Spent", Team.time_spent.read),
+        ("Return", Team.return_duration.read),
+        ("StimPack", _team_resource("stimpacks")),
+        ("RadAway", _team_resource("radaway")),
+        ("Caps", _team_resource("caps")),
+        ("Quantum", _team_resource("quantum")),
+    )
+    NUMERIC_COLUMNS = (0, 3, 4, 5, 6, 7, 8)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.positions = []
+
+    def setTeams(self, teams, positions):
+        self.positions = positions
+        self.setItems(teams)
+
+    def teamAt(self, row):
+        return self.items[self._rows[row]]
+
+    def refreshTeam(self, team):
+        for position, t in enumerate(self.items):
+            if t is team:
+                self.refreshPosition(position)
+                return
+
+
+# ============================================================
+#  JSON Tree Model (Advanced tab)
+# ============================================================
+class _JsonNode:
+    __slots__ = ("parent", "key", "row", "children")
+
+    def __init__(self, parent, key, row):
+        self.parent = parent
+        self.key = key
+        self.row = row
+        self.children = []
+
+
+class JsonTreeModel(QtCore.QAbstractItemModel):
+    """
+    Tree over the save dict. Child nodes are created only when a branch is
+    expanded (in batches, for very long lists), and values are always read
+    live from the underlying dicts. Top-level sections of a SaveModel that
+    were never parsed stay unparsed until they are expanded.
+    """
+    FETCH_BATCH = 500
+    HEADERS = ("Key", "Value", "Type")
+    valueEdited = QtCore.pyqtSignal(list, object, object)  # path, old value, new value
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._data = {}
+        self._root = _JsonNode(None, None, 0)
+
+    def setRoot(self, data):
+        self.beginResetModel()
+        self._data = data if data is not None else {}
+        self._root = _JsonNode(None, None, 0)
+        self._root.children = [_JsonNode(self._root, k, i) for i, k in enumerate(self._data)]
+        self.endResetModel()
+
+    # ----- Node helpers -----
+    def _node(self, index):
+        return index.internalPointer() if index.isValid() else self._root
+
+    def _value(self, node):
+        if node is self._root:
+            return self._data
+        return self._value(node.parent)[node.key]
+
+    def _isUnparsedSection(self, node):
+        return node.parent is self._root and hasattr(self._data, "is_loaded") and not self._data.is_loaded(node.key)
+
+    def path(self, index):
+        node, keys = self._node(index), []
+        while node is not self._root:
+            keys.append(node.key)
+            node = node.parent
+        return keys[::-1]
+
+    # ----- QAbstractItemModel interface -----
+    def index(self, row, column, parent=QtCore.QModelIndex()):
+        node = self._node(parent)
+        if 0 <= row < len(node.children) and 0 <= column < len(self.HEADERS):
+            return self.createIndex(row, column, node.children[row])
+        return QtCore.QModelIndex()
+
+    def parent(self, index):
+        if not index.isValid():
+            return QtCore.QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is None or parent is self._root:
+            return QtCore.QModelIndex()
+        return self.createIndex(parent.row, 0, parent)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self._node(parent).children)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return len(self.HEADERS)
+
+    def hasChildren(self, parent=QtCore.QModelIndex()):
+        node = self._node(parent)
+        if node is self._root or node.children:
+            return True
+        if parent.column() > 0:
+            return False
+        if self._isUnparsedSection(node):
+            return True
+        try:
+            value = self._value(node)
+        except (KeyError, IndexError, TypeError):
+            return False
+        return isinstance(value, (dict, list)) and len(value) > 0
+
+    def canFetchMore(self, parent):
+        node = self._node(parent)
+        if node is self._root:
+            return False
+        if self._isUnparsedSection(node):
+            return True
+        try:
+            value = self._value(node)
+        except (KeyError, IndexError, TypeError):
+            return False
+        return isinstance(value, (dict, list)) and len(node.children) < len(value)
+
+    def fetchMore(self, parent):
+        node = self._node(parent)
+        value = self._value(node)  # parses an unparsed section here
+        start = len(node.children)
+        end = min(len(value), start + self.FETCH_BATCH)
+        if end <= start:
+            return
+        keys = list(value)[start:end] if isinstance(value, dict) else range(start, end)
+        self.beginInsertRows(parent, start, end - 1)
+        node.children.extend(_JsonNode(node, k, start + i) for i, k in enumerate(keys))
+        self.endInsertRows()
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid() or role not in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole, QtCore.Qt.ToolTipRole):
+            return None
+        node = index.internalPointer()
+        col = index.column()
+        if col == 0:
+            return f"[{node.key}]" if isinstance(node.key, int) else str(node.key)
+        if self._isUnparsedSection(node):
+            return "(not loaded - expand to parse)" if col == 1 else "section"
+        try:
+            value = self._value(node)
+        except (KeyError, IndexError, TypeError):
+            return None
+        if col == 2:
+            return "null" if value is None else type(value).__name__
+        if isinstance(value, dict):
+            return f"{{{len(value)} keys}}" if role != QtCore.Qt.EditRole else None
+        if isinstance(value, list):
+            return f"[{len(value)} items]" if role != QtCore.Qt.EditRole else None
+        if isinstance(value, str):
+            return value
+        return json.dumps(value)
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        flags = QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+        if index.column() == 1 and not self._isUnparsedSection(index.internalPointer()):
+            try:
+                value = self._value(index.internalPointer())
+            except (KeyError, IndexError, TypeError):
+                return flags
+            if not isinstance(value, (dict, list)):
+                flags |= QtCore.Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index, text, role=QtCore.Qt.EditRole):
+        """Assign an edited scalar, keeping the type of the value it replaces."""
+        if role != QtCore.Qt.EditRole or index.column() != 1:
+            return False
+        node = index.internalPointer()
+        old = self._value(node)
+        try:
+            if isinstance(old, str):
+                new = str(text)
+            elif isinstance(old, bool):
+                lowered = str(text).strip().lower()
+                if lowered not in ("true", "false"):
+                    return False
+                new = lowered == "true"
+            elif isinstance(old, int):
+                new = int(str(text).strip())
+            elif isinstance(old, float):
+                new = float(str(text).strip())
+            else:
+                new = json.loads(str(text))
+                if isinstance(new, (dict, list)):
+                    return False
+        except ValueError:
+            return False
+        # NaN and Infinity are not JSON: the game could not read the save
+        if isinstance(new, float) and not math.isfinite(new):
+            return False
+        if new == old and type(new) is type(old):
+            return True
+        self._value(node.parent)[node.key] = new
+        self.dataChanged.emit(index.siblingAtColumn(1), index.siblingAtColumn(2))
+        self.valueEdited.emit(self.path(index), old, new)
+        return True
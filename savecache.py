@@ -0,0 +1,141 @@
+# savecache.py
+"""
+On-disk cache of decrypted saves, so reopening an unchanged .sav skips
+base64, AES and indexing the sections.
+
+Entries are named after a hash of the ciphertext (workspace.file_key
+computes it anyway), so a changed file simply misses. Each entry holds the
+plaintext and its section offsets in marshal format, behind a magic header
+and a checksum; sections are still parsed on first use, as for any
+SaveModel. An entry that fails either check is deleted and the caller
+decrypts as usual. When the entries add up to more than max_bytes, the
+least recently used ones (by file mtime; hits touch it) are removed.
+
+    cache = DiskCache(folder)
+    entry = cache.get(digest)              # (plaintext, spans) or None
+    cache.put(digest, plain, model.spans())
+
+This module does not import Qt.
+"""
+import os
+import marshal
+import hashlib
+import tempfile
+
+MAGIC = b"FSSCACHE1\n"
+SUFFIX = ".fsc"
+DEFAULT_MB = 256
+_CHECKSUM = 16
+
+
+def _encode(plain, spans):
+    # marshal writes bytearray / memoryview as bytes, without a copy
+    payload = marshal.dumps((plain, {k: (int(s), int(e)) for k, (s, e) in spans.items()}))
+    return MAGIC + hashlib.blake2b(payload, digest_size=_CHECKSUM).digest() + payload
+
+
+def _decode(blob):
+    """(plaintext, spans), or None if blob is not an intact entry."""
+    head = len(MAGIC) + _CHECKSUM
+    if len(blob) < head or not blob.startswith(MAGIC):
+        return None
+    payload = memoryview(blob)[head:]
+    if hashlib.blake2b(payload, digest_size=_CHECKSUM).digest() != blob[len(MAGIC):head]:
+        return None
+    try:
+        plain, spans = marshal.loads(payload)
+    except (ValueError, EOFError, TypeError):
+        return None
+    if not isinstance(plain, bytes) or not isinstance(spans, dict):
+        return None
+    for key, span in spans.items():
+        if (not isinstance(key, str) or not isinstance(span, tuple) or len(span) != 2
+                or not 0 <= span[0] <= span[1] <= len(plain)):
+            return None
+    return plain, spans
+
+
+class DiskCache:
+    """Decrypted saves in folder, one file per ciphertext hash; max_bytes 0 turns it off."""
+
+    def __init__(self, folder, max_bytes=DEFAULT_MB << 20):
+        self.folder = folder
+        self.max_bytes = max_bytes
+
+    def _path(self, digest):
+        return os.path.join(self.folder, digest + SUFFIX)
+
+    def get(self, digest):
+        if not self.max_bytes:
+            return None
+        path = self._path(digest)
+        try:
+            with open(path, "rb") as f:
+                blob = f.read()
+        except OSError:
+            return None
+        entry = _decode(blob)
+        if entry is None:
+            # Corrupt, truncated or from another version: decrypt instead
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def put(self, digest, plain, spans):
+        """Store an entry (written to a temp file, then renamed) and evict down to max_bytes."""
+        if not self.max_bytes:
+            return
+        os.makedirs(self.folder, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.folder, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_encode(plain, spans))
+            os.replace(tmp, self._path(digest))
+        except OSError:
+            self._remove(tmp)
+            raise
+        self.evict()
+
+    def entries(self):
+        """[(mtime, size, path)] of the cached saves, oldest first."""
+        out = []
+        try:
+            names = os.listdir(self.folder)
+        except OSError:
+            return out
+        for name in names:
+            if name.endswith(SUFFIX):
+                path = os.path.join(self.folder, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue  # removed by another load
+                out.append((st.st_mtime, st.st_size, path))
+        out.sort()
+        return out
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self):
+        for _, _, path in self.entries():
+            self._remove(path)
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
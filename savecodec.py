@@ -0,0 +1,301 @@
+# savecodec.py
+"""
+Encryption / decryption of Fallout Shelter .sav files.
+
+A .sav file is base64 text wrapping AES-256-CBC ciphertext of the vault JSON.
+The stream functions below work through the file in fixed-size blocks so that
+only one full-size copy of the plaintext exists at a time; decrypt_sav and
+encrypt_sav are kept as thin wrappers with their original behaviour.
+
+This module does not import Qt, so it can be used from scripts and the CLI.
+"""
+import io
+import re
+import os
+import struct
+import binascii
+
+import tracing
+
+key_ints = [2815074099, 1725469378, 4039046167, 874293617,
+            3063605751, 3133984764, 4097598161, 3620741625]
+key = struct.pack('>8I', *key_ints)
+iv = bytes.fromhex("7475383967656A693334307438397532")
+
+BLOCK_SIZE = 16
+# Plaintext bytes handled per step; a multiple of both the AES block size and
+# 3, so every encrypted chunk base64-encodes without '=' padding.
+CHUNK_SIZE = 48 * 1024
+# Base64 characters read per step when decrypting (decodes to CHUNK_SIZE bytes).
+TEXT_CHUNK_SIZE = CHUNK_SIZE // 3 * 4
+
+_B64_ALPHABET = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/="
+_B64_JUNK = re.compile(rb'[^A-Za-z0-9+/=]')
+
+
+def _new_cipher():
+    from Crypto.Cipher import AES
+    return AES.new(key, AES.MODE_CBC, iv)
+
+
+def _strip_padding(buf, length):
+    """Return the length of buf without PKCS#7 padding (unchanged if the padding is invalid)."""
+    if length == 0 or length % BLOCK_SIZE:
+        return length
+    n = buf[length - 1]
+    if 1 <= n <= BLOCK_SIZE and buf[length - n:length] == bytes([n]) * n:
+        return length - n
+    return length
+
+
+def _iter_text_chunks(source):
+    """Yield base64 chunks (bytes) from a str, bytes-like object or file object."""
+    if isinstance(source, str):
+        for i in range(0, len(source), TEXT_CHUNK_SIZE):
+            yield source[i:i + TEXT_CHUNK_SIZE].encode('ascii')
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+        for i in range(0, len(view), TEXT_CHUNK_SIZE):
+            yield bytes(view[i:i + TEXT_CHUNK_SIZE])
+    else:
+        while True:
+            chunk = source.read(TEXT_CHUNK_SIZE)
+            if not chunk:
+                break
+            if isinstance(chunk, str):
+                chunk = chunk.encode('ascii')
+            yield chunk
+
+
+def _size_hint(source):
+    """Best-effort size in base64 characters of a decryption source."""
+    if isinstance(source, (str, bytes, bytearray)):
+        return len(source)
+    if isinstance(source, memoryview):
+        return source.nbytes
+    try:
+        return max(os.fstat(source.fileno()).st_size - source.tell(), 0)
+    except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+        pass
+    try:
+        if source.seekable():
+            pos = source.tell()
+            end = source.seek(0, io.SEEK_END)
+            source.seek(pos)
+            return max(end - pos, 0)
+    except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+        pass
+    return 0
+
+
+def decrypt_stream(source):
+    """
+    Decrypt a .sav from a file object (text or binary), str or bytes.
+
+    Base64 decoding and AES-CBC decryption run chunk by chunk into a single
+    preallocated buffer. Returns the UTF-8 plaintext as a bytearray, which can
+    be passed straight to json.loads.
+    """
+    try:
+        laps = tracing.laps("decrypt")
+        cipher = _new_cipher()
+        buf = bytearray(_size_hint(source) * 3 // 4)
+        pos = 0
+        text_carry = b""
+        data_carry = b""
+        for chunk in _iter_text_chunks(source):
+            laps.lap("read")
+            if chunk.translate(None, _B64_ALPHABET):
+                # Drop line breaks and other stray characters, as b64decode does.
+                chunk = _B64_JUNK.sub(b"", chunk)
+            if text_carry:
+                chunk = text_carry + chunk
+            cut = len(chunk) - len(chunk) % 4
+            text_carry = chunk[cut:]
+            data = data_carry + binascii.a2b_base64(chunk[:cut])
+            laps.lap("base64")
+            cut = len(data) - len(data) % BLOCK_SIZE
+            data_carry = data[cut:]
+            if not cut:
+                continue
+            if pos + cut > len(buf):
+                buf.extend(bytes(max(pos + cut - len(buf), len(buf))))
+            cipher.decrypt(memoryview(data)[:cut], output=memoryview(buf)[pos:pos + cut])
+            pos += cut
+            laps.lap("aes")
+        if text_carry:
+            # Let binascii report the malformed tail the same way b64decode would.
+            data_carry += binascii.a2b_base64(text_carry)
+        if data_carry:
+            raise ValueError("Data must be padded to 16 byte boundary in CBC mode")
+        del buf[_strip_padding(buf, pos):]
+        laps.close()
+        return buf
+    except Exception as e:
+        raise Exception(f"Decryption failed: {str(e)}")
+
+
+def _iter_plain_chunks(data):
+    """Yield UTF-8 byte chunks of a str or bytes-like plaintext."""
+    if isinstance(data, str):
+        step = CHUNK_SIZE // 4
+        for i in range(0, len(data), step):
+            yield data[i:i + step].encode('utf-8')
+    else:
+        view = memoryview(data)
+        for i in range(0, len(view), CHUNK_SIZE):
+            yield view[i:i + CHUNK_SIZE]
+
+
+def encrypt_stream(data, fout, progress=None):
+    """
+    Encrypt plaintext (str or bytes-like) and write base64 text to fout.
+
+    fout may be opened in text or binary mode. Each chunk is encrypted into a
+    reused buffer and written out immediately, so the full ciphertext is never
+    held in memory. If given, progress(done, total) is called after each chunk
+    with plaintext sizes. Returns the number of characters written.
+    """
+    try:
+        cipher = _new_cipher()
+        text_mode = isinstance(fout, io.TextIOBase)
+        out = bytearray(CHUNK_SIZE)
+        total = len(data)
+        done = 0
+        written = 0
+        carry = b""
+
+        laps = tracing.laps("encrypt")
+
+        def emit(block):
+            nonlocal written, done
+            n = len(block)
+            view = memoryview(out)[:n]
+            cipher.encrypt(block, output=view)
+            laps.lap("aes")
+            encoded = binascii.b2a_base64(view, newline=False)
+            laps.lap("base64")
+            fout.write(encoded.decode('ascii') if text_mode else encoded)
+            laps.lap("write")
+            written += len(encoded)
+            if progress:
+                done = min(total, done + n)
+                progress(done, total)
+
+        for chunk in _iter_plain_chunks(data):
+            if carry:
+                chunk = carry + bytes(chunk)
+            cut = len(chunk) - len(chunk) % CHUNK_SIZE
+            for i in range(0, cut, CHUNK_SIZE):
+                emit(chunk[i:i + CHUNK_SIZE])
+            carry = bytes(chunk[cut:])
+        n = BLOCK_SIZE - len(carry) % BLOCK_SIZE
+        emit(carry + bytes([n]) * n)
+        laps.close()
+        return written
+    except Exception as e:
+        raise Exception(f"Encryption failed: {str(e)}")
+
+
+def write_sav(path, data, progress=None):
+    """
+    Encrypt plaintext into the .sav file at path without ever leaving a
+    truncated file behind: the ciphertext goes to path + ".tmp", is flushed
+    and fsynced, then renamed over path.
+    """
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "wb") as f:
+            encrypt_stream(data, f, progress)
+            with tracing.span("fsync"):
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    if hasattr(os, "O_DIRECTORY"):
+        # Persist the rename itself (POSIX only)
+        try:
+            fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+
+def decrypt_sav(content):
+    """Decrypt base64 .sav content (str or bytes) and return the JSON text."""
+    plain = decrypt_stream(content)
+    try:
+        return plain.decode('utf-8')
+    except Exception as e:
+        raise Exception(f"Decryption failed: {str(e)}")
+
+
+def encrypt_sav(json_text):
+    """Encrypt JSON text and return the base64 .sav content as a str."""
+    out = io.StringIO()
+    encrypt_stream(json_text, out)
+    return out.getvalue()
+
+
+# Quick standalone benchmark: streaming codec vs. the original whole-buffer path.
+if __name__ == "__main__":
+    import sys
+    import json
+    import time
+    import base64
+    import tracemalloc
+    from Crypto.Cipher import AES
+    from Crypto.Util.Padding import pad, unpad
+
+    def legacy_decrypt(content):
+        cipher_data = base64.b64decode(content)
+        plain = AES.new(key, AES.MODE_CBC, iv).decrypt(cipher_data)
+        try:
+            plain = unpad(plain, AES.block_size)
+        except ValueError:
+            pass
+        return plain.decode('utf-8')
+
+    def legacy_encrypt(json_text):
+        padded = pad(json_text.encode('utf-8'), AES.block_size)
+        encrypted = AES.new(key, AES.MODE_CBC, iv).encrypt(padded)
+        return base64.b64encode(encrypted).decode('utf-8')
+
+    def measure(label, func, size):
+        # Time an untraced run; tracemalloc slows allocation-heavy code noticeably.
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        del result
+        tracemalloc.start()
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{label:<28} {elapsed * 1000:9.1f} ms  {size / elapsed / 2**20:8.1f} MB/s  "
+              f"peak {peak / 2**20:8.1f} MB")
+        return result
+
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 20
+    dwellers = [{"serializeId": i, "name": f"Dweller{i}", "lastName": "Test",
+                 "stats": {"stats": [{"value": i % 10} for _ in range(7)]}}
+                for i in range(int(megabytes * 2**20 / 150))]
+    json_text = json.dumps({"dwellers": {"dwellers": dwellers}}, separators=(',', ':'))
+    del dwellers
+    size = len(json_text)
+    print(f"Plaintext: {size / 2**20:.1f} MB")
+
+    sav = measure("encrypt (legacy)", lambda: legacy_encrypt(json_text), size)
+    measure("encrypt_sav (stream)", lambda: encrypt_sav(json_text), size)
+    measure("encrypt_stream -> file", lambda: encrypt_stream(json_text, io.BytesIO()), size)
+    measure("decrypt (legacy)", lambda: legacy_decrypt(sav), size)
+    measure("decrypt_sav (stream)", lambda: decrypt_sav(sav), size)
+    measure("decrypt_stream <- file", lambda: decrypt_stream(io.BytesIO(sav.encode('ascii'))), size)
+    assert decrypt_sav(sav) == json_text and encrypt_sav(json_text) == sav
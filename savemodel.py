@@ -0,0 +1,445 @@
+# savemodel.py
+"""
+Lazy, section-on-demand model of a decoded save.
+
+Opening a save only indexes the top-level sections ("vault", "dwellers",
+"survivalW", ...) by byte offset in the decrypted JSON. A section is parsed
+into Python objects the first time it is accessed; sections that were never
+touched are written back byte-for-byte on save.
+
+Parsed sections count as unchanged until mark_dirty() is called for them,
+so code that edits a section in place must report it. Clean sections are
+written from their original (or last saved) bytes. The dweller list keeps
+one cached encoding per dweller, so after mark_dirty("dwellers", d) only d
+is re-encoded. Code that adds, removes or reorders dwellers must mark the
+whole section (no item argument).
+
+SaveModel behaves like a dict, so existing code such as
+save_data.get("vault", {}) or "dwellers" in save_data keeps working.
+This module does not import Qt.
+"""
+import re
+import sys
+import json
+from collections.abc import MutableMapping
+
+import tracing
+
+# Possessive quantifiers need Python 3.11; older versions use the plain
+# string pattern and find section ends with the token scan only.
+_POSSESSIVE = sys.version_info >= (3, 11)
+if _POSSESSIVE:
+    _STRING = rb'"[^"\\]*+(?:\\.[^"\\]*+)*+"'
+else:
+    _STRING = rb'"[^"\\]*(?:\\.[^"\\]*)*"'
+_MAX_DEPTH = 32
+
+
+def _nested_pattern(depth):
+    """
+    Regex matching one JSON object/array nested at most `depth` levels deep.
+    Possessive quantifiers keep the engine from backtracking, so a whole
+    section is skipped in a single C-level match without building objects.
+    """
+    inner = rb'(?:[^"{}\[\]]++|' + _STRING + rb')*+'
+    for _ in range(depth):
+        group = rb'[{\[]' + inner + rb'[}\]]'
+        inner = rb'(?:[^"{}\[\]]++|' + _STRING + rb'|' + group + rb')*+'
+    return re.compile(group)
+
+
+_CONTAINER = _nested_pattern(_MAX_DEPTH) if _POSSESSIVE else None
+_KEY = re.compile(rb'\s*(' + _STRING + rb')\s*:\s*')
+_STRING_VALUE = re.compile(_STRING)
+_SCALAR = re.compile(rb'[^,}\]\s]+')
+_SEPARATOR = re.compile(rb'\s*([,}])')
+_OBJECT_START = re.compile(rb'\s*{\s*')
+_ARRAY_START = re.compile(rb'\s*\[\s*')
+_ITEM_SEPARATOR = re.compile(rb'\s*([,\]])\s*')
+# Fallback tokenizer for sections nested deeper than _MAX_DEPTH (or for all
+# sections before Python 3.11).
+_TOKEN = re.compile(_STRING + rb'|[{}\[\]]')
+
+
+def _container_end(raw, start):
+    m = _CONTAINER.match(raw, start) if _CONTAINER is not None else None
+    if m:
+        return m.end()
+    depth = 0
+    for m in _TOKEN.finditer(raw, start):
+        c = raw[m.start()]
+        if c in b'{[':
+            depth += 1
+        elif c in b'}]':
+            depth -= 1
+            if depth == 0:
+                return m.end()
+    raise ValueError(f"Unterminated value at offset {start}")
+
+
+def _value_end(raw, start):
+    first = raw[start:start + 1]
+    if first in (b"{", b"["):
+        return _container_end(raw, start)
+    m = (_STRING_VALUE if first == b'"' else _SCALAR).match(raw, start)
+    return m.end() if m else None
+
+
+def index_items(raw, start=0):
+    """
+    Return [(start, end)] byte spans of the elements of the JSON array that
+    begins at offset start of raw. Raises ValueError for malformed input.
+    """
+    m = _ARRAY_START.match(raw, start)
+    if not m:
+        raise ValueError(f"Expected an array at offset {start}")
+    pos = m.end()
+    spans = []
+    if raw[pos:pos + 1] == b"]":
+        return spans
+    while True:
+        end = _value_end(raw, pos)
+        if end is None:
+            raise ValueError(f"Missing array element at offset {pos}")
+        spans.append((pos, end))
+        m = _ITEM_SEPARATOR.match(raw, end)
+        if not m:
+            raise ValueError(f"Expected ',' or ']' at offset {end}")
+        if m.group(1) == b"]":
+            return spans
+        pos = m.end()
+
+
+def _member_start(raw, wanted):
+    """Offset where the value of top-level key wanted starts, or None."""
+    m = _OBJECT_START.match(raw)
+    pos = m.end() if m else 0
+    while True:
+        m = _KEY.match(raw, pos)
+        if not m:
+            return None
+        if json.loads(m.group(1)) == wanted:
+            return m.end()
+        end = _value_end(raw, m.end())
+        m = _SEPARATOR.match(raw, end) if end is not None else None
+        if not m or m.group(1) == b"}":
+            return None
+        pos = m.end()
+
+
+def _dumps(value):
+    return json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+
+def index_sections(raw):
+    """
+    Return {key: (start, end)} byte spans of each top-level value in the JSON
+    object held in raw (bytes-like). Raises ValueError for malformed input.
+    """
+    spans = {}
+    m = _OBJECT_START.match(raw)
+    if not m:
+        raise ValueError("Save data is not a JSON object")
+    pos = m.end()
+    if raw[pos:pos + 1] == b"}":
+        return spans
+    while True:
+        m = _KEY.match(raw, pos)
+        if not m:
+            raise ValueError(f"Expected a key at offset {pos}")
+        key = json.loads(m.group(1))
+        start = m.end()
+        end = _value_end(raw, start)
+        if end is None:
+            raise ValueError(f"Missing value for key {key!r}")
+        spans[key] = (start, end)
+        m = _SEPARATOR.match(raw, end)
+        if not m:
+            raise ValueError(f"Expected ',' or '}}' at offset {end}")
+        if m.group(1) == b"}":
+            return spans
+        pos = m.end()
+
+
+def same_bytes(a, b):
+    """a == b for bytes or memoryviews (memoryview == compares item by item, far slower)."""
+    return len(a) == len(b) and bytes(a) == bytes(b)
+
+
+def update_changed(target, values):
+    """Copy values into the dict target, skipping equal ones; True if anything changed."""
+    changed = False
+    for k, v in values.items():
+        if k not in target or target[k] != v:
+            target[k] = v
+            changed = True
+    return changed
+
+
+class SaveModel(MutableMapping):
+    """Dict-like view of a save whose top-level sections are parsed on first access."""
+
+    # section -> key of the list inside it that is cached item by item
+    ITEM_LISTS = {"dwellers": "dwellers"}
+
+    def __init__(self, raw=b"{}", spans=None):
+        """spans: the section offsets from an earlier spans() of the same bytes, to skip indexing."""
+        if isinstance(raw, str):
+            raw = raw.encode('utf-8')
+        self._raw = raw
+        if spans is not None:
+            self._spans = dict(spans)
+        else:
+            with tracing.span("index"):
+                self._spans = index_sections(raw)
+        self._keys = list(self._spans)
+        self._values = {}
+        self._dirty = {}  # key -> True (whole section) or set of id(item) in its item list
+        self._cache = {}  # key -> bytes of the last encoding (current while the section is clean)
+        self._items = {}  # key -> {id(item): (item, bytes)}
+        self._versions = {}  # key -> number of changes to the section (see version())
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a fully parsed model from an ordinary dict."""
+        model = cls()
+        for k, v in data.items():
+            model[k] = v
+        return model
+
+    # ----- Mapping interface -----
+    def __getitem__(self, key):
+        try:
+            return self._values[key]
+        except KeyError:
+            pass
+        start, end = self._spans[key]
+        with tracing.span("parse." + key):
+            value = json.loads(self._raw[start:end])
+        self._values[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        if key not in self._spans and key not in self._values:
+            self._keys.append(key)
+        self._values[key] = value
+        self._dirty[key] = True
+        self._items.pop(key, None)
+        self._touch(key)
+
+    def __delitem__(self, key):
+        if key not in self._spans and key not in self._values:
+            raise KeyError(key)
+        self._spans.pop(key, None)
+        self._values.pop(key, None)
+        self._dirty.pop(key, None)
+        self._cache.pop(key, None)
+        self._items.pop(key, None)
+        self._keys.remove(key)
+        self._touch(key)
+
+    def __contains__(self, key):
+        return key in self._values or key in self._spans
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __repr__(self):
+        return f"<SaveModel sections={self._keys} loaded={self.loaded_sections()}>"
+
+    # ----- Section state -----
+    def is_loaded(self, key):
+        """True once the section has been parsed (or assigned)."""
+        return key in self._values
+
+    def loaded_sections(self):
+        return [k for k in self._keys if k in self._values]
+
+    def spans(self):
+        """{section: (start, end)} byte offsets of the original sections."""
+        return dict(self._spans)
+
+    def memory_size(self, parsed_factor=6):
+        """
+        Rough bytes held: the decrypted save plus parsed_factor times the
+        size of each parsed section (Python objects are that much bigger).
+        """
+        size = len(self._raw)
+        for key in self._values:
+            span = self._spans.get(key)
+            size += parsed_factor * (span[1] - span[0] if span else len(self._cache.get(key, b"")))
+        return size
+
+    def raw_section(self, key):
+        """The original bytes of a section, or None if it was assigned after loading."""
+        span = self._spans.get(key)
+        return bytes(self._raw[span[0]:span[1]]) if span else None
+
+    def clean_bytes(self, key):
+        """The section's current bytes if known without encoding (it is clean), else None."""
+        if key in self._dirty:
+            return None
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        span = self._spans.get(key)
+        return memoryview(self._raw)[span[0]:span[1]] if span else None
+
+    def base_bytes(self, key):
+        """
+        The section's bytes as loaded or as last serialized, even if it was
+        edited since; None for sections that were assigned and never serialized.
+        """
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        span = self._spans.get(key)
+        return memoryview(self._raw)[span[0]:span[1]] if span else None
+
+    def replace_section(self, key, value, raw):
+        """Put a section read from elsewhere (raw, parsed into value); it counts as clean."""
+        if key not in self._spans and key not in self._values:
+            self._keys.append(key)
+        self._values[key] = value
+        self._dirty.pop(key, None)
+        self._cache[key] = bytes(raw)
+        self._items.pop(key, None)
+        self._touch(key)
+
+    def rebase(self, key, raw):
+        """Make raw the base_bytes() of an edited section, keeping the edits."""
+        self._cache[key] = bytes(raw)
+        self._items.pop(key, None)
+        self._dirty[key] = True
+
+    def to_dict(self):
+        """Parse every section and return a plain dict."""
+        return {k: self[k] for k in self._keys}
+
+    # ----- Change tracking -----
+    def mark_dirty(self, key, item=None):
+        """
+        Record an in-place edit of a parsed section. For sections in
+        ITEM_LISTS, item names the one list element that changed.
+        """
+        if key not in self._values:
+            return  # never parsed, so nothing can have changed it
+        self._touch(key)
+        dirty = self._dirty.get(key)
+        if item is None or key not in self.ITEM_LISTS:
+            self._dirty[key] = True
+        elif dirty is not True:
+            if dirty is None:
+                dirty = self._dirty[key] = set()
+            dirty.add(id(item))
+
+    def mark_path_dirty(self, path):
+        """mark_dirty() for the value at path (a list of keys and indices)."""
+        if not path:
+            return
+        key = path[0]
+        list_key = self.ITEM_LISTS.get(key)
+        if list_key is not None and len(path) > 2 and path[1] == list_key and key in self._values:
+            try:
+                self.mark_dirty(key, self._values[key][list_key][path[2]])
+                return
+            except (KeyError, IndexError, TypeError):
+                pass
+        self.mark_dirty(key)
+
+    def version(self, key):
+        """
+        A number that changes whenever the section is assigned, replaced or
+        marked dirty, so results computed from it can be reused until then.
+        """
+        return self._versions.get(key, 0)
+
+    def _touch(self, key):
+        self._versions[key] = self._versions.get(key, 0) + 1
+
+    def is_dirty(self, key):
+        return key in self._dirty
+
+    def dirty_sections(self):
+        return [k for k in self._keys if k in self._dirty]
+
+    # ----- Serialization -----
+    def section_bytes(self, key):
+        """Compact JSON for one section: verbatim or cached if clean, re-encoded if dirty."""
+        if key not in self._values:
+            start, end = self._spans[key]
+            return self._raw[start:end]
+        # Take the dirty mark before encoding; an edit made meanwhile marks it again.
+        dirty = self._dirty.pop(key, None)
+        if dirty is None:
+            cached = self._cache.get(key)
+            if cached is not None:
+                return cached
+            span = self._spans.get(key)
+            if span is not None:
+                return self._raw[span[0]:span[1]]
+            dirty = True
+        with tracing.span("serialize." + key):
+            data = self._encode(key, dirty)
+        self._cache[key] = data
+        return data
+
+    def _encode(self, key, dirty):
+        value = self._values[key]
+        list_key = self.ITEM_LISTS.get(key)
+        if list_key is None or not isinstance(value, dict) or not isinstance(value.get(list_key), list):
+            return _dumps(value)
+        items = value[list_key]
+        cache = self._item_cache(key, items) if dirty is not True else {}
+        stale = dirty if dirty is not True else ()
+        encoded = []
+        fresh = {}
+        for item in items:
+            i = id(item)
+            entry = cache.get(i)
+            if entry is None or entry[0] is not item or i in stale:
+                entry = (item, _dumps(item))
+            fresh[i] = entry
+            encoded.append(entry[1])
+        self._items[key] = fresh
+        parts = []
+        for k, v in value.items():
+            body = b"[" + b",".join(encoded) + b"]" if k == list_key else _dumps(v)
+            parts.append(json.dumps(k).encode('utf-8') + b":" + body)
+        return b"{" + b",".join(parts) + b"}"
+
+    def _item_cache(self, key, items):
+        """Cached item encodings; the first time, the original bytes of each item."""
+        cache = self._items.get(key)
+        if cache is not None:
+            return cache
+        raw = self.base_bytes(key)
+        if raw is None:
+            return {}
+        raw = bytes(raw)
+        start = _member_start(raw, self.ITEM_LISTS[key])
+        try:
+            spans = index_items(raw, start) if start is not None else []
+        except ValueError:
+            return {}
+        # Items are matched by position, which holds until the list is
+        # restructured (and then the whole section is marked dirty).
+        if len(spans) != len(items):
+            return {}
+        return {id(item): (item, raw[s:e]) for item, (s, e) in zip(items, spans)}
+
+    def dumps(self):
+        """Serialize the whole save as compact JSON bytes."""
+        with tracing.span("serialize"):
+            parts = [b"{"]
+            for i, k in enumerate(self._keys):
+                if i:
+                    parts.append(b",")
+                parts.append(json.dumps(k).encode('utf-8'))
+                parts.append(b":")
+                parts.append(self.section_bytes(k))
+            parts.append(b"}")
+            return b"".join(parts)
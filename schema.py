@@ -0,0 +1,269 @@
+# schema.py
+"""
+Typed views over the dicts of a decoded save.
+
+A view wraps one dict from the save (the vault, a dweller, a room, a
+wasteland team, a resources dict) and exposes its fields as attributes:
+
+    d = Dweller(dweller_dict)
+    d.level                       # int; 1 if experience.currentLevel is missing
+    d.level = 12                  # missing parent dicts are created
+    d.update(level=12, health=50) # True if a value changed
+
+Each Field is compiled into a reader function when the view class is
+created, so a read indexes the dicts directly instead of going through
+chains of .get(key, {}) that allocate an empty dict per missing level.
+Reads convert the value to the field's type; a missing, null or
+unconvertible value reads as the default. update() only writes values
+that differ from what the field reads, so showing a value in a tab and
+writing it back is not an edit.
+
+Views have __slots__ and hold nothing but the dict, so a view per row is
+cheap; Field.read(d) reads a dict without making one. This module does
+not import Qt.
+"""
+from types import MappingProxyType
+
+_LOOKUP_ERRORS = (KeyError, IndexError, TypeError)
+
+
+def _compile_reader(path, type, default):
+    """
+    A function d -> the value at path, converted to type (None: as stored),
+    or default if it is missing, null or does not convert.
+    """
+    namespace = {f"k{i}": key for i, key in enumerate(path)}
+    namespace.update(T=type, default=default, LOOKUP_ERRORS=_LOOKUP_ERRORS)
+    lines = [
+        "def read(d):",
+        "    try:",
+        "        value = d" + "".join(f"[k{i}]" for i in range(len(path))),
+        "    except LOOKUP_ERRORS:",
+        "        return default",
+        "    if value is None:",
+        "        return default",
+    ]
+    if type is not None:
+        lines += [
+            "    if value.__class__ is not T:",
+            "        try:",
+            "            return T(value)",
+            "        except (TypeError, ValueError):",
+            "            return default",
+        ]
+    lines.append("    return value")
+    exec("\n".join(lines) + "\n", namespace)
+    return namespace["read"]
+
+
+def child(node, *keys):
+    """node[keys[0]][keys[1]]..., creating missing (or null) dicts on the way."""
+    for key in keys:
+        value = node[key] if isinstance(node, list) else node.get(key)
+        if value is None:
+            value = node[key] = {}
+        node = value
+    return node
+
+
+class Field:
+    """
+    One value at a fixed path below a view's dict. type converts what is
+    read (None: no conversion); store, if given, converts what is written.
+    """
+    __slots__ = ("name", "path", "type", "default", "store", "read")
+
+    def __init__(self, *path, type=int, default=0, store=None):
+        # Fields are shared by every view of their class: read-only once built
+        init = object.__setattr__
+        init(self, "name", None)
+        init(self, "path", path)
+        init(self, "type", type)
+        init(self, "default", default)
+        init(self, "store", store)
+        # read(d): the value below the dict d (a plain function, not a method)
+        init(self, "read", _compile_reader(path, type, default))
+
+    def __set_name__(self, owner, name):
+        object.__setattr__(self, "name", name)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Field attribute '{name}' is read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"Field attribute '{name}' is read-only")
+
+    def write(self, d, value):
+        if self.store is not None:
+            value = self.store(value)
+        child(d, *self.path[:-1])[self.path[-1]] = value
+
+    def __get__(self, view, owner):
+        if view is None:
+            return self
+        return self.read(view.data)
+
+    def __set__(self, view, value):
+        self.write(view.data, value)
+
+
+class View:
+    """Base of the views; FIELDS maps attribute names to their Field (read-only)."""
+    __slots__ = ("data",)
+    FIELDS = MappingProxyType({})
+
+    def __init__(self, data):
+        self.data = data
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        fields = {}
+        for klass in reversed(cls.__mro__):
+            fields.update((k, v) for k, v in vars(klass).items() if isinstance(v, Field))
+        cls.FIELDS = MappingProxyType(fields)
+
+    def update(self, **values):
+        """Write the values that differ from what their field reads; True if any did."""
+        changed = False
+        data = self.data
+        for name, value in values.items():
+            field = self.FIELDS[name]
+            if field.read(data) != value:
+                field.write(data, value)
+                changed = True
+        return changed
+
+    def values(self, *names):
+        data = self.data
+        return {name: self.FIELDS[name].read(data) for name in names or self.FIELDS}
+
+
+class Resources(View):
+    """A storage's resources dict (the vault's or a team's)."""
+    __slots__ = ()
+    caps = Field("Nuka")
+    quantum = Field("NukaColaQuantum")
+    food = Field("Food")
+    energy = Field("Energy")
+    water = Field("Water")
+    stimpacks = Field("StimPack")
+    radaway = Field("RadAway")
+
+
+class Vault(View):
+    """data["vault"]."""
+    __slots__ = ()
+    number = Field("VaultName", store=lambda n: str(n).zfill(3))  # "042" in the save
+    mode = Field("VaultMode", type=str, default="Normal")
+    theme = Field("VaultTheme")
+    xp = Field("XP")
+    population = Field("population")
+    happiness = Field("happiness")
+    score = Field("score")
+    lunchboxes = Field("LunchBoxesByType", type=list, default=())
+    lunchbox_count = Field("LunchBoxesCount")
+    rooms = Field("rooms", type=list, default=())
+    teams = Field("wasteland", "teams", type=list, default=())
+
+    def resources(self, create=False):
+        """
+        Resources view of storage.resources. With create, missing dicts are
+        added to the save; otherwise a missing one reads as empty.
+        """
+        if create:
+            return Resources(child(self.data, "storage", "resources"))
+        return Resources(_dict(_VAULT_RESOURCES.read(self.data)))
+
+
+def _dict(value):
+    return value if isinstance(value, dict) else {}
+
+
+_VAULT_RESOURCES = Field("storage", "resources", type=None, default=None)
+
+
+class Dweller(View):
+    """One dict of data["dwellers"]["dwellers"]."""
+    __slots__ = ()
+    first_name = Field("name", type=str, default="")
+    last_name = Field("lastName", type=str, default="")
+    gender = Field("gender", default=2)
+    happiness = Field("happiness", "happinessValue")
+    health = Field("health", "healthValue")
+    max_health = Field("health", "maxHealth")
+    radiation = Field("health", "radiationValue")
+    level = Field("experience", "currentLevel", default=1)
+    xp = Field("experience", "currentXP")
+    skin_color = Field("skinColor", type=str, default="")
+    hair_color = Field("hairColor", type=str, default="")
+    pregnant = Field("pregnant", type=bool, default=False)
+    baby_ready = Field("babyReady", type=bool, default=False)
+    outfit = Field("equipedOutfit", "id", type=str, default="")
+    weapon = Field("equipedWeapon", "id", type=str, default="")
+    strength = Field("stats", "stats", 0, "value")
+    perception = Field("stats", "stats", 1, "value")
+    endurance = Field("stats", "stats", 2, "value")
+    charisma = Field("stats", "stats", 3, "value")
+    intelligence = Field("stats", "stats", 4, "value")
+    agility = Field("stats", "stats", 5, "value")
+    luck = Field("stats", "stats", 6, "value")
+    stats = Field("stats", "stats", type=list, default=())
+    SPECIAL = ("strength", "perception", "endurance", "charisma", "intelligence", "agility", "luck")
+
+    @property
+    def full_name(self):
+        return f"{self.first_name} {self.last_name}".strip()
+
+
+class Room(View):
+    """One dict of data["vault"]["rooms"]."""
+    __slots__ = ()
+    kind = Field("RoomType", type=str, default="")
+    state = Field("currentStateName", type=str, default="")
+    progress = Field("progress")
+    level = Field("level", default=1)
+    merge_level = Field("mergeLevel", default=1)
+    row = Field("row")
+    col = Field("col")
+    dwellers = Field("dwellers", type=list, default=())
+
+
+class Team(View):
+    """One dict of data["vault"]["wasteland"]["teams"]: a dweller team or an actor team."""
+    __slots__ = ()
+    index = Field("teamIndex", default=None)
+    status = Field("status", type=str, default="")
+    time_spent = Field("elapsedTimeAliveExploring")
+    return_duration = Field("returnTripDuration")
+
+    @property
+    def is_actor(self):
+        return "actor" in self.data
+
+    @property
+    def name(self):
+        return (_ACTOR_NAME if self.is_actor else _DWELLER_NAME).read(self.data)
+
+    @property
+    def storage_path(self):
+        return ("actor", "equipment", "storage") if self.is_actor else ("teamEquipment", "storage")
+
+    def storage(self):
+        """The team's storage dict, or None if it has none."""
+        storage = (_ACTOR_STORAGE if self.is_actor else _TEAM_STORAGE).read(self.data)
+        return storage if isinstance(storage, dict) else None
+
+    def resources(self, create=False):
+        """Resources view of the storage, as Vault.resources(); a team without storage reads as empty."""
+        storage = self.storage()
+        if storage is None:
+            return Resources({})
+        if create:
+            return Resources(child(storage, "resources"))
+        return Resources(_dict(storage.get("resources")))
+
+
+_ACTOR_NAME = Field("actor", "name", type=str, default="Unnamed")
+_DWELLER_NAME = Field("dweller", "name", type=str, default="Unnamed")
+_ACTOR_STORAGE = Field("actor", "equipment", "storage", type=None, default=None)
+_TEAM_STORAGE = Field("teamEquipment", "storage", type=None, default=None)
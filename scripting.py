@@ -0,0 +1,265 @@
+# scripting.py
+"""
+Python scripts for batch edits of the open save.
+
+A script runs against copies of the save's "vault" and "dwellers"
+sections, through the schema.py views:
+
+    for d in dwellers:                    # progress is reported as it goes
+        if d.level < 10 and not d.pregnant:
+            d.update(endurance=10, happiness=100)
+    resources.caps += 5000
+    for room in rooms:
+        if room.state == "Fire":
+            room.state = "Idle"
+    print(len(teams), "teams out")
+
+Names a script can use:
+
+    vault                  schema.Vault of the vault section
+    resources              schema.Resources of the vault storage
+    dwellers, rooms, teams lists of schema.Dweller / Room / Team views
+    data                   {"vault": ..., "dwellers": ...}, the copied sections
+    run_action(name)       an actions.ACTIONS entry that edits only those sections
+    progress(done, total)  report progress of a loop of the script's own
+    print(...)             output for the console
+    and the plain builtins (len, range, sorted, min, max, sum, ...).
+
+A script can only reach the copied sections, never the live model:
+imports, names starting with "__", attributes starting with "_", the
+frame / generator / traceback attributes (gi_frame, f_globals, f_back,
+tb_frame, ...), str.format / format_map (which look attributes up
+themselves; f-strings are checked like any other code) and assignments
+to attributes other than view fields are refused when the script is
+compiled. Only the builtins above exist (no open, getattr, eval, exec or
+format), the objects the script is given keep the runner in private
+slots or closures, and the views' FIELDS and Field objects are
+read-only, so a script cannot change how other code reads a save.
+
+ScriptRunner.run() runs one or more scripts in order and returns the
+history.Replace ops that take the live sections to the scripts' result
+(history.diff of the copies). Nothing touches the live model until the
+caller applies those ops, so a run that fails or is cancelled leaves the
+save as it was, and a run that succeeds is one undo entry. The runner
+records the seconds each script took. This module does not import Qt.
+"""
+import ast
+import sys
+import time
+import builtins
+import threading
+import traceback
+
+import actions
+import history
+import tracing
+from schema import Vault, Resources, Dweller, Room, Team
+
+# Sections scripts can edit
+SECTIONS = ("vault", "dwellers")
+# Attributes that lead from a generator, coroutine, frame or traceback back to the interpreter
+FRAME_ATTRIBUTES = {
+    "gi_frame", "gi_code", "gi_yieldfrom", "cr_frame", "cr_code", "cr_await", "cr_origin",
+    "ag_frame", "ag_code", "ag_await", "f_back", "f_globals", "f_locals", "f_builtins", "f_code",
+    "f_trace", "tb_frame", "tb_next", "with_traceback"}
+# str.format / format_map look attributes up themselves, past the "_" check
+FORMAT_ATTRIBUTES = {"format", "format_map"}
+# The only attributes a script may assign: the fields of the views it is given
+WRITABLE_ATTRIBUTES = frozenset().union(*(view.FIELDS for view in (Vault, Resources, Dweller, Room, Team)))
+SAFE_BUILTINS = {name: getattr(builtins, name) for name in (
+    "abs", "all", "any", "bool", "dict", "divmod", "enumerate", "filter", "float", "int",
+    "isinstance", "len", "list", "map", "max", "min", "range", "repr", "reversed", "round", "set",
+    "sorted", "str", "sum", "tuple", "zip",
+    "Exception", "ValueError", "KeyError", "IndexError", "TypeError")}
+
+
+class ScriptError(Exception):
+    """A script did not compile, or raised; the message says where."""
+
+
+class ScriptCancelled(ScriptError):
+    pass
+
+
+def compile_script(source, name="<script>"):
+    """
+    Compile source, refusing imports, private and frame attributes and
+    stores to anything but view fields; raises ScriptError.
+    """
+    try:
+        tree = ast.parse(source, name)
+    except SyntaxError as e:
+        raise ScriptError(f"{name}, line {e.lineno}: {e.msg}")
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            raise ScriptError(f"{name}, line {node.lineno}: scripts cannot import modules")
+        if isinstance(node, ast.Attribute):
+            refused = (node.attr.startswith("_") or node.attr in FRAME_ATTRIBUTES
+                       or node.attr in FORMAT_ATTRIBUTES)
+            if not refused and not isinstance(node.ctx, ast.Load) and node.attr not in WRITABLE_ATTRIBUTES:
+                raise ScriptError(f"{name}, line {node.lineno}: scripts can only assign view fields, "
+                                  f"not '{node.attr}'")
+            ident = node.attr
+        elif isinstance(node, ast.Name):
+            refused = node.id.startswith("__")
+            ident = node.id
+        else:
+            continue
+        if refused:
+            raise ScriptError(f"{name}, line {node.lineno}: '{ident}' is not available to scripts")
+    return compile(tree, name, "exec")
+
+
+class ViewList:
+    """
+    Views over a list of dicts; iterating calls progress(done, total), which
+    stops a cancelled run. Private slots: scripts cannot reach the runner.
+    """
+    __slots__ = ("_progress", "_items", "_view")
+
+    def __init__(self, progress, items, view):
+        self._progress = progress
+        self._items = items
+        self._view = view
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._view(item) for item in self._items[index]]
+        return self._view(self._items[index])
+
+    def __iter__(self):
+        total = len(self._items)
+        for i, item in enumerate(self._items):
+            self._progress(i, total)
+            yield self._view(item)
+        self._progress(total, total)
+
+
+class ScriptRunner:
+    """
+    Runs scripts against copies of model's SECTIONS. progress(percent, name)
+    and output(text) are called from the thread that runs the scripts.
+    """
+
+    def __init__(self, model, progress=None, output=None):
+        self.model = model
+        self.on_progress = progress
+        self.on_output = output
+        self.timings = []  # (script name, seconds), in the order they ran
+        self.phases = {}   # "copy" / "compare" -> seconds
+        self._cancel = threading.Event()
+        self._names = set()
+        self._current = None
+        self._percent = -1
+
+    def cancel(self):
+        """Stop the run at the script's next line; run() then raises ScriptCancelled."""
+        self._cancel.set()
+
+    def run(self, scripts):
+        """
+        Run (name, source) scripts one after another and return the ops
+        that apply their edits to the model. The model itself is not changed.
+        """
+        codes = [(name, compile_script(source, name)) for name, source in scripts]
+        self._names = {name for name, _ in codes}
+        start = time.perf_counter()
+        live = {key: self.model[key] for key in SECTIONS if key in self.model}
+        copies = {key: history.snapshot(value) for key, value in live.items()}
+        self.phases["copy"] = time.perf_counter() - start
+        for name, code in codes:
+            self._current, self._percent = name, -1
+            start = time.perf_counter()
+            with tracing.span("script." + name):
+                self._exec(name, code, copies)
+            self.timings.append((name, time.perf_counter() - start))
+        start = time.perf_counter()
+        ops = []
+        for key, value in live.items():
+            ops += history.diff(value, copies[key], (key,))
+        self.phases["compare"] = time.perf_counter() - start
+        return ops
+
+    def namespace(self, copies):
+        vault = copies.get("vault", {})
+        section = copies.get("dwellers")
+        dwellers = section.get("dwellers") if isinstance(section, dict) else None
+        view = Vault(vault)
+        # Plain functions, not bound methods, so no attribute leads back to self
+        def progress(done, total):
+            self.progress(done, total)
+
+        def print(*args, sep=" ", end="\n"):
+            self.print(*args, sep=sep, end=end)
+
+        def run_action(name):
+            return self.run_action(copies, name)
+
+        return {
+            "__builtins__": dict(SAFE_BUILTINS, print=print),
+            "data": copies,
+            "vault": view,
+            "resources": view.resources(),
+            "dwellers": ViewList(progress, dwellers if isinstance(dwellers, list) else (), Dweller),
+            "rooms": ViewList(progress, view.rooms, Room),
+            "teams": ViewList(progress, view.teams, Team),
+            "run_action": run_action,
+            "progress": progress,
+        }
+
+    def _exec(self, name, code, copies):
+        namespace = self.namespace(copies)
+        previous = sys.gettrace()
+        sys.settrace(self._trace)
+        try:
+            exec(code, namespace)
+        except ScriptCancelled:
+            raise
+        except Exception as e:
+            lines = [f.lineno for f in traceback.extract_tb(e.__traceback__) if f.filename in self._names]
+            where = f"{name}, line {lines[-1]}" if lines else name
+            message = str(e) if isinstance(e, ScriptError) else f"{type(e).__name__}: {e}"
+            raise ScriptError(f"{where}: {message}") from e
+        finally:
+            sys.settrace(previous)
+
+    # Line tracing of the script's own frames only, to notice cancel() in any loop
+    def _trace(self, frame, event, arg):
+        return self._trace_line if frame.f_code.co_filename in self._names else None
+
+    def _trace_line(self, frame, event, arg):
+        if self._cancel.is_set():
+            raise ScriptCancelled("Script cancelled")
+        return self._trace_line
+
+    # ----- Script API -----
+    def progress(self, done, total):
+        if self._cancel.is_set():
+            raise ScriptCancelled("Script cancelled")
+        percent = done * 100 // total if total else 100
+        if percent != self._percent:
+            self._percent = percent
+            if self.on_progress is not None:
+                self.on_progress(percent, self._current)
+
+    def print(self, *args, sep=" ", end="\n"):
+        if self.on_output is not None:
+            self.on_output(sep.join(str(a) for a in args) + end)
+
+    def run_action(self, copies, name):
+        action = actions.ACTIONS.get(name)
+        if action is None:
+            raise ScriptError(f"Unknown action '{name}' (see cli.py actions)")
+        if not set(actions.SECTIONS[action]) <= set(copies):
+            raise ScriptError(f"Action '{name}' edits {', '.join(actions.SECTIONS[action])}, "
+                              "which scripts cannot change")
+        return bool(action(copies))
+
+    def report(self):
+        """Timing lines for the console: each script, then the copy and compare phases."""
+        lines = [f"{name}: {seconds * 1000:.1f} ms" for name, seconds in self.timings]
+        lines += [f"({phase}: {seconds * 1000:.1f} ms)" for phase, seconds in self.phases.items()]
+        return lines
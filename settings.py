@@ -1,5 +1,7 @@
 import os
+import copy
 import json
+from contextlib import contextmanager
 from PyQt5 import QtWidgets, QtCore
 
 def get_settings_path():
@@ -17,8 +19,29 @@ def get_settings_path():
         os.makedirs(settings_dir)
     return os.path.join(settings_dir, "settings.json")
 
-class Settings:
-    def __init__(self):
+class Settings(QtCore.QObject):
+    """
+    Application settings backed by settings.json.
+
+    Use Settings.instance() to get the shared service. Changes are written
+    to disk after SAVE_DELAY_MS of quiet (or on flush()), through a temp
+    file and a rename, and changed(key, value) is emitted once per key
+    whose value actually changed. Group several updates in transaction()
+    to get a single write.
+    """
+    SAVE_DELAY_MS = 500
+    changed = QtCore.pyqtSignal(str, object)
+    _instance = None
+
+    @classmethod
+    def instance(cls):
+        """The shared Settings object, created on first use."""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
         self.settings_file = get_settings_path()
         self.default_options = {
             "theme": "dark_teal",
@@ -26,8 +49,14 @@ class Settings:
             "show_notifications": True,
             "log_level": "Info",
             "last_opened_file": "",
+            "prefetch_last_file": True,    # load last_opened_file in the background at startup
             "recent_files": [],
             "debug_mode": False,
+            "lazy_startup": True,          # build each tab when it is first shown
+            "undo_depth": 100,             # edits kept for undo
+            "check_before_save": True,     # run the save check (validation.py) before writing
+            "cache_size_mb": 512,          # decoded saves kept for switching vaults
+            "disk_cache_mb": 256,          # decrypted saves kept on disk for reopening (0 = off)
             # Backup options:
             "auto_backup": False,
             "backup_on_load": False,
@@ -40,7 +69,14 @@ class Settings:
             "language": "English",
             "font_size": 12
         }
-        self.options = self.default_options.copy()
+        self.options = copy.deepcopy(self.default_options)
+        self._depth = 0
+        self._pending = {}
+        self._dirty = False
+        self._saveTimer = QtCore.QTimer(self)
+        self._saveTimer.setSingleShot(True)
+        self._saveTimer.setInterval(self.SAVE_DELAY_MS)
+        self._saveTimer.timeout.connect(self.save)
         self.load()
 
     def load(self):
@@ -54,26 +90,62 @@ class Settings:
                 print(f"Error loading settings: {e}")
 
     def save(self):
-        """Save the current settings to the JSON file."""
+        """Write the current settings to the JSON file now (atomically)."""
+        self._saveTimer.stop()
+        self._dirty = False
+        tmp = self.settings_file + ".tmp"
         try:
-            with open(self.settings_file, "w") as f:
+            with open(tmp, "w") as f:
                 json.dump(self.options, f, indent=4)
+            os.replace(tmp, self.settings_file)
         except Exception as e:
             print(f"Error saving settings: {e}")
 
+    def flush(self):
+        """Write any pending changes immediately (call before exiting)."""
+        if self._dirty:
+            self.save()
+
+    def _scheduleSave(self):
+        self._dirty = True
+        self._saveTimer.start()
+
+    @contextmanager
+    def transaction(self):
+        """Batch set_option calls: one write and the changed signals at the end."""
+        self._depth += 1
+        try:
+            yield self
+        finally:
+            self._depth -= 1
+            if self._depth == 0 and self._pending:
+                pending, self._pending = self._pending, {}
+                self._scheduleSave()
+                for key, value in pending.items():
+                    self.changed.emit(key, value)
+
     def set_option(self, key, value):
-        """Set a setting option and immediately save it."""
-        self.options[key] = value
-        self.save()
+        """Set a setting option; it is saved shortly after (or when the transaction ends)."""
+        if key in self.options and self.options[key] == value:
+            return
+        self.options[key] = copy.deepcopy(value)
+        if self._depth:
+            self._pending[key] = value
+        else:
+            self._scheduleSave()
+            self.changed.emit(key, value)
 
     def get_option(self, key, default=None):
-        """Retrieve a setting option."""
-        return self.options.get(key, default)
+        """Retrieve a setting option (lists and dicts are returned as copies)."""
+        value = self.options.get(key, default)
+        return copy.deepcopy(value) if isinstance(value, (list, dict)) else value
 
     def reset_to_defaults(self):
         """Reset all settings to their default values."""
-        self.options = self.default_options.copy()
-        self.save()
+        with self.transaction():
+            for key, value in self.default_options.items():
+                self.set_option(key, value)
+        self.flush()
 
 class SettingsDialog(QtWidgets.QDialog):
     """
@@ -134,6 +206,26 @@ class SettingsDialog(QtWidgets.QDialog):
         self.showNotificationsCheckbox = QtWidgets.QCheckBox("Show Notifications")
         formLayout.addRow("Notifications:", self.showNotificationsCheckbox)
         
+        self.undoDepthSpin = QtWidgets.QSpinBox()
+        self.undoDepthSpin.setRange(1, 1000)
+        formLayout.addRow("Undo Steps:", self.undoDepthSpin)
+        
+        self.cacheSizeSpin = QtWidgets.QSpinBox()
+        self.cacheSizeSpin.setRange(64, 16384)
+        self.cacheSizeSpin.setSuffix(" MB")
+        formLayout.addRow("Open Vault Cache:", self.cacheSizeSpin)
+        
+        self.diskCacheSpin = QtWidgets.QSpinBox()
+        self.diskCacheSpin.setRange(0, 16384)
+        self.diskCacheSpin.setSuffix(" MB")
+        self.diskCacheSpin.setSpecialValueText("Off")
+        formLayout.addRow("Reopen Cache (Disk):", self.diskCacheSpin)
+        
+        self.prefetchCheckbox = QtWidgets.QCheckBox("Load the last opened file in the background at startup")
+        formLayout.addRow("Prefetch:", self.prefetchCheckbox)
+        self.checkBeforeSaveCheckbox = QtWidgets.QCheckBox("Check the save for problems before writing it")
+        formLayout.addRow("Save Check:", self.checkBeforeSaveCheckbox)
+        
         # Display-only fields for file information
         self.lastOpenedFileEdit = QtWidgets.QLineEdit()
         self.lastOpenedFileEdit.setReadOnly(True)
@@ -171,6 +263,9 @@ class SettingsDialog(QtWidgets.QDialog):
         self.enableDebugCheckbox = QtWidgets.QCheckBox("Enable Debug Mode")
         formLayout.addRow("Debug Mode:", self.enableDebugCheckbox)
         
+        self.lazyStartupCheckbox = QtWidgets.QCheckBox("Build tabs when first shown (after restart)")
+        formLayout.addRow("Lazy Startup:", self.lazyStartupCheckbox)
+        
         return tab
 
     def createBackupTab(self):
@@ -246,6 +341,11 @@ class SettingsDialog(QtWidgets.QDialog):
         # General tab
         self.autoSaveCheckbox.setChecked(self.settings.get_option("auto_save", True))
         self.showNotificationsCheckbox.setChecked(self.settings.get_option("show_notifications", True))
+        self.undoDepthSpin.setValue(self.settings.get_option("undo_depth", 100))
+        self.cacheSizeSpin.setValue(self.settings.get_option("cache_size_mb", 512))
+        self.diskCacheSpin.setValue(self.settings.get_option("disk_cache_mb", 256))
+        self.prefetchCheckbox.setChecked(self.settings.get_option("prefetch_last_file", True))
+        self.checkBeforeSaveCheckbox.setChecked(self.settings.get_option("check_before_save", True))
         self.lastOpenedFileEdit.setText(self.settings.get_option("last_opened_file", ""))
         self.recentFilesList.clear()
         for file in self.settings.get_option("recent_files", []):
@@ -263,6 +363,7 @@ class SettingsDialog(QtWidgets.QDialog):
         if index >= 0:
             self.logLevelCombo.setCurrentIndex(index)
         self.enableDebugCheckbox.setChecked(self.settings.get_option("debug_mode", False))
+        self.lazyStartupCheckbox.setChecked(self.settings.get_option("lazy_startup", True))
         
         # Backup tab
         self.autoBackupCheckbox.setChecked(self.settings.get_option("auto_backup", False))
@@ -281,13 +382,24 @@ class SettingsDialog(QtWidgets.QDialog):
         self.fontSizeSpin.setValue(self.settings.get_option("font_size", 12))
 
     def applySettings(self):
+        with self.settings.transaction():
+            self.storeSettings()
+        self.accept()
+
+    def storeSettings(self):
         # General tab
         self.settings.set_option("auto_save", self.autoSaveCheckbox.isChecked())
         self.settings.set_option("show_notifications", self.showNotificationsCheckbox.isChecked())
+        self.settings.set_option("undo_depth", self.undoDepthSpin.value())
+        self.settings.set_option("cache_size_mb", self.cacheSizeSpin.value())
+        self.settings.set_option("disk_cache_mb", self.diskCacheSpin.value())
+        self.settings.set_option("prefetch_last_file", self.prefetchCheckbox.isChecked())
+        self.settings.set_option("check_before_save", self.checkBeforeSaveCheckbox.isChecked())
         self.settings.set_option("theme", self.themeCombo.currentText())
         # Advanced tab
         self.settings.set_option("log_level", self.logLevelCombo.currentText())
         self.settings.set_option("debug_mode", self.enableDebugCheckbox.isChecked())
+        self.settings.set_option("lazy_startup", self.lazyStartupCheckbox.isChecked())
         # Backup tab
         self.settings.set_option("auto_backup", self.autoBackupCheckbox.isChecked())
         self.settings.set_option("backup_on_load", self.backupOnLoadCheckbox.isChecked())
@@ -299,7 +411,6 @@ class SettingsDialog(QtWidgets.QDialog):
         self.settings.set_option("default_open_folder", self.defaultOpenFolderEdit.text())
         self.settings.set_option("language", self.languageCombo.currentText())
         self.settings.set_option("font_size", self.fontSizeSpin.value())
-        self.accept()
 
     def resetDefaults(self):
         reply = QtWidgets.QMessageBox.question(
@@ -318,11 +429,12 @@ if __name__ == "__main__":
 
     app = QtWidgets.QApplication(sys.argv)
     apply_stylesheet(app, theme='dark_teal.xml')
-    settings = Settings()
+    settings = Settings.instance()
     dlg = SettingsDialog(settings)
     if dlg.exec_() == QtWidgets.QDialog.Accepted:
         print("Updated Settings:")
         print(json.dumps(settings.options, indent=4))
+        settings.flush()
     else:
         print("Settings update canceled.")
     sys.exit(0)
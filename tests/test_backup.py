@@ -0,0 +1,25 @@
+# tests/test_backup.py
+"""Backups of saves with the same name in different folders stay apart."""
+import json
+
+from backup import backup_file, vault_name
+from savecodec import write_sav
+
+
+def _write(path, caps):
+    write_sav(str(path), json.dumps({"vault": {"storage": {"resources": {"Nuka": caps}}}}).encode())
+
+
+def test_same_file_name_in_two_folders(tmp_path):
+    (tmp_path / "phone").mkdir()
+    (tmp_path / "pc").mkdir()
+    phone, pc = tmp_path / "phone" / "Vault1.sav", tmp_path / "pc" / "Vault1.sav"
+    _write(phone, 100)
+    _write(pc, 200)
+    assert vault_name(str(phone)) != vault_name(str(pc))
+    folder = str(tmp_path / "backups")
+    phone_store, _ = backup_file(str(phone), folder, max_files=1)
+    pc_store, _ = backup_file(str(pc), folder, max_files=1)
+    assert len(phone_store.versions) == len(pc_store.versions) == 1
+    plain = phone_store.plaintext(phone_store.versions[0]["name"])
+    assert json.loads(plain)["vault"]["storage"]["resources"]["Nuka"] == 100
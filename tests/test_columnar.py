@@ -0,0 +1,55 @@
+# tests/test_columnar.py
+"""Bulk edits refuse values they cannot store."""
+import pytest
+
+pytest.importorskip("numpy")
+
+from columnar import DwellerColumns, BulkEditError
+
+
+def _dwellers():
+    return [{"experience": {"currentLevel": level, "currentXP": 100}} for level in (1, 5, 12)]
+
+
+@pytest.mark.parametrize("statement", [
+    "set xp = 1 / 0",
+    "set xp = xp // 0",
+    "set xp = 0 / 0",
+    "set xp = xp * 1e20",
+    "set level = 2, xp = xp * 1e20",
+])
+def test_unstorable_values_are_refused(statement):
+    dwellers = _dwellers()
+    columns = DwellerColumns(dwellers)
+    with pytest.raises(BulkEditError):
+        columns.apply(statement)
+    assert columns.sync() == 0
+    assert dwellers == _dwellers()
+
+
+def test_division_outside_the_where_clause_is_ignored():
+    dwellers = _dwellers()
+    columns = DwellerColumns(dwellers)
+    assert columns.apply("set xp = 1000 / (level - 1) where level > 1") == 2
+    columns.sync()
+    assert [d["experience"]["currentXP"] for d in dwellers] == [100, 250, 91]
+
+
+def _stats(strength, endurance):
+    stats = [{"value": 1} for _ in range(7)]
+    stats[0]["value"], stats[2]["value"] = strength, endurance
+    return {"stats": {"stats": stats}}
+
+
+@pytest.mark.parametrize("statement, expected", [
+    ("set strength = endurance, endurance = strength", [(7, 3), (2, 9)]),
+    ("set S = E, E = S", [(7, 3), (2, 9)]),
+    ("set strength = endurance, endurance = strength + 1", [(7, 4), (2, 10)]),
+    ("set endurance = strength, strength = endurance where strength > 5", [(3, 7), (2, 9)]),
+])
+def test_right_hand_sides_see_the_values_before_the_statement(statement, expected):
+    dwellers = [_stats(3, 7), _stats(9, 2)]
+    columns = DwellerColumns(dwellers)
+    columns.apply(statement)
+    columns.sync()
+    assert [(d["stats"]["stats"][0]["value"], d["stats"]["stats"][2]["value"]) for d in dwellers] == expected
@@ -0,0 +1,38 @@
+# tests/test_savediff.py
+"""diff_saves reports only values that differ."""
+import copy
+import json
+
+from savediff import diff_saves
+from savemodel import SaveModel
+
+SAVE = {
+    "appVersion": "1.17.1",
+    "vault": {"VaultName": "042", "storage": {"resources": {"Nuka": 500}}},
+    "dwellers": {"dwellers": [{"serializeId": 1, "name": "Ada", "happiness": {"happinessValue": 50}}]},
+}
+
+
+def test_equal_dicts_have_no_changes():
+    assert diff_saves(SAVE, copy.deepcopy(SAVE)) == []
+
+
+def test_section_marked_dirty_but_unchanged_has_no_changes():
+    old = SaveModel(json.dumps(SAVE))
+    new = SaveModel(json.dumps(SAVE))
+    new["appVersion"] = new["appVersion"]  # assigned, so it has no clean bytes
+    new["vault"]
+    new.mark_dirty("vault")
+    assert new.clean_bytes("appVersion") is None
+    assert diff_saves(old, new) == []
+
+
+def test_changed_value_is_reported():
+    new = copy.deepcopy(SAVE)
+    new["appVersion"] = "1.18"
+    new["dwellers"]["dwellers"][0]["happiness"]["happinessValue"] = 75
+    changes = {(c.item, c.path): (c.old, c.new) for c in diff_saves(SAVE, new)}
+    assert changes == {
+        ("", ("appVersion",)): ("1.17.1", "1.18"),
+        ("Ada (#1)", ("happiness", "happinessValue")): (50, 75),
+    }
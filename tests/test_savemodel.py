@@ -0,0 +1,59 @@
+# tests/test_savemodel.py
+"""SaveModel writes back exactly the save it read, plus the edits it was told about."""
+import json
+
+import pytest
+
+from savemodel import SaveModel, index_items
+
+SAVE = {
+    "appVersion": "1.17.1",
+    "vault": {"VaultName": "042", "rooms": [{"RoomType": "Diner", "level": 2}]},
+    "dwellers": {
+        "dwellers": [
+            {"serializeId": i, "name": f"D{i}", "stats": {"stats": [{"value": i % 10}] * 7},
+             "note": "a \\\"quoted\\\" ] name, {with} brackets"}
+            for i in range(5)
+        ],
+        "actors": [],
+    },
+    "survivalW": [1, 2.5, None, True, "]"],
+}
+
+
+def _raw(save=SAVE, **kwargs):
+    return json.dumps(save, **kwargs).encode("utf-8")
+
+
+@pytest.mark.parametrize("raw", [_raw(), _raw(indent=2), _raw(separators=(",", ":"))])
+def test_clean_round_trip(raw):
+    model = SaveModel(raw)
+    assert json.loads(model.dumps()) == SAVE
+    model["dwellers"]  # parsed, but not marked dirty
+    assert json.loads(model.dumps()) == SAVE
+
+
+def test_round_trip_after_editing_one_dweller():
+    model = SaveModel(_raw(indent=2))
+    dweller = model["dwellers"]["dwellers"][3]
+    dweller["name"] = "Edited"
+    model.mark_dirty("dwellers", dweller)
+    expected = json.loads(_raw())
+    expected["dwellers"]["dwellers"][3]["name"] = "Edited"
+    assert json.loads(model.dumps()) == expected
+    # A second edit after a save reuses the cached encodings of the others
+    model["dwellers"]["dwellers"][0]["name"] = "Again"
+    model.mark_dirty("dwellers", model["dwellers"]["dwellers"][0])
+    expected["dwellers"]["dwellers"][0]["name"] = "Again"
+    assert json.loads(model.dumps()) == expected
+
+
+@pytest.mark.parametrize("raw, values", [
+    (b"[1,2]", [b"1", b"2"]),
+    (b"[ 1 , 2 ]", [b"1", b"2"]),
+    (b"[true,null]", [b"true", b"null"]),
+    (b"[[1],2]", [b"[1]", b"2"]),
+    (b"[]", []),
+])
+def test_index_items_stops_scalars_at_the_closing_bracket(raw, values):
+    assert [raw[s:e] for s, e in index_items(raw)] == values
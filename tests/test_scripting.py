@@ -0,0 +1,38 @@
+# tests/test_scripting.py
+"""The script sandbox keeps scripts away from shared state."""
+import pytest
+
+import schema
+from scripting import ScriptRunner, ScriptError
+
+
+def _save():
+    return {
+        "vault": {"rooms": [{"RoomType": "Diner"}], "storage": {"resources": {"Nuka": 10}}},
+        "dwellers": {"dwellers": [{"name": "Ada", "experience": {"currentLevel": 3}}]},
+    }
+
+
+@pytest.mark.parametrize("source", [
+    'dwellers[0].FIELDS["level"].read = lambda d: 999',
+    'field = vault.FIELDS["rooms"]\nfield.read = lambda d: []',
+    'dwellers[0].FIELDS["level"] = None',
+    'del dwellers[0].FIELDS["level"]',
+    '"{0._items}".format(dwellers)',
+    'format(dwellers)',
+])
+def test_script_cannot_change_view_fields(source):
+    live = _save()
+    fields = dict(schema.Dweller.FIELDS)
+    with pytest.raises(ScriptError):
+        ScriptRunner(live).run([("script", source)])
+    assert dict(schema.Dweller.FIELDS) == fields
+    assert schema.Dweller(live["dwellers"]["dwellers"][0]).level == 3
+    assert schema.Vault(live["vault"]).rooms == [{"RoomType": "Diner"}]
+
+
+def test_script_edits_fields_of_the_copies():
+    live = _save()
+    ops = ScriptRunner(live).run([("script", "for d in dwellers:\n    d.level += 1\nresources.caps += 5")])
+    assert ops
+    assert schema.Dweller(live["dwellers"]["dwellers"][0]).level == 3
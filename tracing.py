@@ -0,0 +1,223 @@
+# tracing.py
+"""
+Lightweight phase timing for loads and saves.
+
+Tracing is off unless configure() turns it on (MainWindow does so when the
+debug_mode setting is enabled). While off, span() returns a shared no-op
+context manager and laps() a no-op recorder, so instrumented code costs one
+function call per phase.
+
+    with tracing.span("parse.vault"):
+        ...
+
+    laps = tracing.laps("decrypt")     # for loops that interleave phases
+    for chunk in chunks:
+        laps.lap("read")
+        ...
+        laps.lap("base64")
+    laps.close()                       # one span per phase, summed
+
+Spans are grouped under the operation last passed to begin() ("load",
+"save"), so summary() can report the breakdown of the most recent load or
+save. export_chrome_trace() writes every recorded span in the Chrome trace
+event format (chrome://tracing, Perfetto). This module does not import Qt.
+"""
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger("FalloutShelterSGE")
+
+# Settings "log_level" names -> logging levels
+LOG_LEVELS = {"Error": logging.ERROR, "Warning": logging.WARNING, "Info": logging.INFO, "Debug": logging.DEBUG}
+# Spans kept for export; the oldest are dropped first.
+MAX_EVENTS = 20000
+
+_enabled = False
+_lock = threading.Lock()
+_events = deque(maxlen=MAX_EVENTS)
+_groups = {}
+_current = None
+_origin = time.perf_counter()
+_local = threading.local()  # per-thread nesting depth of open spans
+
+
+def configure(enabled, log_level="Info"):
+    """Turn tracing on or off and set the log level from the settings names."""
+    global _enabled
+    _enabled = bool(enabled)
+    logger.setLevel(LOG_LEVELS.get(log_level, logging.INFO))
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+        logger.addHandler(handler)
+        logger.propagate = False
+
+
+def enabled():
+    return _enabled
+
+
+def begin(operation):
+    """Start a new breakdown for operation; later spans are counted towards it."""
+    global _current
+    if not _enabled:
+        return
+    with _lock:
+        _current = operation
+        _groups[operation] = []
+
+
+def _depth():
+    return getattr(_local, "depth", 0)
+
+
+def record(name, start, duration, args=None, depth=None):
+    """Add a finished span (perf_counter start, seconds duration)."""
+    if depth is None:
+        depth = _depth()
+    event = (name, start, duration, threading.get_ident(), args, depth)
+    with _lock:
+        _events.append(event)
+        if _current is not None and not getattr(_local, "ungrouped", False):
+            _groups[_current].append(event)
+    logger.debug("%s: %.2f ms", name, duration * 1000)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def lap(self, phase):
+        pass
+
+    def close(self):
+        pass
+
+
+_NULL = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        _local.depth = _depth() + 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        _local.depth -= 1
+        record(self.name, self.start, end - self.start, self.args)
+        return False
+
+
+class _Laps:
+    """Sums the time between lap() calls per phase name."""
+    __slots__ = ("name", "start", "last", "totals", "counts")
+
+    def __init__(self, name):
+        self.name = name
+        self.start = self.last = time.perf_counter()
+        self.totals = {}
+        self.counts = {}
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.totals[phase] = self.totals.get(phase, 0.0) + now - self.last
+        self.counts[phase] = self.counts.get(phase, 0) + 1
+        self.last = now
+
+    def close(self):
+        # Phases interleave chunk by chunk; lay the sums out back to back.
+        offset = self.start
+        depth = _depth()
+        for phase, total in self.totals.items():
+            record(f"{self.name}.{phase}", offset, total, {"chunks": self.counts[phase]}, depth + 1)
+            offset += total
+        record(self.name, self.start, self.last - self.start, None, depth)
+
+
+class ungrouped:
+    """Spans recorded on this thread inside the block are exported but kept out of summary()."""
+
+    def __enter__(self):
+        _local.ungrouped = True
+        return self
+
+    def __exit__(self, *exc):
+        _local.ungrouped = False
+        return False
+
+
+def span(name, **args):
+    """Context manager timing a block as one span (no-op while tracing is off)."""
+    if not _enabled:
+        return _NULL
+    return _Span(name, args or None)
+
+
+def laps(name):
+    if not _enabled:
+        return _NULL
+    return _Laps(name)
+
+
+def breakdown(operation):
+    """[(span name, seconds, nesting depth)] of the last run of operation, in recording order."""
+    with _lock:
+        return [(e[0], e[2], e[5]) for e in _groups.get(operation, [])]
+
+
+def summary(operation, log=False):
+    """One-line breakdown of the last run of operation, or "" if none was traced."""
+    spans = breakdown(operation)
+    if not spans:
+        return ""
+    # "decrypt" is only the sum of decrypt.read/base64/aes, so list the parts;
+    # the total counts outermost spans only.
+    parents = {name.rsplit(".", 1)[0] for name, _, _ in spans if "." in name}
+    total = sum(d for _, d, depth in spans if depth == 0)
+    parts = " · ".join(f"{name} {d * 1000:.1f}" for name, d, _ in spans if name not in parents)
+    text = f"{operation.capitalize()} {total * 1000:.1f} ms: {parts}"
+    if log:
+        logger.info(text)
+    return text
+
+
+def export_chrome_trace(path):
+    """Write every recorded span to path as Chrome trace events (JSON)."""
+    with _lock:
+        events = list(_events)
+    pid = os.getpid()
+    trace = []
+    for name, start, duration, tid, args, _ in events:
+        event = {"name": name, "ph": "X", "pid": pid, "tid": tid,
+                 "ts": round((start - _origin) * 1e6, 3), "dur": round(duration * 1e6, 3)}
+        if args:
+            event["args"] = args
+        trace.append(event)
+    with open(path, "w") as f:
+        json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+    return len(trace)
+
+
+def clear():
+    global _current
+    with _lock:
+        _events.clear()
+        _groups.clear()
+        _current = None
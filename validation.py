@@ -0,0 +1,330 @@
+# validation.py
+"""
+Consistency checks for a decoded save, run before it is written.
+
+The game trusts what it loads, so a save edited into an impossible state
+(a lunchbox count that does not match the boxes, a dweller with more
+health than maxHealth, rooms listing dwellers that no longer exist) can
+crash or corrupt the vault. Each rule reads a few top-level sections and
+returns Problems; a Problem with a fix names the value that repairs it:
+
+    validator = Validator()
+    problems = validator.run(model)
+    ops = repair(model, problems)   # history.Replace ops, already applied
+
+Rules that look dwellers up by ID share an Index of the ID sets, built
+once per run. Validator remembers each rule's problems together with
+SaveModel.version() of the sections it read, so running it again after an
+edit only re-checks the rules whose sections changed. The stale rules run
+grouped by section on a thread pool; the checks are plain Python, so the
+pool mostly overlaps the lazy section parses, and callers run the
+validator off the GUI thread. This module does not import Qt.
+"""
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import history
+import tracing
+from schema import Field, Dweller, Vault
+
+# Problem.fix when the problem cannot be repaired automatically
+NO_FIX = object()
+MAX_LEVEL = 50
+
+
+class Problem:
+    """One inconsistency: where it is (a history-style path), what is wrong and the repaired value."""
+    __slots__ = ("rule", "path", "message", "fix")
+
+    def __init__(self, rule, path, message, fix=NO_FIX):
+        self.rule = rule
+        self.path = tuple(path)
+        self.message = message
+        self.fix = fix
+
+    @property
+    def section(self):
+        return self.path[0]
+
+    @property
+    def fixable(self):
+        return self.fix is not NO_FIX
+
+    def __repr__(self):
+        return f"<Problem {self.rule} {self.path}: {self.message}>"
+
+
+class Index:
+    """ID sets of the save that rules check references against."""
+
+    def __init__(self, data):
+        dwellers = _dwellers(data)
+        self.dweller_ids = set()
+        self.duplicate_ids = set()
+        for d in dwellers:
+            serialize_id = _SERIALIZE_ID.read(d)
+            if serialize_id is None:
+                continue
+            if serialize_id in self.dweller_ids:
+                self.duplicate_ids.add(serialize_id)
+            self.dweller_ids.add(serialize_id)
+
+
+class Rule:
+    __slots__ = ("name", "sections", "check", "description")
+
+    def __init__(self, name, sections, check, description):
+        self.name = name
+        self.sections = tuple(sections)
+        self.check = check  # check(data, index) -> list of Problems
+        self.description = description
+
+
+RULES = []
+
+
+def rule(name, *sections):
+    """Register check(data, index) as a rule reading sections; its docstring describes it."""
+    def register(check):
+        RULES.append(Rule(name, sections, check, (check.__doc__ or "").strip()))
+        return check
+    return register
+
+
+_SERIALIZE_ID = Field("serializeId", default=None)
+_HEALTH = Field("health", "healthValue", type=float, default=None)
+_MAX_HEALTH = Field("health", "maxHealth", type=float, default=None)
+_TEAM_DWELLER = Field("dweller", "serializeId", default=None)
+
+
+def _dwellers(data):
+    section = data.get("dwellers")
+    dwellers = section.get("dwellers") if isinstance(section, dict) else None
+    return dwellers if isinstance(dwellers, list) else []
+
+
+def _vault(data):
+    vault = data.get("vault")
+    return vault if isinstance(vault, dict) else None
+
+
+def _number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _clamp(problems, name, path, value, low, high, what):
+    if _number(value) and not low <= value <= high:
+        problems.append(Problem(name, path, f"{what} is {value} (allowed {low}-{high})",
+                                min(max(value, low), high)))
+
+
+# ----- Vault -----
+@rule("lunchbox-count", "vault")
+def check_lunchbox_count(data, index):
+    """LunchBoxesCount matches the length of LunchBoxesByType."""
+    vault = _vault(data)
+    if vault is None or not isinstance(vault.get("LunchBoxesByType"), list):
+        return []
+    count, boxes = vault.get("LunchBoxesCount"), len(vault["LunchBoxesByType"])
+    if count == boxes:
+        return []
+    return [Problem("lunchbox-count", ("vault", "LunchBoxesCount"),
+                    f"LunchBoxesCount is {count} but there are {boxes} lunchboxes", boxes)]
+
+
+@rule("vault-happiness", "vault")
+def check_vault_happiness(data, index):
+    """Vault happiness is 0-100."""
+    vault = _vault(data)
+    problems = []
+    if vault is not None:
+        _clamp(problems, "vault-happiness", ("vault", "happiness"), vault.get("happiness"), 0, 100,
+               "Vault happiness")
+    return problems
+
+
+# ----- Dwellers -----
+@rule("dweller-values", "dwellers")
+def check_dweller_values(data, index):
+    """Dweller health is at most maxHealth; happiness, level and SPECIAL are in range."""
+    problems = []
+    name = "dweller-values"
+    for i, d in enumerate(_dwellers(data)):
+        if not isinstance(d, dict):
+            continue
+        base = ("dwellers", "dwellers", i)
+        who = Dweller(d).full_name or f"Dweller {i + 1}"
+        health, max_health = _HEALTH.read(d), _MAX_HEALTH.read(d)
+        if health is not None and max_health is not None and health > max_health:
+            problems.append(Problem(name, base + Dweller.health.path,
+                                    f"{who}: health {health:g} is above maxHealth {max_health:g}",
+                                    d["health"]["maxHealth"]))
+        happiness = d.get("happiness")
+        if isinstance(happiness, dict):
+            _clamp(problems, name, base + Dweller.happiness.path, happiness.get("happinessValue"),
+                   0, 100, f"{who}: happiness")
+        experience = d.get("experience")
+        if isinstance(experience, dict):
+            _clamp(problems, name, base + Dweller.level.path, experience.get("currentLevel"),
+                   1, MAX_LEVEL, f"{who}: level")
+        stats = Dweller.stats.read(d)
+        for j, stat in enumerate(stats):
+            if isinstance(stat, dict):
+                _clamp(problems, name, base + ("stats", "stats", j, "value"), stat.get("value"),
+                       0, 10, f"{who}: stat {j}")
+    return problems
+
+
+@rule("dweller-ids", "dwellers")
+def check_dweller_ids(data, index):
+    """Dweller serializeIds are unique, and the next-ID counter is above all of them."""
+    problems = [Problem("dweller-ids", ("dwellers", "dwellers"), f"Several dwellers have serializeId {i}")
+                for i in sorted(index.duplicate_ids)]
+    section = data.get("dwellers")
+    counter = section.get("id") if isinstance(section, dict) else None
+    if _number(counter) and index.dweller_ids:
+        highest = max(index.dweller_ids)
+        if counter <= highest:
+            problems.append(Problem("dweller-ids", ("dwellers", "id"),
+                                    f"Next dweller ID {counter} is not above the highest serializeId {highest}",
+                                    highest + 1))
+    return problems
+
+
+# ----- References -----
+@rule("room-dwellers", "vault", "dwellers")
+def check_room_dwellers(data, index):
+    """Rooms only list dwellers that exist."""
+    problems = []
+    if _vault(data) is None:
+        return problems
+    known = index.dweller_ids
+    for i, room in enumerate(Vault(data["vault"]).rooms):
+        assigned = room.get("dwellers") if isinstance(room, dict) else None
+        if not isinstance(assigned, list):
+            continue
+        missing = [d for d in assigned if d not in known]
+        if missing:
+            problems.append(Problem("room-dwellers", ("vault", "rooms", i, "dwellers"),
+                                    f"Room {i + 1} ({room.get('RoomType', '?')}) lists missing dweller(s) "
+                                    + ", ".join(map(str, missing)),
+                                    [d for d in assigned if d in known]))
+    return problems
+
+
+@rule("team-dwellers", "vault", "dwellers")
+def check_team_dwellers(data, index):
+    """Wasteland teams are led by dwellers that exist."""
+    problems = []
+    if _vault(data) is None:
+        return problems
+    for i, team in enumerate(Vault(data["vault"]).teams):
+        serialize_id = _TEAM_DWELLER.read(team) if isinstance(team, dict) else None
+        if serialize_id is not None and serialize_id not in index.dweller_ids:
+            problems.append(Problem("team-dwellers", ("vault", "wasteland", "teams", i, "dweller", "serializeId"),
+                                    f"Wasteland team {i + 1} refers to missing dweller {serialize_id}"))
+    return problems
+
+
+# ----- Running -----
+class Validator:
+    """Runs RULES over a save, re-checking only rules whose sections changed since the last run."""
+
+    def __init__(self, rules=None, workers=4):
+        self.rules = list(RULES if rules is None else rules)
+        self.workers = workers
+        self.timings = {}  # rule name -> seconds of its last check
+        self._model = None
+        self._results = {}  # rule name -> (section versions, problems)
+        self._index = None  # (dwellers version, Index)
+        self._lock = threading.Lock()
+
+    def _versions(self, data, sections):
+        return tuple(data.version(key) for key in sections)
+
+    def stale(self, data):
+        """The rules that have to run again on data."""
+        if not hasattr(data, "version") or data is not self._model:
+            return list(self.rules)
+        stale = []
+        for r in self.rules:
+            cached = self._results.get(r.name)
+            if cached is None or cached[0] != self._versions(data, r.sections):
+                stale.append(r)
+        return stale
+
+    def index(self, data):
+        version = data.version("dwellers") if hasattr(data, "version") else None
+        if self._index is None or version is None or self._index[0] != version or data is not self._model:
+            self._index = (version, Index(data))
+        return self._index[1]
+
+    def run(self, data):
+        """All problems of data, in rule order."""
+        stale = self.stale(data)
+        if data is not self._model:
+            self._results = {}
+            self._index = None
+        # Parse the sections up front; lazy parses must not race in the pool
+        for key in {key for r in stale for key in r.sections}:
+            if key in data:
+                data[key]
+        index = self.index(data)
+        self._model = data
+        groups = {}
+        for r in stale:
+            groups.setdefault(r.sections, []).append(r)
+        if len(groups) > 1 and self.workers > 1:
+            with ThreadPoolExecutor(min(len(groups), self.workers)) as pool:
+                list(pool.map(lambda rules: self._check(data, index, rules), groups.values()))
+        else:
+            for rules in groups.values():
+                self._check(data, index, rules)
+        problems = []
+        for r in self.rules:
+            problems += self._results[r.name][1]
+        return problems
+
+    def _check(self, data, index, rules):
+        for r in rules:
+            versions = self._versions(data, r.sections) if hasattr(data, "version") else None
+            started = time.perf_counter()
+            with tracing.span("validate." + r.name):
+                problems = r.check(data, index)
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._results[r.name] = (versions, problems)
+                self.timings[r.name] = elapsed
+
+
+def _value_at(node, path):
+    for key in path:
+        try:
+            node = node[key]
+        except (KeyError, IndexError, TypeError):
+            return history.MISSING
+    return node
+
+
+def repair(data, problems):
+    """Apply the fixes of the fixable problems; returns the history ops that undo them."""
+    ops = []
+    for problem in problems:
+        if not problem.fixable:
+            continue
+        old = _value_at(data, problem.path)
+        if old is history.MISSING or old == problem.fix:
+            continue
+        op = history.Replace(problem.path, old, problem.fix)
+        op.apply(data)
+        if hasattr(data, "mark_path_dirty"):
+            data.mark_path_dirty(problem.path)
+        ops.append(op)
+    return ops
+
+
+def summary(problems):
+    """'3 problem(s), 2 can be repaired' for status lines."""
+    fixable = sum(1 for p in problems if p.fixable)
+    return f"{len(problems)} problem(s), {fixable} can be repaired"
@@ -0,0 +1,191 @@
+# vaultmap.py
+"""
+Map of the vault layout for the Rooms tab.
+
+Each room is a QGraphicsPixmapItem placed from its grid position (row,
+col, and a width that grows with mergeLevel). The tile images are drawn
+once per distinct (type, width, level, state) and shared by every room
+that looks the same, so a vault with hundreds of rooms needs a few dozen
+pixmaps, and panning or zooming only blits them.
+
+    view = VaultMapView()
+    view.setRooms(rooms)           # the save's room dicts
+    view.refreshRooms([3, 7])      # after those rooms were edited
+    view.roomsSelected.connect(...)
+"""
+import zlib
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+from schema import Field, Room
+
+CELL_WIDTH = 40   # pixels per grid column
+ROW_HEIGHT = 80   # pixels per vault floor
+GAP = 2
+# Rooms whose width does not follow mergeLevel (in grid columns)
+FIXED_WIDTHS = {"Elevator": 2}
+EMERGENCY_STATES = {"Fire", "Radroach", "MoleRat", "Deathclaw", "Raider", "FeralGhoul", "RadScorpion"}
+
+
+_TYPE = Field("type", type=str, default="")  # used when RoomType is missing
+
+
+def room_kind(room):
+    return Room.kind.read(room) or _TYPE.read(room) or "Unknown"
+
+
+def room_width(room):
+    """Width of room in grid columns."""
+    kind = room_kind(room)
+    if kind in FIXED_WIDTHS:
+        return FIXED_WIDTHS[kind]
+    return 3 * min(max(Room.merge_level.read(room), 1), 3)
+
+
+class TileCache:
+    """Room pixmaps by appearance, drawn on first use."""
+
+    def __init__(self):
+        self._tiles = {}
+
+    def __len__(self):
+        return len(self._tiles)
+
+    def tile(self, room):
+        kind, width = room_kind(room), room_width(room)
+        key = (kind, width, Room.level.read(room), Room.state.read(room))
+        pixmap = self._tiles.get(key)
+        if pixmap is None:
+            pixmap = self._tiles[key] = self._draw(*key)
+        return pixmap
+
+    def _draw(self, kind, width, level, state):
+        w, h = width * CELL_WIDTH - GAP, ROW_HEIGHT - GAP
+        pixmap = QtGui.QPixmap(w, h)
+        pixmap.fill(QtCore.Qt.transparent)
+        # A stable colour per room type (hash() is salted per process)
+        color = QtGui.QColor.fromHsv(zlib.crc32(kind.encode()) % 360, 90, 170)
+        painter = QtGui.QPainter(pixmap)
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        border = QtGui.QColor("#e53935") if state in EMERGENCY_STATES else color.darker(160)
+        painter.setPen(QtGui.QPen(border, 3 if state in EMERGENCY_STATES else 1))
+        painter.setBrush(color)
+        painter.drawRoundedRect(QtCore.QRectF(1.5, 1.5, w - 3, h - 3), 6, 6)
+        painter.setPen(QtCore.Qt.black)
+        font = painter.font()
+        font.setPixelSize(13)
+        font.setBold(True)
+        painter.setFont(font)
+        metrics = QtGui.QFontMetrics(font)
+        painter.drawText(QtCore.QRect(6, 4, w - 12, 18), QtCore.Qt.AlignLeft,
+                         metrics.elidedText(kind, QtCore.Qt.ElideRight, w - 12))
+        font.setBold(False)
+        font.setPixelSize(11)
+        painter.setFont(font)
+        details = f"Lv {level}" + (f"  {state}" if state and state not in ("Idle", "Working") else "")
+        painter.drawText(QtCore.QRect(6, 24, w - 12, 16), QtCore.Qt.AlignLeft,
+                         QtGui.QFontMetrics(font).elidedText(details, QtCore.Qt.ElideRight, w - 12))
+        painter.end()
+        return pixmap
+
+
+class RoomItem(QtWidgets.QGraphicsPixmapItem):
+    """One room on the map; position is its index in the save's room list."""
+
+    def __init__(self, position, pixmap):
+        super().__init__(pixmap)
+        self.position = position
+        self.setFlag(QtWidgets.QGraphicsItem.ItemIsSelectable)
+        self.setShapeMode(QtWidgets.QGraphicsPixmapItem.BoundingRectShape)
+        self.setTransformationMode(QtCore.Qt.SmoothTransformation)
+
+    def paint(self, painter, option, widget=None):
+        selected = option.state & QtWidgets.QStyle.State_Selected
+        option.state &= ~QtWidgets.QStyle.State_Selected  # no dashed default outline
+        super().paint(painter, option, widget)
+        if selected:
+            painter.setPen(QtGui.QPen(QtGui.QColor("#ffd54f"), 4))
+            painter.setBrush(QtCore.Qt.NoBrush)
+            painter.drawRect(self.boundingRect().adjusted(2, 2, -2, -2))
+
+
+class VaultMapView(QtWidgets.QGraphicsView):
+    """Pannable (drag), zoomable (wheel) map of the rooms; clicking selects them."""
+    roomsSelected = QtCore.pyqtSignal(list)  # room positions
+    MIN_ZOOM = 0.1
+    MAX_ZOOM = 4.0
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setScene(QtWidgets.QGraphicsScene(self))
+        self.tiles = TileCache()
+        self.rooms = []
+        self.roomItems = []
+        self._syncing = False
+        self.setDragMode(QtWidgets.QGraphicsView.ScrollHandDrag)
+        self.setTransformationAnchor(QtWidgets.QGraphicsView.AnchorUnderMouse)
+        self.setRenderHint(QtGui.QPainter.SmoothPixmapTransform)
+        self.setViewportUpdateMode(QtWidgets.QGraphicsView.SmartViewportUpdate)
+        self.setOptimizationFlags(QtWidgets.QGraphicsView.DontSavePainterState |
+                                  QtWidgets.QGraphicsView.DontAdjustForAntialiasing)
+        self.setBackgroundBrush(QtGui.QColor("#3e2f23"))
+        self.setCacheMode(QtWidgets.QGraphicsView.CacheBackground)
+        self.scene().selectionChanged.connect(self.onSelectionChanged)
+
+    def setRooms(self, rooms):
+        self._syncing = True
+        self.scene().clear()
+        self._syncing = False
+        self.rooms = rooms
+        self.roomItems = []
+        for position, room in enumerate(rooms):
+            item = RoomItem(position, self.tiles.tile(room))
+            self._place(item, room)
+            self.scene().addItem(item)
+            self.roomItems.append(item)
+        rect = self.scene().itemsBoundingRect()
+        self.scene().setSceneRect(rect.adjusted(-CELL_WIDTH, -ROW_HEIGHT / 2, CELL_WIDTH, ROW_HEIGHT / 2))
+
+    def _place(self, item, room):
+        view = Room(room)
+        item.setPos(view.col * CELL_WIDTH, view.row * ROW_HEIGHT)
+        item.setToolTip(f"Room {item.position + 1}: {room_kind(room)}\n"
+                        f"State: {view.state}\nProgress: {view.progress}")
+
+    def refreshRooms(self, positions):
+        """Redraw rooms whose values changed."""
+        for position in positions:
+            if 0 <= position < len(self.roomItems):
+                item, room = self.roomItems[position], self.rooms[position]
+                item.setPixmap(self.tiles.tile(room))
+                self._place(item, room)
+
+    def selectRooms(self, positions):
+        """Select (and scroll to) rooms without emitting roomsSelected."""
+        self._syncing = True
+        try:
+            self.scene().clearSelection()
+            for position in positions:
+                if 0 <= position < len(self.roomItems):
+                    self.roomItems[position].setSelected(True)
+        finally:
+            self._syncing = False
+        if positions and 0 <= positions[0] < len(self.roomItems):
+            self.ensureVisible(self.roomItems[positions[0]])
+
+    def onSelectionChanged(self):
+        if not self._syncing:
+            self.roomsSelected.emit(sorted(item.position for item in self.scene().selectedItems()))
+
+    def zoom(self, factor):
+        current = self.transform().m11()
+        factor = min(max(current * factor, self.MIN_ZOOM), self.MAX_ZOOM) / current
+        self.scale(factor, factor)
+
+    def fitAll(self):
+        self.fitInView(self.scene().sceneRect(), QtCore.Qt.KeepAspectRatio)
+
+    def wheelEvent(self, event):
+        steps = event.angleDelta().y() / 120
+        if steps:
+            self.zoom(1.25 ** steps)
+        event.accept()
@@ -0,0 +1,218 @@
+# workspace.py
+"""
+Several saves open at once, with an LRU of decoded saves.
+
+A Vault is one open .sav file: its path, the key it was loaded under and
+its undo history. The decoded SaveModels themselves live in SaveCache,
+keyed by file_key() = (absolute path, mtime, hash of the file bytes), so
+switching back to a vault, or reopening a file that has not changed on
+disk, skips decrypting and indexing. When the estimated size of the cached
+saves passes max_bytes, the least recently used ones are dropped, except
+the vault on screen and vaults with unsaved edits. A dropped vault stays
+in the list and is loaded again when it is selected.
+
+When an open file is rewritten by someone else (the game, a sync client),
+changed_sections() finds the top-level sections whose bytes differ from
+what the vault was loaded from, and merge() takes them over unless they
+have unsaved edits of our own.
+
+This module does not import Qt.
+"""
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+import history
+from savemodel import same_bytes
+
+DEFAULT_CACHE_MB = 512
+# Saves decrypted at the same time (each needs its plaintext in memory)
+LOAD_THREADS = 2
+
+
+def file_key(path, data=None):
+    """(absolute path, mtime, blake2b of the bytes); pass data if the file was already read."""
+    path = os.path.abspath(path)
+    if data is None:
+        with open(path, "rb") as f:
+            data = f.read()
+    # Stat after reading: a write in between gives a newer mtime, never a stale hit
+    return path, os.stat(path).st_mtime_ns, hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class SaveCache:
+    """Decoded SaveModels by file key, least recently used first."""
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_MB << 20, pinned=None):
+        self.max_bytes = max_bytes
+        self.pinned = pinned or (lambda key: False)
+        self._models = OrderedDict()
+        self._lock = threading.Lock()  # loads look models up from worker threads
+
+    def __contains__(self, key):
+        return key in self._models
+
+    def __len__(self):
+        return len(self._models)
+
+    def get(self, key):
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+            return model
+
+    def put(self, key, model):
+        """Add or touch a model; returns the keys dropped to stay under max_bytes."""
+        with self._lock:
+            self._models[key] = model
+            self._models.move_to_end(key)
+            return self._evict()
+
+    def discard(self, key):
+        with self._lock:
+            self._models.pop(key, None)
+
+    def rekey(self, old, new):
+        """The file behind a cached model changed (it was saved)."""
+        with self._lock:
+            model = self._models.pop(old, None)
+            if model is not None:
+                self._models[new] = model
+
+    def set_limit(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes
+            return self._evict()
+
+    def size(self):
+        with self._lock:
+            return sum(m.memory_size() for m in self._models.values())
+
+    def _evict(self):
+        # Sections are parsed lazily, so sizes are measured again every time
+        sizes = {key: model.memory_size() for key, model in self._models.items()}
+        total = sum(sizes.values())
+        evicted = []
+        for key in list(self._models):
+            if total <= self.max_bytes:
+                break
+            if self.pinned(key):
+                continue
+            del self._models[key]
+            total -= sizes[key]
+            evicted.append(key)
+        return evicted
+
+
+class Vault:
+    """One open save file."""
+    __slots__ = ("path", "key", "history", "modified")
+
+    def __init__(self, path, key, history):
+        self.path = os.path.abspath(path)
+        self.key = key
+        self.history = history
+        self.modified = False  # edited since it was loaded or saved
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+
+class Workspace:
+    """The open vaults, in the order they were opened, and the one on screen."""
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_MB << 20):
+        self.vaults = []
+        self.active = None
+        self.cache = SaveCache(max_bytes, pinned=self._pinned)
+
+    def _pinned(self, key):
+        return any(v.key == key and (v is self.active or v.modified) for v in self.vaults)
+
+    def find(self, path):
+        path = os.path.abspath(path)
+        for vault in self.vaults:
+            if vault.path == path:
+                return vault
+        return None
+
+    def model(self, vault):
+        """The vault's SaveModel, or None if it was dropped from the cache."""
+        return self.cache.get(vault.key)
+
+    def open(self, path, key, history):
+        vault = Vault(path, key, history)
+        self.vaults.append(vault)
+        return vault
+
+    def activate(self, vault, model):
+        """Show vault (whose model is loaded); returns the keys dropped from the cache."""
+        self.active = vault
+        return self.cache.put(vault.key, model)
+
+    def close(self, vault):
+        """
+        Remove vault from the list. Its model stays cached for a quick reopen
+        unless it has unsaved edits (the cache must match the file).
+        """
+        self.vaults.remove(vault)
+        if vault.modified:
+            self.cache.discard(vault.key)
+        if self.active is vault:
+            self.active = None
+
+    def saved(self, vault, path):
+        """vault was written to path: follow the new file and drop other vaults open on it."""
+        key = file_key(path)
+        self.cache.rekey(vault.key, key)
+        for other in [v for v in self.vaults if v is not vault and v.path == os.path.abspath(path)]:
+            self.close(other)
+        vault.path, vault.key = os.path.abspath(path), key
+        vault.modified = False
+
+
+def changed_sections(bases, theirs):
+    """
+    Sections of theirs (a SaveModel of the file on disk) whose bytes differ
+    from bases ({section: base_bytes()} of the open model), and sections
+    that are no longer in the file.
+    """
+    changed = []
+    for key in theirs:
+        base = bases.get(key)
+        if base is None or not same_bytes(base, theirs.clean_bytes(key)):
+            changed.append(key)
+    return changed + [key for key in bases if key not in theirs]
+
+
+def merge(model, theirs, changed):
+    """
+    Take the changed sections of theirs into model, except those with
+    unsaved edits; those keep our version, rebased on theirs so saving
+    overwrites the file without reporting them again. Returns (merged,
+    conflicts, ops), where ops undo the merge (see history.py).
+    """
+    merged, conflicts, ops = [], [], []
+    for key in changed:
+        if model.is_dirty(key):
+            conflicts.append(key)
+            if key in theirs:
+                model.rebase(key, theirs.clean_bytes(key))
+            continue
+        # A section that was never parsed has no earlier undo entries to
+        # protect, so it is not parsed just to record its old value
+        recorded = key not in model or model.is_loaded(key)
+        old = model[key] if key in model and recorded else history.MISSING
+        if key in theirs:
+            new = theirs[key]
+            model.replace_section(key, new, theirs.clean_bytes(key))
+        else:
+            new = history.MISSING
+            del model[key]
+        if recorded:
+            ops.append(history.Replace((key,), old, new))
+        merged.append(key)
+    return merged, conflicts, ops